@@ -1,3 +1,9 @@
 """Define funções e classes relacionados ao processamento de imagem utilizando kernels de convolução."""
 from .convolution_kernel import ConvolutionKernel
-from .image import edge_detection, box_blur, gaussian_blur, sharpen
+from .cache import ResultCache
+from .integral import IntegralImage
+from .image import edge_detection, box_blur, gaussian_blur, sharpen, embossing, stream_filter, refilter, open_raw
+from .pipeline import Pipeline
+from .lazy import LazyImage
+from .sequence import Frame, filter_sequence, iter_frames
+from .profiling import StageRecord, profile
@@ -0,0 +1,333 @@
+"""Aplica um dos filtros de processamento de imagem a vários arquivos, em paralelo.
+
+Uso: python -m convolution_kernel FILTRO ENTRADA [ENTRADA ...] --output SAÍDA [--jobs N] [--force]
+
+As entradas são padrões de caminhos (e.g. "fotos/**/*.png"). A saída é um padrão em que '*' é substituído pelo caminho
+  de cada arquivo de entrada sem extensão, relativo ao início do padrão de entrada sem curingas (e.g. "borradas/*.png",
+  em que "fotos/a/x.png" resulta em "borradas/a/x.png"), ou um diretório, onde os resultados são gravados com o mesmo
+  caminho relativo dos arquivos de entrada. Entradas diferentes que resultariam na mesma saída são reportadas como
+  erros, ao invés de sobrescreverem umas às outras.
+"""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Módulos
+import argparse
+import fnmatch
+import glob
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+# Bibliotecas
+from PIL import Image
+# Locais
+from .image import EDGE_OPERATORS, box_blur, edge_detection, embossing, gaussian_blur, sharpen
+
+
+# Constantes # ------------------------------------------------------------------------------------------------------- #
+# Funções de filtro disponíveis na linha de comando.
+FILTERS = {
+    "edge_detection": edge_detection,
+    "box_blur": box_blur,
+    "gaussian_blur": gaussian_blur,
+    "sharpen": sharpen,
+    "embossing": embossing,
+}
+
+# Número de arquivos aguardando processamento por processo. Limita a memória utilizada em diretórios com muitos
+#   arquivos, já que novos arquivos só são enviados aos processos quando os anteriores terminam.
+BACKLOG_PER_JOB = 2
+
+# Formatos de saída que não suportam transparência, para os quais a imagem resultante é convertida para RGB.
+OPAQUE_FORMATS = ("JPEG", "BMP", "PPM")
+
+
+# Funções # ---------------------------------------------------------------------------------------------------------- #
+def process_file(source: str, destination: str, filter_name: str, parameters: Dict[str, Any]) -> int:
+    """Decodifica uma imagem, aplica um filtro e grava o resultado.
+
+    O resultado é gravado em um arquivo temporário no diretório de destino, que é então renomeado, para que uma
+      execução interrompida nunca deixe um arquivo incompleto que seria considerado atualizado depois.
+
+    Parâmetros
+    ----------
+    source : str
+        O caminho da imagem de entrada.
+    destination : str
+        O caminho da imagem de saída. O formato é determinado pela extensão, e o diretório é criado caso não exista.
+    filter_name : str
+        O nome do filtro aplicado, que deve ser uma das chaves de 'FILTERS'.
+    parameters : Dict[str, Any]
+        Os parâmetros adicionais do filtro (e.g. {"sigma": 5} para "gaussian_blur").
+
+    Retorno
+    -------
+    int
+        O número de pixels da imagem processada.
+    """
+    with Image.open(source) as image:
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or "A" in image.mode else "RGB")
+        result = FILTERS[filter_name](image, **parameters)
+
+    image_format = Image.registered_extensions().get(os.path.splitext(destination)[1].lower())
+    if image_format in OPAQUE_FORMATS:
+        result = result.convert("RGB")
+
+    directory, name = os.path.split(destination)
+    os.makedirs(directory or ".", exist_ok=True)
+    temporary = os.path.join(directory, f".{name}.{os.getpid()}.tmp")
+    try:
+        result.save(temporary, format=image_format)
+        os.replace(temporary, destination)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+    return result.width * result.height
+
+
+def iter_tasks(patterns: List[str], output: str, force: bool = False) -> Iterator[Tuple[str, str, bool]]:
+    """Percorre os arquivos de entrada, sem listá-los todos em memória, e determina o arquivo de saída de cada um.
+
+    Parâmetros
+    ----------
+    patterns : List[str]
+        Os padrões de caminhos dos arquivos de entrada, que aceitam '**' para subdiretórios.
+    output : str
+        O padrão de caminho dos arquivos de saída, em que '*' é substituído pelo caminho do arquivo de entrada sem
+          extensão, relativo ao início do padrão de entrada sem curingas (ver '_glob_root'), ou um diretório.
+    force : bool = False
+        Se os arquivos de saída atualizados também devem ser processados novamente.
+
+    Retorno
+    -------
+    Iterator[Tuple[str, str, bool]]
+        Tuplas (entrada, saída, atualizado), onde 'atualizado' indica se o arquivo de saída já existe e é mais recente
+          que o de entrada.
+    """
+    for pattern in patterns:
+        root = _glob_root(pattern)
+        for source in glob.iglob(pattern, recursive=True):
+            if os.path.isdir(source):
+                continue
+
+            name = os.path.relpath(source, root or ".")
+            if "*" in output:
+                destination = output.replace("*", os.path.splitext(name)[0])
+            else:
+                destination = os.path.join(output, name)
+
+            try:
+                current = not force and os.path.getmtime(destination) >= os.path.getmtime(source)
+            except OSError:
+                current = False
+
+            yield source, destination, current
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    """Processa os arquivos de entrada com um grupo limitado de processos e imprime a vazão obtida.
+
+    Parâmetros
+    ----------
+    arguments : Optional[List[str]] = None
+        Os argumentos de linha de comando. Caso seja 'None', são utilizados os argumentos do processo.
+
+    Retorno
+    -------
+    int
+        O código de saída do processo: 0 caso todos os arquivos tenham sido processados, e 1 caso contrário.
+    """
+    parser = argparse.ArgumentParser(prog="python -m convolution_kernel", description=__doc__.splitlines()[0])
+    parser.add_argument("filter", choices=sorted(FILTERS), help="Filtro aplicado às imagens.")
+    parser.add_argument("inputs", nargs="+", help="Padrões de caminhos das imagens de entrada.")
+    parser.add_argument("-o", "--output", required=True,
+                        help="Padrão de caminho das imagens de saída, em que '*' é o nome da entrada, ou diretório.")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="Número de processos.")
+    parser.add_argument("-f", "--force", action="store_true", help="Processar também as saídas já atualizadas.")
+    parser.add_argument("--radius", type=int, help="Raio da borragem, para o filtro 'box_blur'.")
+    parser.add_argument("--sigma", type=float, help="Desvio padrão da borragem, para o filtro 'gaussian_blur'.")
+    parser.add_argument("--operator", choices=EDGE_OPERATORS, help="Operador do filtro 'edge_detection'.")
+    options = parser.parse_args(arguments)
+
+    if options.jobs < 1:
+        parser.error("o número de processos deve ser pelo menos 1")
+    parameters = {}
+    if options.radius is not None:
+        if options.filter != "box_blur":
+            parser.error("--radius só pode ser utilizado com o filtro 'box_blur'")
+        parameters["radius"] = options.radius
+    if options.sigma is not None:
+        if options.filter != "gaussian_blur":
+            parser.error("--sigma só pode ser utilizado com o filtro 'gaussian_blur'")
+        parameters["sigma"] = options.sigma
+    if options.operator is not None:
+        if options.filter != "edge_detection":
+            parser.error("--operator só pode ser utilizado com o filtro 'edge_detection'")
+        parameters["operator"] = options.operator
+
+    processed = skipped = failed = pixels = 0
+    futures: Dict[Future, str] = {}
+    # A entrada que gerou cada saída, para detectar entradas diferentes com a mesma saída. As saídas dos padrões que
+    #   podem coincidir com as de outros padrões (ver '_shared') são mantidas até o fim, uma por arquivo; as dos
+    #   demais só coincidem entre arquivos de um mesmo diretório, e são mantidas apenas enquanto ele é percorrido.
+    shared = _shared(options.inputs, options.output)
+    sources: Dict[str, str] = {}
+    siblings: Dict[str, str] = {}
+
+    def collect(done: Set[Future]) -> None:
+        nonlocal processed, failed, pixels
+        for future in done:
+            source = futures.pop(future)
+            try:
+                pixels += future.result()
+                processed += 1
+            except Exception as error:
+                failed += 1
+                print(f"{source}: {error}", file=sys.stderr)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=options.jobs) as executor:
+        for pattern in options.inputs:
+            outputs, directory = (sources if pattern in shared else siblings), None
+            for source, destination, current in iter_tasks([pattern], options.output, options.force):
+                if outputs is siblings and os.path.dirname(source) != directory:
+                    directory = os.path.dirname(source)
+                    siblings.clear()
+                previous = outputs.setdefault(os.path.normpath(destination), source)
+                if previous != source:
+                    failed += 1
+                    print(f"{source}: a saída '{destination}' também é a saída de '{previous}'", file=sys.stderr)
+                    continue
+                if current:
+                    skipped += 1
+                    continue
+
+                # Aguardar algum processo terminar antes de enviar mais arquivos.
+                if len(futures) >= BACKLOG_PER_JOB * options.jobs:
+                    collect(wait(futures, return_when=FIRST_COMPLETED)[0])
+                futures[executor.submit(process_file, source, destination, options.filter, parameters)] = source
+
+        collect(wait(futures)[0])
+    elapsed = time.perf_counter() - start
+
+    print(f"{processed} imagens processadas, {skipped} já atualizadas e {failed} com erro em {elapsed:.2f} s: "
+          f"{processed / elapsed:.1f} imagens/s, {pixels / elapsed / 1e6:.1f} MP/s")
+
+    return 1 if failed else 0
+
+
+# Funções Auxiliares # ----------------------------------------------------------------------------------------------- #
+def _glob_root(pattern: str) -> str:
+    """Determina o início de um padrão de caminhos sem curingas, a partir do qual os caminhos de saída são relativos.
+
+    Parâmetros
+    ----------
+    pattern : str
+        O padrão de caminhos, e.g. "fotos/**/*.png".
+
+    Retorno
+    -------
+    str
+        O diretório inicial do padrão sem curingas (e.g. "fotos"), ou o diretório do arquivo caso o padrão não tenha
+          curingas. Pode ser vazio, para padrões relativos ao diretório atual.
+    """
+    root = pattern
+    while _has_magic(root):
+        root = os.path.dirname(root)
+
+    return root if root != pattern else os.path.dirname(pattern)
+
+
+def _has_magic(pattern: str) -> bool:
+    """Verifica se um padrão de caminhos tem curingas.
+
+    Parâmetros
+    ----------
+    pattern : str
+        O padrão de caminhos.
+
+    Retorno
+    -------
+    bool
+        'True' caso o padrão tenha algum dos caracteres '*', '?' e '['.
+    """
+    return any(character in pattern for character in "*?[")
+
+
+def _shared(patterns: List[str], output: str) -> Set[str]:
+    """Determina, antes do processamento, os padrões de entrada cujas saídas precisam ser mantidas até o fim para
+      detectar entradas diferentes com a mesma saída.
+
+    Os caminhos de saída são relativos à raiz de cada padrão (ver '_glob_root'), logo padrões com raízes diferentes
+      produzem a mesma saída quando os seus caminhos relativos podem coincidir, o que é verificado componente a
+      componente, de forma conservadora. Dentro de um padrão, caminhos relativos diferentes só produzem a mesma saída
+      quando diferem apenas na extensão, i.e. entre arquivos de um mesmo diretório, que são listados juntos, exceto
+      quando o padrão termina em '**'.
+
+    Parâmetros
+    ----------
+    patterns : List[str]
+        Os padrões de caminhos dos arquivos de entrada.
+    output : str
+        O padrão de caminho dos arquivos de saída, ou um diretório. Ver 'iter_tasks'.
+
+    Retorno
+    -------
+    Set[str]
+        Os padrões cujas saídas podem coincidir com as de outro padrão, ou cujos arquivos não são listados por
+          diretório.
+    """
+    stem = "*" in output
+    names = []
+    for pattern in patterns:
+        parts = os.path.normpath(os.path.relpath(pattern, _glob_root(pattern) or ".")).split(os.sep)
+        if stem:
+            parts[-1] = os.path.splitext(parts[-1])[0]
+        names.append(parts)
+
+    shared = {pattern for pattern in patterns if stem and os.path.basename(pattern) == "**"}
+    for first in range(len(names)):
+        for second in range(first + 1, len(names)):
+            if _overlap(names[first], names[second]):
+                shared.update((patterns[first], patterns[second]))
+
+    return shared
+
+
+def _overlap(first: List[str], second: List[str]) -> bool:
+    """Verifica se dois padrões de caminhos relativos, divididos em componentes, podem corresponder a um mesmo
+      caminho. Componentes com curingas em ambos os padrões, e padrões com '**', são considerados coincidentes.
+
+    Parâmetros
+    ----------
+    first : List[str]
+        Os componentes do primeiro padrão.
+    second : List[str]
+        Os componentes do segundo padrão.
+
+    Retorno
+    -------
+    bool
+        'True' caso os padrões possam corresponder a um mesmo caminho.
+    """
+    if "**" in first or "**" in second:
+        return True
+    if len(first) != len(second):
+        return False
+
+    for one, other in zip(first, second):
+        if not _has_magic(one) and not _has_magic(other) and os.path.normcase(one) != os.path.normcase(other):
+            return False
+        if _has_magic(one) != _has_magic(other):
+            literal, pattern = (one, other) if _has_magic(other) else (other, one)
+            if not fnmatch.fnmatch(literal, pattern):
+                return False
+
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+"""Mede o desempenho dos métodos de aplicação do kernel de convolução e dos filtros de processamento de imagem.
+
+Uso: python -m convolution_kernel.benchmark [--size 512] [--kernels 3 5 7 ...] [--repeat 3]
+     python -m convolution_kernel.benchmark --suite [--sizes 64 256 ...] [--json FILE] [--compare FILE]
+
+A primeira forma compara os métodos de aplicação do kernel e imprime os pontos de cruzamento entre eles. A segunda
+  executa o conjunto completo de medições, com imagens sintéticas de vários tamanhos, e opcionalmente grava os
+  resultados em JSON e os compara com os de uma execução anterior.
+"""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Módulos
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence
+# Bibliotecas
+import numpy as np
+from PIL import Image
+# Locais
+from .convolution_kernel import ConvolutionKernel
+from .image import box_blur, edge_detection, embossing, gaussian_blur, sharpen
+
+
+# Constantes # ------------------------------------------------------------------------------------------------------- #
+# Filtros medidos pelo conjunto completo de medições.
+FILTERS: Dict[str, Callable[[Image.Image], Image.Image]] = {
+    "edge_detection": edge_detection,
+    "box_blur": box_blur,
+    "gaussian_blur": gaussian_blur,
+    "sharpen": sharpen,
+    "embossing": embossing,
+}
+
+# Tamanhos de lado, em pixels, das imagens sintéticas do conjunto completo de medições.
+IMAGE_SIZES = (64, 256, 1024, 4096, 8192)
+
+# Tamanhos de lado dos kernels do conjunto completo de medições.
+KERNEL_SIZES = (3, 7, 15, 31, 63)
+
+
+# Funções # ---------------------------------------------------------------------------------------------------------- #
+def time_method(kernel: ConvolutionKernel, array: np.ndarray, method: str, repeat: int = 3) -> float:
+    """Mede o tempo de aplicação de um kernel de convolução em um array, com um método específico.
+
+    Parâmetros
+    ----------
+    kernel : ConvolutionKernel
+        O kernel de convolução que será aplicado.
+    array : np.ndarray
+        O array no qual o kernel será aplicado.
+    method : str
+        O método de aplicação do kernel, ver 'ConvolutionKernel.apply_array'.
+    repeat : int
+        O número de repetições da medição. O menor tempo medido é retornado.
+
+    Retorno
+    -------
+    float
+        O menor tempo medido, em segundos.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        kernel.apply_array(array, method=method)
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def compare_methods(size: int, kernel_sizes: Sequence[int], repeat: int = 3) -> Dict[int, Dict[str, float]]:
+    """Mede o tempo de cada método de aplicação do kernel para kernels quadrados de vários tamanhos, aplicados a um
+      array aleatório quadrado.
+
+    Os kernels utilizados são separáveis (produtos externos de vetores aleatórios), para que todos os métodos possam
+      ser medidos.
+
+    Parâmetros
+    ----------
+    size : int
+        O tamanho do lado do array no qual os kernels serão aplicados.
+    kernel_sizes : Sequence[int]
+        Os tamanhos de lado dos kernels medidos. Devem ser ímpares.
+    repeat : int
+        O número de repetições de cada medição.
+
+    Retorno
+    -------
+    Dict[int, Dict[str, float]]
+        O tempo, em segundos, de cada método ("direct", "separable", "fft" e "auto") para cada tamanho de kernel.
+    """
+    generator = np.random.default_rng(0)
+    array = generator.random((size, size)) * 255
+
+    results = {}
+    for kernel_size in kernel_sizes:
+        kernel = ConvolutionKernel(np.outer(generator.random(kernel_size), generator.random(kernel_size)).tolist())
+        results[kernel_size] = {
+            method: time_method(kernel, array, method, repeat) for method in ("direct", "separable", "fft", "auto")
+        }
+
+    return results
+
+
+def crossover(results: Dict[int, Dict[str, float]], slower: str, faster: str) -> Optional[int]:
+    """Encontra o menor tamanho de kernel a partir do qual um método passa a ser mais rápido que outro.
+
+    Parâmetros
+    ----------
+    results : Dict[int, Dict[str, float]]
+        Os tempos medidos por 'compare_methods'.
+    slower : str
+        O método que é mais rápido para kernels pequenos.
+    faster : str
+        O método que se espera ser mais rápido para kernels grandes.
+
+    Retorno
+    -------
+    Optional[int]
+        O menor tamanho de kernel a partir do qual 'faster' é sempre mais rápido que 'slower', ou 'None' caso isso não
+          aconteça para nenhum dos tamanhos medidos.
+    """
+    point = None
+    for kernel_size in sorted(results, reverse=True):
+        if results[kernel_size][faster] >= results[kernel_size][slower]:
+            break
+        point = kernel_size
+
+    return point
+
+
+def measure(function: Callable[[], Any], pixels: int, repeat: int = 3) -> Dict[str, float]:
+    """Mede o tempo, a vazão e o pico de memória de uma operação.
+
+    O tempo é medido sem rastreamento de memória, que deixaria a operação mais lenta, e o pico de memória é medido em
+      uma execução adicional, com 'tracemalloc' (que também rastreia os arrays do NumPy).
+
+    Parâmetros
+    ----------
+    function : Callable[[], Any]
+        A operação medida.
+    pixels : int
+        O número de pixels processados pela operação, para o cálculo da vazão.
+    repeat : int
+        O número de repetições da medição de tempo. O menor tempo medido é utilizado.
+
+    Retorno
+    -------
+    Dict[str, float]
+        O menor tempo medido, em segundos ("seconds"), a vazão correspondente, em megapixels por segundo
+          ("megapixels_per_second"), e o maior número de bytes alocados simultaneamente ("peak_bytes").
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {"seconds": best, "megapixels_per_second": pixels / best / 1e6, "peak_bytes": peak}
+
+
+def run_suite(image_sizes: Sequence[int] = IMAGE_SIZES, kernel_sizes: Sequence[int] = KERNEL_SIZES,
+              repeat: int = 3, progress: Optional[Callable[[str, Dict[str, float]], None]] = None
+              ) -> Dict[str, Dict[str, float]]:
+    """Executa o conjunto completo de medições, com imagens sintéticas reproduzíveis.
+
+    Para cada tamanho de imagem, são medidos todos os filtros de 'FILTERS' em imagens RGB e RGBA, e a aplicação de
+      kernels aleatórios de cada tamanho a uma matriz de dados, com o método escolhido automaticamente.
+
+    Parâmetros
+    ----------
+    image_sizes : Sequence[int]
+        Os tamanhos de lado das imagens quadradas.
+    kernel_sizes : Sequence[int]
+        Os tamanhos de lado dos kernels quadrados. Devem ser ímpares.
+    repeat : int
+        O número de repetições de cada medição de tempo.
+    progress : Optional[Callable[[str, Dict[str, float]], None]] = None
+        Uma função chamada com o nome e o resultado de cada caso assim que ele é medido, e.g. para imprimi-lo.
+
+    Retorno
+    -------
+    Dict[str, Dict[str, float]]
+        O resultado de cada caso (ver 'measure'), com nomes como "filter/sharpen/RGBA/1024" e "kernel/15x15/1024".
+    """
+    results = {}
+
+    def record(name: str, function: Callable[[], Any], pixels: int) -> None:
+        results[name] = measure(function, pixels, repeat)
+        if progress is not None:
+            progress(name, results[name])
+
+    for size in image_sizes:
+        generator = np.random.default_rng(size)
+        pixels = generator.integers(0, 256, (size, size, 4), dtype=np.uint8)
+
+        for mode in ("RGB", "RGBA"):
+            image = Image.fromarray(np.ascontiguousarray(pixels[..., :len(mode)]), mode)
+            for name, function in FILTERS.items():
+                record(f"filter/{name}/{mode}/{size}", lambda: function(image), size * size)
+
+        array = pixels[..., 0].astype(np.float64)
+        for kernel_size in kernel_sizes:
+            kernel = ConvolutionKernel(generator.random((kernel_size, kernel_size)).tolist())
+            record(f"kernel/{kernel_size}x{kernel_size}/{size}", lambda: kernel.apply_array(array), size * size)
+
+    return results
+
+
+def compare_results(baseline: Dict[str, Dict[str, float]], current: Dict[str, Dict[str, float]],
+                    threshold: float = 0.1) -> List[str]:
+    """Compara os resultados de duas execuções do conjunto de medições.
+
+    Parâmetros
+    ----------
+    baseline : Dict[str, Dict[str, float]]
+        Os resultados de referência, retornados por 'run_suite'.
+    current : Dict[str, Dict[str, float]]
+        Os resultados comparados com a referência.
+    threshold : float
+        O aumento relativo do tempo a partir do qual um caso é considerado uma regressão (e.g. 0.1 para 10%).
+
+    Retorno
+    -------
+    List[str]
+        Os nomes dos casos presentes nas duas execuções cujo tempo aumentou mais que o limite, em ordem alfabética.
+    """
+    return sorted(
+        name for name in baseline.keys() & current.keys()
+        if current[name]["seconds"] > baseline[name]["seconds"] * (1 + threshold)
+    )
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    """Executa a comparação de métodos, ou o conjunto completo de medições, e imprime os resultados.
+
+    Parâmetros
+    ----------
+    arguments : Optional[List[str]] = None
+        Os argumentos de linha de comando. Caso seja 'None', são utilizados os argumentos do processo.
+
+    Retorno
+    -------
+    int
+        O código de saída do processo: 1 caso alguma regressão tenha sido encontrada na comparação com uma execução
+          anterior, e 0 caso contrário.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=512, help="Lado do array quadrado processado.")
+    parser.add_argument("--kernels", type=int, nargs="+", help="Lados dos kernels quadrados medidos.")
+    parser.add_argument("--repeat", type=int, default=3, help="Número de repetições de cada medição.")
+    parser.add_argument("--suite", action="store_true", help="Executar o conjunto completo de medições.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(IMAGE_SIZES),
+                        help="Lados das imagens quadradas do conjunto completo de medições.")
+    parser.add_argument("--json", help="Arquivo onde os resultados do conjunto completo de medições são gravados.")
+    parser.add_argument("--compare",
+                        help="Arquivo JSON de uma execução anterior, com o qual os resultados são comparados.")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Aumento relativo do tempo a partir do qual um caso é considerado uma regressão.")
+    options = parser.parse_args(arguments)
+
+    if options.suite:
+        return _main_suite(options)
+
+    options.kernels = options.kernels or [3, 5, 7, 9, 11, 15, 21, 31, 41, 51, 63]
+
+    results = compare_methods(options.size, options.kernels, options.repeat)
+
+    print(f"Array {options.size}x{options.size}, tempos em milissegundos:")
+    print(f"{'kernel':>8} {'direct':>10} {'separable':>10} {'fft':>10} {'auto':>10}")
+    for kernel_size, times in results.items():
+        print(f"{kernel_size:>6}x{kernel_size:<1} " + " ".join(f"{times[method] * 1000:>10.2f}" for method in times))
+
+    print(f"FFT mais rápida que o método direto a partir de: {crossover(results, 'direct', 'fft')}")
+    print(f"FFT mais rápida que o método separável a partir de: {crossover(results, 'separable', 'fft')}")
+
+    return 0
+
+
+def _main_suite(options: argparse.Namespace) -> int:
+    """Executa o conjunto completo de medições a partir dos argumentos de linha de comando de 'main'.
+
+    Parâmetros
+    ----------
+    options : argparse.Namespace
+        Os argumentos de linha de comando interpretados.
+
+    Retorno
+    -------
+    int
+        O código de saída do processo, ver 'main'.
+    """
+    print(f"{'caso':<36} {'ms':>10} {'MP/s':>10} {'pico (MB)':>10}")
+
+    def progress(name: str, result: Dict[str, float]) -> None:
+        print(f"{name:<36} {result['seconds'] * 1000:>10.2f} {result['megapixels_per_second']:>10.2f} "
+              f"{result['peak_bytes'] / 2 ** 20:>10.1f}", flush=True)
+
+    results = run_suite(options.sizes, options.kernels or KERNEL_SIZES, options.repeat, progress)
+
+    if options.json is not None:
+        with open(options.json, "w") as file:
+            json.dump({
+                "environment": {
+                    "python": platform.python_version(),
+                    "numpy": np.__version__,
+                    "machine": platform.machine(),
+                    "processor": platform.processor(),
+                },
+                "results": results,
+            }, file, indent=2)
+
+    if options.compare is None:
+        return 0
+
+    with open(options.compare) as file:
+        baseline = json.load(file)["results"]
+    regressions = compare_results(baseline, results, options.threshold)
+    for name in regressions:
+        print(f"Regressão em {name}: {baseline[name]['seconds'] * 1000:.2f} ms -> "
+              f"{results[name]['seconds'] * 1000:.2f} ms")
+    print(f"{len(regressions)} regressões acima de {options.threshold:.0%} em {len(baseline.keys() & results.keys())} "
+          f"casos comparados.")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""Define a classe 'ResultCache'."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Módulos
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+# Bibliotecas
+import numpy as np
+
+
+# Classes # ---------------------------------------------------------------------------------------------------------- #
+class ResultCache:
+    """Representa um cache de resultados de processamento de imagem, endereçado pelo conteúdo das entradas.
+
+    Os resultados são identificados por uma chave calculada a partir de um hash dos pixels (ou valores) de entrada e
+      de todos os parâmetros que afetam o resultado (e.g. a matriz e a âncora do kernel, o peso e o valor padrão), de
+      forma que a mesma imagem processada com os mesmos parâmetros reutiliza o resultado já calculado.
+
+    Os resultados são mantidos em memória até um limite de bytes, descartando os menos recentemente utilizados quando
+      o limite é excedido. Opcionalmente, os resultados também são gravados em um diretório, para que sobrevivam ao
+      fim do processo.
+
+    Atributos
+    ---------
+    _budget : int
+        O número máximo de bytes de resultados mantidos em memória.
+    _directory : Optional[str]
+        O diretório onde os resultados são gravados, ou 'None' caso os resultados sejam mantidos apenas em memória.
+    _entries : OrderedDict[str, np.ndarray]
+        Os resultados em memória, do menos para o mais recentemente utilizado.
+    _size : int
+        O número de bytes de resultados atualmente em memória.
+    _hits : int
+        O número de consultas respondidas pelo cache, em memória ou em disco.
+    _disk_hits : int
+        O número de consultas respondidas a partir do diretório.
+    _misses : int
+        O número de consultas que não foram respondidas pelo cache.
+    _evictions : int
+        O número de resultados descartados da memória para respeitar o limite de bytes.
+    _lock : threading.Lock
+        Trava que permite utilizar o cache a partir de várias threads.
+    """
+    # Atributos # ---------------------------------------------------------------------------------------------------- #
+    __slots__ = ["_budget", "_directory", "_entries", "_size", "_hits", "_disk_hits", "_misses", "_evictions", "_lock"]
+    _budget: int
+    _directory: Optional[str]
+    _entries: "OrderedDict[str, np.ndarray]"
+    _size: int
+    _hits: int
+    _disk_hits: int
+    _misses: int
+    _evictions: int
+    _lock: threading.Lock
+
+    # Construtores # ------------------------------------------------------------------------------------------------- #
+    def __init__(self, budget: int = 256 * 2 ** 20, directory: Optional[str] = None) -> None:
+        """
+        Parâmetros
+        ----------
+        budget : int = 256 * 2 ** 20
+            O número máximo de bytes de resultados mantidos em memória. Não pode ser negativo [err #1].
+
+            Resultados maiores que o limite não são mantidos em memória, mas ainda são gravados no diretório, caso ele
+              tenha sido definido.
+        directory : Optional[str] = None
+            O diretório onde os resultados serão gravados, para que sobrevivam ao fim do processo. É criado caso não
+              exista. Caso seja 'None', os resultados são mantidos apenas em memória.
+
+            Os arquivos do diretório não são descartados automaticamente.
+
+        Erros
+        -----
+        ValueError
+        [1] Se o parâmetro 'budget' for negativo.
+        """
+        if budget < 0:
+            raise ValueError("[1] Parâmetro 'budget' não pode ser negativo.")
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+        self._budget = budget
+        self._directory = directory
+        self._entries = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    # Propriedades # ------------------------------------------------------------------------------------------------- #
+    @property
+    def budget(self) -> int:
+        """O número máximo de bytes de resultados mantidos em memória.
+
+        Retorno
+        -------
+        int
+            O limite de bytes do cache em memória.
+        """
+        return self._budget
+
+    @property
+    def size(self) -> int:
+        """O número de bytes de resultados atualmente em memória.
+
+        Retorno
+        -------
+        int
+            A soma dos tamanhos, em bytes, dos resultados em memória.
+        """
+        return self._size
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Os contadores de utilização do cache, e.g. para exportação para um sistema de métricas.
+
+        Retorno
+        -------
+        Dict[str, int]
+            Um dicionário com o número de acertos ("hits", dos quais "disk_hits" vieram do diretório), de falhas
+              ("misses") e de descartes ("evictions"), além do número de resultados ("entries") e de bytes ("bytes")
+              em memória.
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "entries": len(self._entries),
+                "bytes": self._size
+            }
+
+    # Métodos # ------------------------------------------------------------------------------------------------------ #
+    @staticmethod
+    def key(*parts: Any) -> str:
+        """Calcula a chave de um resultado a partir de todas as entradas que o determinam.
+
+        Arrays contribuem para a chave com seu formato, tipo e conteúdo; os demais valores, com sua representação
+          textual. O hash utilizado é o BLAKE2b, rápido o suficiente para ser calculado sobre os pixels de uma imagem
+          a cada consulta.
+
+        Parâmetros
+        ----------
+        *parts : Any
+            As entradas que determinam o resultado, e.g. o nome da operação, a matriz do kernel e os pixels da imagem.
+
+        Retorno
+        -------
+        str
+            A chave do resultado, em hexadecimal.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        for part in parts:
+            if isinstance(part, np.ndarray):
+                digest.update(f"array{part.shape}{part.dtype.str}".encode())
+                digest.update(memoryview(np.ascontiguousarray(part)).cast("B"))
+            else:
+                digest.update(repr(part).encode())
+            digest.update(b"\0")
+
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Consulta um resultado no cache, primeiro em memória e depois no diretório.
+
+        Parâmetros
+        ----------
+        key : str
+            A chave do resultado, calculada por 'key'.
+
+        Retorno
+        -------
+        Optional[np.ndarray]
+            Uma cópia do resultado, que pode ser modificada livremente, ou 'None' caso o resultado não esteja no cache.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return value.copy()
+
+        if self._directory is not None:
+            try:
+                value = np.load(self._path(key))
+            except (FileNotFoundError, ValueError, OSError):
+                value = None
+
+            if value is not None:
+                with self._lock:
+                    self._hits += 1
+                    self._disk_hits += 1
+                    self._store(key, value)
+                return value.copy()
+
+        with self._lock:
+            self._misses += 1
+
+        return None
+
+    def put(self, key: str, value: np.ndarray) -> None:
+        """Adiciona um resultado ao cache, descartando os resultados menos recentemente utilizados caso o limite de
+          bytes seja excedido.
+
+        Parâmetros
+        ----------
+        key : str
+            A chave do resultado, calculada por 'key'.
+        value : np.ndarray
+            O resultado. Uma cópia é armazenada, logo o array passado pode ser modificado depois.
+        """
+        value = np.array(value, copy=True)
+
+        if self._directory is not None:
+            # Gravar em um arquivo temporário e renomeá-lo, para que um processo concorrente nunca leia um arquivo
+            #   incompleto.
+            descriptor, temporary = tempfile.mkstemp(dir=self._directory, suffix=".npy")
+            with os.fdopen(descriptor, "wb") as file:
+                np.save(file, value)
+            os.replace(temporary, self._path(key))
+
+        with self._lock:
+            self._store(key, value)
+
+    def clear(self) -> None:
+        """Descarta todos os resultados em memória. Os arquivos do diretório e os contadores são mantidos."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    # Métodos Auxiliares # ------------------------------------------------------------------------------------------- #
+    def _store(self, key: str, value: np.ndarray) -> None:
+        """Armazena um resultado em memória e descarta os menos recentemente utilizados até respeitar o limite de
+          bytes. Deve ser chamado com a trava adquirida.
+
+        Parâmetros
+        ----------
+        key : str
+            A chave do resultado.
+        value : np.ndarray
+            O resultado, que não será mais modificado.
+        """
+        if key in self._entries:
+            self._size -= self._entries.pop(key).nbytes
+        if value.nbytes > self._budget:
+            return
+
+        value.flags.writeable = False
+        self._entries[key] = value
+        self._size += value.nbytes
+
+        while self._size > self._budget:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.nbytes
+            self._evictions += 1
+
+    def _path(self, key: str) -> str:
+        """O caminho do arquivo de um resultado no diretório.
+
+        Parâmetros
+        ----------
+        key : str
+            A chave do resultado.
+
+        Retorno
+        -------
+        str
+            O caminho do arquivo '.npy' correspondente à chave.
+        """
+        return os.path.join(self._directory, f"{key}.npy")
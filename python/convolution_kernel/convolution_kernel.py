@@ -1,7 +1,52 @@
 """Define a classe 'ConvolutionKernel'."""
 # Importações # ------------------------------------------------------------------------------------------------------ #
 # Módulos
-from typing import Callable, List, Optional, Sequence, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+# Bibliotecas
+import numpy as np
+# Locais
+from .cache import ResultCache
+from .integral import IntegralImage
+from .profiling import clock, record
+
+
+# Constantes # ------------------------------------------------------------------------------------------------------- #
+# Tolerância relativa, em relação ao maior valor singular da matriz, abaixo da qual os demais valores singulares são
+#   considerados nulos na detecção de kernels separáveis.
+SEPARABILITY_TOLERANCE = 1e-9
+
+# Métodos de aplicação do kernel aceitos pelos métodos 'apply' e 'apply_array'.
+METHODS = ("auto", "direct", "separable", "fft", "box")
+
+# Custo relativo, por elemento e por bit de log2 do tamanho da transformada, da convolução por FFT em relação a uma
+#   soma de fatia deslocada dos métodos direto e separável. Medido com 'python -m convolution_kernel.benchmark': para
+#   arrays de 512x512, a FFT passa a ser mais rápida que o método direto a partir de kernels 7x7, e mais rápida que o
+#   método separável a partir de kernels 15x15.
+FFT_COST_FACTOR = 1.5
+
+# Custo da aplicação de um kernel uniforme pela imagem integral, na mesma unidade do custo dos demais métodos. Medido
+#   com 'python -m convolution_kernel.benchmark': a imagem integral passa a ser mais rápida que o método separável a
+#   partir de kernels 5x5.
+BOX_COST = 9
+
+# Custo adicional do método separável com aritmética inteira, que escreve o resultado da passada horizontal em um array
+#   intermediário. Medido em um array 2000x2000x3 de 'np.uint8': com o kernel gaussiano 3x3 o método direto é mais
+#   rápido (0,042 s contra 0,051 s), e com o kernel gaussiano 5x5 o separável é (0,12 s contra 0,42 s).
+INTEGER_SEPARABLE_COST = 3
+
+
+# Número aproximado de posições de cada faixa horizontal processada por 'ConvolutionKernel.apply_many'. Faixas
+#   pequenas o suficiente para que a faixa da matriz de dados e as faixas dos resultados fiquem no cache do processador
+#   enquanto todos os kernels são aplicados.
+BAND_ELEMENTS = 16384
+
+
+# Variáveis # -------------------------------------------------------------------------------------------------------- #
+# O array auxiliar 'np.float64' de cada thread, onde 'ConvolutionKernel.apply_array' acumula as somas quando o resultado
+#   é escrito em um array 'out' de outro tipo. É mantido entre as chamadas, e cresce até o maior resultado pedido.
+_SCRATCH = threading.local()
 
 
 # Classes # ---------------------------------------------------------------------------------------------------------- #
@@ -14,11 +59,20 @@ class ConvolutionKernel:
         Um valor que representa uma matriz de números reais, utilizada na aplicação do kernel em uma outra matriz.
     _anchor : Tuple[int, int]
         A posição do elemento na matriz que serve de âncora quando o kernel de convolução é aplicado.
+    _factors : Optional[Tuple[np.ndarray, np.ndarray]]
+        Os fatores horizontal (de tamanho 'width') e vertical (de tamanho 'height') da matriz, caso ela seja separável
+          (i.e. tenha posto 1), ou 'None' caso contrário. A matriz é igual ao produto externo dos dois fatores.
+    _taps : Optional[List[Tuple[int, int, float]]]
+        As posições não-nulas do kernel, compiladas em tuplas (dx, dy, valor) com o deslocamento relativo à âncora, na
+          ordem em que são somadas. É calculado quando o kernel é aplicado pela primeira vez, e descartado quando a
+          matriz ou a âncora são modificadas.
     """
     # Atributos # ---------------------------------------------------------------------------------------------------- #
-    __slots__ = ["_matrix", "_anchor"]
+    __slots__ = ["_matrix", "_anchor", "_factors", "_taps"]
     _matrix: List[List[float]]
     _anchor: Tuple[int, int]
+    _factors: Optional[Tuple[np.ndarray, np.ndarray]]
+    _taps: Optional[List[Tuple[int, int, float]]]
 
     # Construtores # ------------------------------------------------------------------------------------------------- #
     def __init__(self, matrix: Sequence[Sequence[float]], anchor: Optional[Tuple[int, int]] = None) -> None:
@@ -78,6 +132,8 @@ class ConvolutionKernel:
         # A matriz deve ser copiada para não ser modificada externamente.
         self._matrix = [[matrix[col][row] for row in range(len(matrix[0]))] for col in range(len(matrix))]
         self._anchor = anchor
+        self._factors = self._factorize()
+        self._taps = None
 
     # Propriedades # ------------------------------------------------------------------------------------------------- #
     @property
@@ -113,6 +169,7 @@ class ConvolutionKernel:
             raise IndexError("[1] Âncora representa posição fora da matriz.")
 
         self._anchor = value
+        self._taps = None
 
     @property
     def width(self) -> int:
@@ -147,6 +204,39 @@ class ConvolutionKernel:
         """
         return sum([sum([num for num in col]) for col in self._matrix])
 
+    @property
+    def separable(self) -> bool:
+        """Se a matriz correspondente ao kernel de convolução é separável, isto é, se pode ser escrita como o produto
+          externo de um vetor horizontal e um vertical.
+
+        Kernels separáveis são aplicados em duas passadas unidimensionais (uma horizontal e uma vertical), o que custa
+          O(largura + altura) operações por posição, ao invés de O(largura * altura).
+
+        Retorno
+        -------
+        bool
+            'True' caso a matriz seja separável, dentro da tolerância 'SEPARABILITY_TOLERANCE', e 'False' caso
+              contrário.
+        """
+        return self._factors is not None
+
+    @property
+    def uniform(self) -> bool:
+        """Se todos os valores da matriz correspondente ao kernel de convolução são iguais e não-nulos, como em um
+          kernel de "box blur".
+
+        Kernels uniformes podem ser aplicados pela imagem integral da matriz de dados, com custo constante por
+          posição, independentemente do tamanho do kernel.
+
+        Retorno
+        -------
+        bool
+            'True' caso todos os valores da matriz sejam iguais e não-nulos, e 'False' caso contrário.
+        """
+        value = self._matrix[0][0]
+
+        return value != 0 and all(num == value for col in self._matrix for num in col)
+
     # Operadores # --------------------------------------------------------------------------------------------------- #
     def __getitem__(self, index: Tuple[int, int]) -> float:
         """Acessa uma posição da matriz correspondente ao kernel de convolução.
@@ -202,10 +292,14 @@ class ConvolutionKernel:
             raise IndexError("[1] Parâmetro 'index' representa posição fora da matriz.")
 
         self._matrix[index[0]][index[1]] = value
+        self._factors = self._factorize()
+        self._taps = None
 
     # Métodos # ------------------------------------------------------------------------------------------------------ #
     def apply(self, function: Callable[[Tuple[int, int]], float], limits: Tuple[int, int], weight: int = 1,
-              default: int = 0) -> List[List[float]]:
+              default: int = 0, method: str = "auto", workers: int = 1,
+              region: Optional[Tuple[int, int, int, int]] = None, dtype: Optional[np.dtype] = None,
+              out: Optional[np.ndarray] = None) -> Union[List[List[float]], np.ndarray]:
         """Aplica o kernel de convolução em uma série de dados que representam uma matriz.
 
         Parâmetros
@@ -242,34 +336,1294 @@ class ConvolutionKernel:
             e.g.: um kernel de convolução representado por uma matriz 3x3 com âncora no centro, quando aplicado ao valor
               na posição (0, 0) da matriz de dados, não terá como obter os valores nas posições (-1, -1), (-1, 0),
               (-1, 1), (0, -1) e (1, -1). Estes valores serão substituídos por este valor padrão.
+        method : str
+            O método utilizado para aplicar o kernel, dentre os valores em 'METHODS' [err #1]:
+
+            "direct": soma ponderada de todas as posições do kernel, para cada posição da matriz de dados.
+
+            "separable": uma passada horizontal seguida de uma vertical, com custo proporcional a largura + altura do
+              kernel. Só pode ser utilizado com kernels separáveis (ver 'separable') [err #2].
+
+            "fft": multiplicação no domínio da frequência, com custo independente do tamanho do kernel. Os resultados
+              têm erros de arredondamento da ordem de 1e-12 vezes a magnitude dos valores.
+
+            "box": somas de retângulos pela imagem integral (ver 'IntegralImage'), com custo constante por posição,
+              independentemente do tamanho do kernel. Só pode ser utilizado com kernels uniformes (ver 'uniform')
+              [err #2]. Para matrizes de dados que não são inteiras, os resultados têm erros de arredondamento
+              proporcionais à soma dos valores de cada faixa processada.
+
+            "auto": escolhe o método de menor custo estimado para o tamanho do kernel e da matriz de dados.
+        workers : int
+            O número de threads utilizadas pelos métodos vetorizados. Ver 'apply_array'.
+        region : Optional[Tuple[int, int, int, int]] = None
+            O retângulo (x, y, largura, altura) da matriz de dados para o qual o kernel é aplicado, que deve estar
+              dentro dos limites da matriz e ter largura e altura de pelo menos 1 [err #3]. Apenas os valores do
+              retângulo e das posições vizinhas necessárias para o kernel são acessados. Caso seja 'None', o kernel é
+              aplicado à matriz inteira.
+        dtype : Optional[np.dtype] = None
+            O tipo do NumPy do resultado, que deve ser um tipo de números reais ou inteiros [err #4]. Caso seja
+              passado, o resultado é retornado como um array contíguo indexado por linha (y) e coluna (x), ao invés de
+              uma lista de listas indexada por (x, y), com 8 bytes ou menos por posição. Resultados convertidos para
+              tipos inteiros são truncados em direção ao zero e saturados no intervalo do tipo, e.g. 0 a 255 para
+              'np.uint8', assim como nos filtros de imagem.
+        out : Optional[np.ndarray] = None
+            Um array onde o resultado será escrito e que será retornado, com formato (altura, largura) da matriz de
+              dados (ou da região) e com o tipo 'dtype', caso ele seja passado [err #5]. Caso 'dtype' seja 'None', é
+              utilizado o tipo deste array. Permite reutilizar o mesmo array para várias matrizes do mesmo tamanho, sem
+              alocar um novo resultado a cada chamada.
 
         Retorna
         -------
-        List[List[float]]
-            Uma matriz com valores correspondentes à aplicação do kernel na matriz de dados, para cada posição.
+        Union[List[List[float]], np.ndarray]
+            Uma matriz com valores correspondentes à aplicação do kernel na matriz de dados, para cada posição. Caso
+              uma região seja passada, a matriz tem o tamanho da região, e a posição (0, 0) corresponde ao canto
+              superior esquerdo da região. É uma lista de listas indexada por (x, y), caso 'dtype' e 'out' sejam
+              'None', ou um array indexado por (y, x) caso contrário.
+
+        Erros
+        -----
+        ValueError
+        [1] Caso o parâmetro 'method' não seja um dos valores em 'METHODS'.
+
+        [2] Caso o método "separable" seja escolhido para um kernel que não é separável, ou o método "box" para um
+              kernel que não é uniforme.
+
+        [3] Caso a região passada não esteja dentro dos limites da matriz de dados.
+
+        [4] Caso o tipo do resultado não seja um tipo de números reais ou inteiros.
+
+        [5] Caso o array de resultado não tenha o formato da matriz de dados (ou da região) ou o tipo pedido.
         """
-        # Matriz que será retornada.
-        output: List[List[float]] = [[0 for _ in range(limits[1])] for _ in range(limits[0])]
+        # Verificar se o método pedido é válido.
+        if method not in METHODS:
+            raise ValueError(f"[1] Método '{method}' desconhecido, os métodos válidos são {METHODS}.")
+        if (method == "separable" and self._factors is None) or (method == "box" and not self.uniform):
+            raise ValueError(f"[2] O método '{method}' não pode ser utilizado com este kernel.")
+        if region is None:
+            region = (0, 0, limits[0], limits[1])
+        elif not _inside(region, limits[0], limits[1]):
+            raise ValueError("[3] A região deve estar dentro dos limites da matriz de dados.")
+
+        region_x, region_y, region_width, region_height = region
+        if dtype is not None and not _numeric(dtype):
+            raise ValueError("[4] O tipo do resultado deve ser um tipo de números reais ou inteiros do NumPy.")
+        if out is not None and (out.shape != (region_height, region_width)
+                                or (dtype is not None and out.dtype != np.dtype(dtype))):
+            raise ValueError("[5] O array de resultado deve ter o formato da matriz de dados (ou da região) e o tipo "
+                             "pedido.")
+        as_array = dtype is not None or out is not None
+        method = self._select_method(method, (region_height, region_width))
+
+        # Os métodos vetorizados são aplicados através de 'apply_array'. Para isso, a região e sua vizinhança são lidas
+        #   uma única vez, e o resultado convertido de volta para o formato de retorno deste método.
+        if method != "direct":
+            start = clock()
+            (top, bottom), (left, right) = self._halo(region, limits[1], limits[0])[:2]
+            data = np.empty((bottom - top, right - left), dtype=np.float64)
+            for index_y in range(top, bottom):
+                for index_x in range(left, right):
+                    data[index_y - top, index_x - left] = function((index_x, index_y))
+            record("kernel.sample", start, data.size, data.nbytes)
+
+            inner = (region_x - left, region_y - top, region_width, region_height)
+            output_array = self.apply_array(data, weight=weight, default=default, method=method, workers=workers,
+                                            region=inner, dtype=dtype, out=out)
+
+            return output_array if as_array else output_array.T.tolist()
+
+        start = clock()
+
+        # Matriz que será retornada. Caso o resultado seja um array, cada linha é calculada em um único array auxiliar
+        #   e convertida de uma vez para o tipo do resultado.
+        output: List[List[float]] = []
+        if as_array:
+            row = np.empty(region_width, dtype=np.float64)
+            if out is None:
+                out = np.empty((region_height, region_width), dtype=dtype)
+        else:
+            output = [[0 for _ in range(region_height)] for _ in range(region_width)]
 
-        # Itera-se sobre cada valor da estrutura original, linha por linha, e calcula-se o novo valor.
-        for index_y in range(limits[1]):
-            for index_x in range(limits[0]):
+        # Apenas as posições não-nulas do kernel são aplicadas. As posições cujas vizinhas estão todas dentro dos
+        #   limites da matriz de dados formam um retângulo interno, onde não é necessário verificar os limites.
+        taps = self._compile()
+        start_x = max([0] + [-offset_x for offset_x, _, _ in taps])
+        end_x = min([limits[0]] + [limits[0] - offset_x for offset_x, _, _ in taps])
+        start_y = max([0] + [-offset_y for _, offset_y, _ in taps])
+        end_y = min([limits[1]] + [limits[1] - offset_y for _, offset_y, _ in taps])
+
+        # Itera-se sobre cada valor da região, linha por linha, e calcula-se o novo valor.
+        for index_y in range(region_y, region_y + region_height):
+            inner_row = start_y <= index_y < end_y
+
+            for index_x in range(region_x, region_x + region_width):
                 new_total = 0
 
                 # Aplicar o kernel de convolução.
-                for kernel_iy in range(self.height):
-                    for kernel_ix in range(self.width):
-                        target_ix = index_x + kernel_ix - (self.width - 1) // 2
-                        target_iy = index_y + kernel_iy - (self.height - 1) // 2
+                if inner_row and start_x <= index_x < end_x:
+                    for offset_x, offset_y, value in taps:
+                        new_total += function((index_x + offset_x, index_y + offset_y)) * value
+                else:
+                    for offset_x, offset_y, value in taps:
+                        target_ix = index_x + offset_x
+                        target_iy = index_y + offset_y
 
                         # Se a posição buscada estiver fora dos limites da imagem, utilizar o valor padrão.
                         if 0 <= target_ix < limits[0] and 0 <= target_iy < limits[1]:
                             # Aplicar o peso do kernel naquela posição e somar o resultado ao total.
-                            new_total += function((target_ix, target_iy)) * self[kernel_ix, kernel_iy]
+                            new_total += function((target_ix, target_iy)) * value
                         else:
-                            new_total += default * self[kernel_ix, kernel_iy]
+                            new_total += default * value
 
                 # Dividir o total pelo peso e colocá-lo na matriz que será retornada.
-                output[index_x][index_y] = new_total / weight
+                if as_array:
+                    row[index_x - region_x] = new_total / weight
+                else:
+                    output[index_x - region_x][index_y - region_y] = new_total / weight
+
+            if as_array:
+                _convert(row, out[index_y - region_y])
+
+        record("kernel.apply", start, region_width * region_height)
+
+        return out if as_array else output
+
+    def apply_array(self, array: np.ndarray, weight: int = 1, default: int = 0, method: str = "auto",
+                    workers: int = 1, cache: Optional[ResultCache] = None,
+                    region: Optional[Tuple[int, int, int, int]] = None, dtype: Optional[np.dtype] = None,
+                    out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Aplica o kernel de convolução em um array do NumPy, processando a matriz inteira de uma vez.
+
+        Equivalente ao método 'apply', mas ao invés de acessar cada valor através de um objeto chamável, soma fatias
+          deslocadas do array para cada posição do kernel, de forma que o número de operações em Python depende apenas
+          do tamanho do kernel, e não do tamanho da matriz de dados.
+
+        Parâmetros
+        ----------
+        array : np.ndarray
+            O array que será processado, com formato (altura, largura) ou (altura, largura, canais). Note que, ao
+              contrário do método 'apply', a indexação segue a convenção de imagens do NumPy, onde o primeiro índice é
+              a linha (y) e o segundo a coluna (x).
+
+            Arrays com três dimensões têm cada canal processado independentemente, como se o kernel fosse aplicado a
+              cada canal separadamente.
+
+            O array deve ter duas ou três dimensões [err #1].
+        weight : int
+            O peso pelo qual o kernel de convolução deverá dividir a soma ponderada dos valores relacionados para cada
+              posição da matriz que será processada. Ver 'apply'.
+        default : int
+            O valor padrão para ser utilizado quando um dado valor na matriz de dados não possuir vizinhos o suficiente.
+              Ver 'apply'.
+        method : str
+            O método utilizado para aplicar o kernel, dentre os valores em 'METHODS' [err #2]. Ver 'apply'.
+
+            Os métodos "separable" e "box" só podem ser utilizados com kernels separáveis e uniformes,
+              respectivamente [err #3].
+        workers : int
+            O número de threads que aplicarão o kernel em paralelo. Deve ser pelo menos 1 [err #4].
+
+            Nos métodos "direct" e "separable", a matriz de dados é dividida em faixas horizontais, cada uma lida junto
+              com as (height - 1) linhas vizinhas necessárias, e cada thread escreve sua faixa diretamente no array de
+              resultado. No método "fft", os canais de um array com três dimensões são divididos entre as threads.
+
+            As operações do NumPy liberam o GIL, e o resultado é idêntico, bit a bit, ao obtido com uma única thread.
+        cache : Optional[ResultCache] = None
+            Um cache de resultados, consultado antes da aplicação do kernel e atualizado depois dela. A chave considera
+              o conteúdo do array, a matriz e a âncora do kernel, o peso, o valor padrão, o método utilizado e a região.
+              Caso seja 'None', o kernel é sempre aplicado.
+        region : Optional[Tuple[int, int, int, int]] = None
+            O retângulo (x, y, largura, altura) do array para o qual o kernel é aplicado, que deve estar dentro do array
+              e ter largura e altura de pelo menos 1 [err #5]. Apenas a região e as posições vizinhas necessárias para
+              o kernel são lidas. Caso seja 'None', o kernel é aplicado ao array inteiro.
+        dtype : Optional[np.dtype] = None
+            O tipo do NumPy do resultado, que deve ser um tipo de números reais ou inteiros [err #6]. Ver 'apply'. Caso
+              seja 'None', é utilizado o tipo de 'out', ou 'np.float64'.
+        out : Optional[np.ndarray] = None
+            Um array onde o resultado será escrito e que será retornado, com o formato do array passado (ou da região)
+              e com o tipo 'dtype', caso ele seja passado [err #7]. Arrays 'np.float64' recebem as somas diretamente,
+              e os demais tipos são convertidos a partir de um array auxiliar de cada thread, reutilizado entre as
+              chamadas. Assim, chamadas repetidas com o mesmo 'out' não alocam o resultado.
+
+        Retorna
+        -------
+        np.ndarray
+            Um array com o mesmo formato do array passado (ou da região, caso ela seja passada), com valores
+              correspondentes à aplicação do kernel na matriz de dados, para cada posição. É do tipo 'dtype' (ou do
+              tipo de 'out'), ou de números reais ('np.float64') caso ambos sejam 'None'.
+
+        Erros
+        -----
+        ValueError
+        [1] Caso o parâmetro 'array' não tenha duas ou três dimensões.
+
+        [2] Caso o parâmetro 'method' não seja um dos valores em 'METHODS'.
+
+        [3] Caso o método "separable" seja escolhido para um kernel que não é separável, ou o método "box" para um
+              kernel que não é uniforme.
+
+        [4] Caso o parâmetro 'workers' seja menor que 1.
+
+        [5] Caso a região passada não esteja dentro do array.
+
+        [6] Caso o tipo do resultado não seja um tipo de números reais ou inteiros.
+
+        [7] Caso o array de resultado não tenha o formato do array passado (ou da região) ou o tipo pedido.
+        """
+        # Verificar se o array tem um formato válido.
+        if array.ndim not in (2, 3):
+            raise ValueError("[1] Parâmetro 'array' deve ter duas ou três dimensões.")
+
+        # Verificar se o método pedido é válido.
+        if method not in METHODS:
+            raise ValueError(f"[2] Método '{method}' desconhecido, os métodos válidos são {METHODS}.")
+        if (method == "separable" and self._factors is None) or (method == "box" and not self.uniform):
+            raise ValueError(f"[3] O método '{method}' não pode ser utilizado com este kernel.")
+        if workers < 1:
+            raise ValueError("[4] Parâmetro 'workers' deve ser pelo menos 1.")
+        if region is None:
+            region = (0, 0, array.shape[1], array.shape[0])
+        elif not _inside(region, array.shape[1], array.shape[0]):
+            raise ValueError("[5] A região deve estar dentro do array.")
+
+        shape = (region[3], region[2]) + array.shape[2:]
+        if dtype is not None and not _numeric(dtype):
+            raise ValueError("[6] O tipo do resultado deve ser um tipo de números reais ou inteiros do NumPy.")
+        if out is not None and (out.shape != shape or (dtype is not None and out.dtype != np.dtype(dtype))):
+            raise ValueError("[7] O array de resultado deve ter o formato do array (ou da região) e o tipo pedido.")
+        dtype = np.dtype(dtype if dtype is not None else out.dtype if out is not None else np.float64)
+        method = self._select_method(method, shape[:2])
+
+        # Consultar o cache de resultados.
+        if cache is not None:
+            key = cache.key("apply_array", self._matrix, self._anchor, weight, default, method, region, array)
+            cached = cache.get(key)
+            if cached is not None:
+                if out is None and dtype == np.float64:
+                    return cached
+                return _convert(cached, out if out is not None else np.empty(shape, dtype=dtype))
+
+        # Envolver a região com o valor padrão, para que as posições fora dos limites da matriz de dados sejam
+        #   acessadas como qualquer outra posição.
+        start = clock()
+        (top, bottom), (left, right), padding = self._halo(region, array.shape[0], array.shape[1])
+        padding += [(0, 0)] * (array.ndim - 2)
+        padded = np.pad(array[top:bottom, left:right].astype(np.float64, copy=False), padding, mode="constant",
+                        constant_values=default)
+        record("kernel.pad", start, padded.shape[0] * padded.shape[1], padded.nbytes)
+
+        # Aplicar o kernel com o método escolhido, dividindo o trabalho entre as threads. Os métodos acumulam as somas
+        #   em 'np.float64', diretamente no array de resultado quando ele é desse tipo, ou no array auxiliar da thread
+        #   quando o resultado é escrito em um array de outro tipo.
+        start = clock()
+        if out is None:
+            output = np.empty(shape, dtype=np.float64)
+        else:
+            output = out if dtype == np.float64 else _scratch(shape)
+        if workers == 1:
+            self._convolve(method, padded, output)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                tasks = [
+                    executor.submit(self._convolve, method, padded_part, output_part)
+                    for padded_part, output_part in self._partition(method, padded, output, workers)
+                ]
+                for task in tasks:
+                    task.result()
+
+        # Dividir o total pelo peso.
+        output /= weight
+        record(f"kernel.{method}", start, shape[0] * shape[1], output.nbytes)
+
+        if cache is not None:
+            cache.put(key, output)
+
+        if dtype != np.float64:
+            output = _convert(output, out if out is not None else np.empty(shape, dtype=dtype))
+
+        return output
+
+    def apply_integer(self, array: np.ndarray, weight: int = 1, default: int = 0, saturate: bool = True,
+                      workers: int = 1, region: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """Aplica o kernel de convolução em um array de inteiros (e.g. os layers 'np.uint8' de uma imagem) utilizando
+          apenas aritmética inteira.
+
+        As somas ponderadas são acumuladas no menor tipo inteiro que comporta todos os resultados possíveis ('np.int16'
+          para os kernels dos filtros de imagem, ou 'np.int32' e 'np.int64' para kernels maiores), sem sinal quando os
+          dados, o kernel, o valor padrão e o peso não são negativos, e a divisão pelo peso é truncada em direção ao
+          zero, sendo feita por deslocamento de bits quando o peso é uma potência de 2.
+          O resultado é exatamente igual a 'int' aplicado ao resultado de 'apply_array', com muito menos memória
+          percorrida do que com números reais. Kernels separáveis com fatores inteiros são aplicados em duas passadas
+          unidimensionais, e kernels uniformes grandes pela imagem integral, quando isso custa menos somas.
+
+        Parâmetros
+        ----------
+        array : np.ndarray
+            O array de inteiros que será processado, com formato (altura, largura) ou (altura, largura, canais), assim
+              como em 'apply_array' [err #1].
+        weight : int
+            O peso pelo qual a soma ponderada é dividida. Deve ser um inteiro diferente de zero [err #2]. Ver 'apply'.
+        default : int
+            O valor padrão para posições fora da matriz de dados. Deve ser um inteiro [err #2]. Ver 'apply'.
+        saturate : bool
+            Se o resultado deve ser saturado no intervalo 0 a 255 e retornado como 'np.uint8', como é feito com os
+              layers de uma imagem. Caso seja 'False', o resultado é retornado no tipo inteiro utilizado nas somas.
+        workers : int
+            O número de threads que aplicarão o kernel em paralelo, em faixas horizontais. Deve ser pelo menos 1
+              [err #4]. Ver 'apply_array'.
+        region : Optional[Tuple[int, int, int, int]] = None
+            O retângulo (x, y, largura, altura) do array para o qual o kernel é aplicado [err #5]. Ver 'apply_array'.
+
+        Retorna
+        -------
+        np.ndarray
+            Um array de inteiros, com o mesmo formato do array passado (ou da região, caso ela seja passada), com os
+              resultados truncados da aplicação do kernel na matriz de dados, para cada posição.
+
+        Erros
+        -----
+        ValueError
+        [1] Caso o parâmetro 'array' não seja um array de inteiros com duas ou três dimensões.
+
+        [2] Caso o peso seja zero, ou o peso ou o valor padrão não sejam inteiros.
+
+        [3] Caso a matriz do kernel tenha valores que não são inteiros.
+
+        [4] Caso o parâmetro 'workers' seja menor que 1.
+
+        [5] Caso a região passada não esteja dentro do array.
+        """
+        # Verificar se os parâmetros são válidos.
+        if array.ndim not in (2, 3) or not np.issubdtype(array.dtype, np.integer):
+            raise ValueError("[1] Parâmetro 'array' deve ser um array de inteiros com duas ou três dimensões.")
+        if weight == 0 or weight != int(weight) or default != int(default):
+            raise ValueError("[2] O peso deve ser um inteiro diferente de zero, e o valor padrão deve ser um inteiro.")
+        taps = self._compile()
+        if any(value != int(value) for _, _, value in taps):
+            raise ValueError("[3] A matriz do kernel deve ter apenas valores inteiros.")
+        if workers < 1:
+            raise ValueError("[4] Parâmetro 'workers' deve ser pelo menos 1.")
+        if region is None:
+            region = (0, 0, array.shape[1], array.shape[0])
+        elif not _inside(region, array.shape[1], array.shape[0]):
+            raise ValueError("[5] A região deve estar dentro do array.")
+        weight, default = int(weight), int(default)
+
+        # Escolher o menor tipo inteiro que comporta a maior soma ponderada possível. Sem valores negativos nos dados,
+        #   no kernel e no peso, a soma nunca é negativa e cabe em um tipo sem sinal.
+        limits = np.iinfo(array.dtype)
+        largest = max(abs(int(limits.min)), abs(int(limits.max)), abs(default))
+        bound = sum(abs(int(value)) for _, _, value in taps) * largest
+        unsigned = limits.min >= 0 and default >= 0 and weight > 0 and all(value >= 0 for _, _, value in taps)
+        candidates = (np.uint16, np.uint32, np.uint64) if unsigned else (np.int16, np.int32, np.int64)
+        accumulator = next((dtype for dtype in candidates[:2] if bound <= np.iinfo(dtype).max), candidates[2])
+
+        # Envolver a região com o valor padrão, mantendo o tipo original sempre que o valor padrão couber nele.
+        start = clock()
+        (top, bottom), (left, right), padding = self._halo(region, array.shape[0], array.shape[1])
+        padding += [(0, 0)] * (array.ndim - 2)
+        halo = array[top:bottom, left:right]
+        if not limits.min <= default <= limits.max:
+            halo = halo.astype(accumulator)
+        padded = np.pad(halo, padding, mode="constant", constant_values=default)
+        record("kernel.pad", start, padded.shape[0] * padded.shape[1], padded.nbytes)
+
+        # Aplicar o kernel, dividindo o trabalho entre as threads.
+        start = clock()
+        shape = (region[3], region[2]) + array.shape[2:]
+        output = np.empty(shape, dtype=accumulator)
+        if workers == 1:
+            self._convolve_integer(padded, output)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                tasks = [
+                    executor.submit(self._convolve_integer, padded_part, output_part)
+                    for padded_part, output_part in self._partition("direct", padded, output, workers)
+                ]
+                for task in tasks:
+                    task.result()
+
+        # Dividir o total pelo peso, truncando em direção ao zero: a divisão é feita sobre o módulo, e o sinal é
+        #   restaurado em seguida. Totais sem sinal são divididos diretamente.
+        if weight < 0:
+            np.negative(output, out=output)
+            weight = -weight
+        if weight != 1:
+            negative = None if unsigned else output < 0
+            if negative is not None:
+                np.abs(output, out=output)
+            if weight & (weight - 1) == 0:
+                np.right_shift(output, weight.bit_length() - 1, out=output)
+            else:
+                np.floor_divide(output, weight, out=output)
+            if negative is not None:
+                np.negative(output, out=output, where=negative)
+
+        if saturate:
+            output = np.clip(output, 0, 255).astype(np.uint8)
+        record("kernel.integer", start, shape[0] * shape[1], output.nbytes)
 
         return output
+
+    @staticmethod
+    def apply_many(kernels: Sequence["ConvolutionKernel"], array: np.ndarray,
+                   weights: Union[float, Sequence[float]] = 1, default: int = 0, workers: int = 1,
+                   region: Optional[Tuple[int, int, int, int]] = None) -> np.ndarray:
+        """Aplica vários kernels de convolução ao mesmo array do NumPy em uma única passada pela matriz de dados.
+
+        A matriz é envolvida uma única vez pela união das vizinhanças dos kernels, e percorrida em faixas horizontais
+          de cerca de 'BAND_ELEMENTS' posições. Em cada faixa, cada deslocamento presente em algum dos kernels é lido
+          uma única vez e somado aos resultados de todos os kernels que têm uma posição não-nula nele, enquanto a
+          faixa ainda está no cache do processador. Os resultados são idênticos, bit a bit, aos de 'apply_array' com o
+          método "direct" para cada kernel.
+
+        Parâmetros
+        ----------
+        kernels : Sequence[ConvolutionKernel]
+            Os kernels aplicados, que podem ter tamanhos e âncoras diferentes. Deve haver pelo menos um [err #1].
+        array : np.ndarray
+            O array que será processado, com formato (altura, largura) ou (altura, largura, canais) [err #2]. Ver
+              'apply_array'.
+        weights : Union[float, Sequence[float]]
+            O peso pelo qual a soma ponderada de cada kernel é dividida. Pode ser um único peso, utilizado para todos
+              os kernels, ou um peso para cada kernel [err #3]. Ver 'apply'.
+        default : int
+            O valor padrão para posições fora da matriz de dados. Ver 'apply'.
+        workers : int
+            O número de threads que processarão as faixas em paralelo. Deve ser pelo menos 1 [err #4].
+        region : Optional[Tuple[int, int, int, int]] = None
+            O retângulo (x, y, largura, altura) do array para o qual os kernels são aplicados [err #5]. Ver
+              'apply_array'.
+
+        Retorna
+        -------
+        np.ndarray
+            Um array de números reais ('np.float64') com um plano de resultado para cada kernel, na ordem em que foram
+              passados, i.e. com formato (kernels,) mais o formato do array passado (ou da região).
+
+        Erros
+        -----
+        ValueError
+        [1] Caso nenhum kernel seja passado.
+
+        [2] Caso o parâmetro 'array' não tenha duas ou três dimensões.
+
+        [3] Caso o número de pesos seja diferente do número de kernels.
+
+        [4] Caso o parâmetro 'workers' seja menor que 1.
+
+        [5] Caso a região passada não esteja dentro do array.
+        """
+        # Verificar se os parâmetros são válidos.
+        if len(kernels) == 0:
+            raise ValueError("[1] Pelo menos um kernel deve ser passado.")
+        if array.ndim not in (2, 3):
+            raise ValueError("[2] Parâmetro 'array' deve ter duas ou três dimensões.")
+        weights = [weights] * len(kernels) if np.isscalar(weights) else list(weights)
+        if len(weights) != len(kernels):
+            raise ValueError("[3] Deve haver um peso para cada kernel.")
+        if workers < 1:
+            raise ValueError("[4] Parâmetro 'workers' deve ser pelo menos 1.")
+        if region is None:
+            region = (0, 0, array.shape[1], array.shape[0])
+        elif not _inside(region, array.shape[1], array.shape[0]):
+            raise ValueError("[5] A região deve estar dentro do array.")
+
+        # União das vizinhanças dos kernels, em deslocamentos relativos às âncoras, e os kernels que utilizam cada
+        #   deslocamento. Os deslocamentos são percorridos linha por linha, da esquerda para a direita, a mesma ordem
+        #   das posições de cada kernel (ver '_compile'), para que as somas sejam feitas na mesma ordem.
+        before_x = max(kernel._anchor[0] for kernel in kernels)
+        before_y = max(kernel._anchor[1] for kernel in kernels)
+        after_x = max(kernel.width - 1 - kernel._anchor[0] for kernel in kernels)
+        after_y = max(kernel.height - 1 - kernel._anchor[1] for kernel in kernels)
+        users: Dict[Tuple[int, int], List[Tuple[int, float]]] = {}
+        for index, kernel in enumerate(kernels):
+            for offset_x, offset_y, value in kernel._compile():
+                users.setdefault((offset_y, offset_x), []).append((index, value))
+        offsets = sorted(users)
+
+        # Envolver a região com o valor padrão uma única vez, pela união das vizinhanças.
+        start = clock()
+        region_x, region_y, region_width, region_height = region
+        top, left = region_y - before_y, region_x - before_x
+        bottom, right = region_y + region_height + after_y, region_x + region_width + after_x
+        padding = [(max(-top, 0), max(bottom - array.shape[0], 0)), (max(-left, 0), max(right - array.shape[1], 0))]
+        padding += [(0, 0)] * (array.ndim - 2)
+        halo = array[max(top, 0):min(bottom, array.shape[0]), max(left, 0):min(right, array.shape[1])]
+        padded = np.pad(halo.astype(np.float64, copy=False), padding, mode="constant", constant_values=default)
+        record("kernel.pad", start, padded.shape[0] * padded.shape[1], padded.nbytes)
+
+        start = clock()
+        shape = (region_height, region_width) + array.shape[2:]
+        output = np.zeros((len(kernels),) + shape, dtype=np.float64)
+        rows = max(BAND_ELEMENTS // (region_width * (shape[2] if len(shape) == 3 else 1)), 1)
+
+        def sweep(band_start: int) -> None:
+            band_end = min(band_start + rows, region_height)
+            targets = output[:, band_start:band_end]
+            product = np.empty_like(targets[0])
+            for offset_y, offset_x in offsets:
+                row, column = band_start + before_y + offset_y, before_x + offset_x
+                shifted = padded[row:row + band_end - band_start, column:column + region_width]
+                for index, value in users[(offset_y, offset_x)]:
+                    np.multiply(shifted, value, out=product)
+                    targets[index] += product
+
+        bands = range(0, region_height, rows)
+        if workers == 1:
+            for band_start in bands:
+                sweep(band_start)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for task in [executor.submit(sweep, band_start) for band_start in bands]:
+                    task.result()
+
+        # Dividir cada total pelo peso do seu kernel.
+        for index, weight in enumerate(weights):
+            output[index] /= weight
+        record("kernel.many", start, len(kernels) * region_width * region_height, output.nbytes)
+
+        return output
+
+    def apply_rows(self, bands: Iterable[np.ndarray], weight: int = 1, default: int = 0,
+                   method: str = "auto") -> Iterator[np.ndarray]:
+        """Aplica o kernel de convolução em uma matriz de dados lida aos poucos, em faixas horizontais.
+
+        Apenas as últimas (height - 1) linhas de cada faixa são mantidas entre uma faixa e outra, de forma que a memória
+          utilizada é proporcional à largura da matriz vezes a altura do kernel (mais a altura de uma faixa), e não ao
+          tamanho da matriz inteira. Isso permite processar matrizes maiores que a memória disponível, lidas de um
+          arquivo e escritas em outro (e.g. através de 'np.memmap').
+
+        Parâmetros
+        ----------
+        bands : Iterable[np.ndarray]
+            As faixas horizontais consecutivas da matriz de dados, de cima para baixo, cada uma com formato
+              (linhas, largura) ou (linhas, largura, canais). Todas as faixas devem ter a mesma largura e o mesmo
+              número de canais, mas podem ter números de linhas diferentes.
+        weight : int
+            O peso pelo qual o kernel de convolução deverá dividir a soma ponderada dos valores relacionados para cada
+              posição da matriz que será processada. Ver 'apply'.
+        default : int
+            O valor padrão para ser utilizado quando um dado valor na matriz de dados não possuir vizinhos o suficiente.
+              Ver 'apply'.
+        method : str
+            O método utilizado para aplicar o kernel, dentre os valores em 'METHODS' [err #1]. Ver 'apply'. O método
+              é escolhido uma única vez, a partir da primeira faixa.
+
+            Os métodos "separable" e "box" só podem ser utilizados com kernels separáveis e uniformes,
+              respectivamente [err #2].
+
+        Retorna
+        -------
+        Iterator[np.ndarray]
+            As faixas horizontais consecutivas do resultado, com valores iguais aos que seriam obtidos com
+              'apply_array' na matriz inteira (a menos de arredondamentos nos métodos "fft" e "box" com valores não
+              inteiros, que dependem do tamanho de cada faixa). As linhas de cada faixa do resultado são produzidas
+              assim que todas as suas vizinhas foram lidas, logo as faixas do resultado podem ter números de linhas
+              diferentes das faixas da matriz de dados.
+
+        Erros
+        -----
+        ValueError
+        [1] Caso o parâmetro 'method' não seja um dos valores em 'METHODS'.
+
+        [2] Caso o método "separable" seja escolhido para um kernel que não é separável, ou o método "box" para um
+              kernel que não é uniforme.
+        """
+        # Verificar se o método pedido é válido antes de começar a ler as faixas.
+        if method not in METHODS:
+            raise ValueError(f"[1] Método '{method}' desconhecido, os métodos válidos são {METHODS}.")
+        if (method == "separable" and self._factors is None) or (method == "box" and not self.uniform):
+            raise ValueError(f"[2] O método '{method}' não pode ser utilizado com este kernel.")
+
+        return self._stream(bands, weight, default, method)
+
+    def apply_mapped(self, source: Union[str, np.ndarray], destination: Union[str, np.ndarray], weight: int = 1,
+                     default: int = 0, method: str = "auto", band_height: int = 256,
+                     dtype: Optional[np.dtype] = None) -> np.ndarray:
+        """Aplica o kernel de convolução em um array mapeado em arquivo, escrevendo o resultado em outro array mapeado.
+
+        A matriz de dados é lida em faixas horizontais de 'band_height' linhas, que são fatias do array mapeado e só
+          são lidas do arquivo quando processadas, e cada faixa do resultado é escrita no destino assim que fica pronta
+          (ver 'apply_rows'). A memória utilizada é proporcional à largura da matriz vezes a altura da faixa, e o cache
+          de páginas do sistema operacional gerencia o acesso aos arquivos, de forma que matrizes de vários gigabytes
+          podem ser processadas sem serem copiadas para a memória.
+
+        Parâmetros
+        ----------
+        source : Union[str, np.ndarray]
+            A matriz de dados: o caminho de um arquivo '.npy', aberto com 'np.load(..., mmap_mode="r")', ou um array
+              com duas ou três dimensões [err #3], tipicamente um 'np.memmap' (ver 'open_raw' para arquivos sem
+              cabeçalho).
+        destination : Union[str, np.ndarray]
+            O destino do resultado: o caminho de um arquivo '.npy', que será criado e mapeado em memória, ou um array
+              com o mesmo formato da matriz de dados [err #4].
+        weight : int
+            O peso pelo qual o kernel de convolução deverá dividir a soma ponderada. Ver 'apply'.
+        default : int
+            O valor padrão para posições fora da matriz de dados. Ver 'apply'.
+        method : str
+            O método utilizado para aplicar o kernel, dentre os valores em 'METHODS' [err #1]. Ver 'apply_rows'.
+
+            Os métodos "separable" e "box" só podem ser utilizados com kernels separáveis e uniformes,
+              respectivamente [err #2].
+        band_height : int
+            O número de linhas da matriz de dados lidas de cada vez. Deve ser pelo menos 1 [err #5].
+        dtype : Optional[np.dtype] = None
+            O tipo do resultado, que deve ser um tipo de números reais ou inteiros [err #6]. Resultados inteiros são
+              truncados e saturados, ver 'apply'. Caso seja 'None', é utilizado o tipo do destino, caso seja um array,
+              ou 'np.float64'.
+
+        Retorno
+        -------
+        np.ndarray
+            O array de destino, com os valores correspondentes à aplicação do kernel na matriz de dados, iguais aos
+              obtidos com 'apply_array' (ver 'apply_rows').
+
+        Erros
+        -----
+        ValueError
+        [1] Caso o parâmetro 'method' não seja um dos valores em 'METHODS'.
+
+        [2] Caso o método "separable" seja escolhido para um kernel que não é separável, ou o método "box" para um
+              kernel que não é uniforme.
+
+        [3] Caso a matriz de dados não tenha duas ou três dimensões.
+
+        [4] Caso o array de destino não tenha o formato da matriz de dados, ou tenha um tipo diferente de 'dtype'.
+
+        [5] Caso o parâmetro 'band_height' seja menor que 1.
+
+        [6] Caso o tipo do resultado não seja um tipo de números reais ou inteiros.
+        """
+        # Verificar se os parâmetros são válidos antes de criar o destino.
+        if isinstance(source, str):
+            source = np.load(source, mmap_mode="r")
+        if source.ndim not in (2, 3):
+            raise ValueError("[3] A matriz de dados deve ter duas ou três dimensões.")
+        if band_height < 1:
+            raise ValueError("[5] Parâmetro 'band_height' deve ser pelo menos 1.")
+        if dtype is not None and not _numeric(dtype):
+            raise ValueError("[6] O tipo do resultado deve ser um tipo de números reais ou inteiros do NumPy.")
+        if not isinstance(destination, str) and (destination.shape != source.shape
+                                                 or (dtype is not None and destination.dtype != np.dtype(dtype))):
+            raise ValueError("[4] O destino deve ter o formato da matriz de dados e o tipo pedido.")
+        rows = self.apply_rows((source[top:top + band_height] for top in range(0, source.shape[0], band_height)),
+                               weight=weight, default=default, method=method)
+        if isinstance(destination, str):
+            destination = np.lib.format.open_memmap(destination, mode="w+", dtype=dtype or np.float64,
+                                                    shape=source.shape)
+
+        start = clock()
+        row = 0
+        for values in rows:
+            _convert(values, destination[row:row + values.shape[0]])
+            row += values.shape[0]
+
+        if isinstance(destination, np.memmap):
+            destination.flush()
+        record("kernel.mapped", start, source.shape[0] * source.shape[1])
+
+        return destination
+
+    def compose(self, other: "ConvolutionKernel") -> "ConvolutionKernel":
+        """Combina este kernel de convolução com outro, em um único kernel cuja aplicação equivale a aplicar este
+          kernel e, ao resultado, o outro.
+
+        A equivalência é exata para as posições cuja vizinhança no kernel combinado está inteiramente dentro da matriz
+          de dados. Nas demais, a aplicação sucessiva considera o valor padrão para as posições do resultado
+          intermediário fora da matriz, enquanto o kernel combinado o considera apenas para a matriz original.
+
+        Parâmetros
+        ----------
+        other : ConvolutionKernel
+            O kernel aplicado depois deste.
+
+        Retorno
+        -------
+        ConvolutionKernel
+            O kernel combinado, com largura e altura iguais às somas das larguras e das alturas dos dois kernels menos
+              1, e âncora igual à soma das âncoras. Os valores são inteiros caso os valores dos dois kernels sejam.
+        """
+        matrix = [[0] * (self.height + other.height - 1) for _ in range(self.width + other.width - 1)]
+        for self_ix, col in enumerate(self._matrix):
+            for self_iy, value in enumerate(col):
+                if value == 0:
+                    continue
+                for other_ix, other_col in enumerate(other._matrix):
+                    target = matrix[self_ix + other_ix]
+                    for other_iy, other_value in enumerate(other_col):
+                        target[self_iy + other_iy] += value * other_value
+
+        anchor = (self._anchor[0] + other._anchor[0], self._anchor[1] + other._anchor[1])
+
+        return ConvolutionKernel(matrix, anchor=anchor)
+
+    # Métodos Auxiliares # ------------------------------------------------------------------------------------------- #
+    def _compile(self) -> List[Tuple[int, int, float]]:
+        """Retorna as posições não-nulas do kernel, com seus deslocamentos relativos à âncora, compilando-as caso
+          ainda não tenham sido compiladas desde a última modificação do kernel.
+
+        Posições nulas não contribuem para a soma ponderada, e são ignoradas na aplicação do kernel (e.g. o kernel de
+          detecção de arestas tem apenas 4 posições não-nulas, de 9).
+
+        Retorno
+        -------
+        List[Tuple[int, int, float]]
+            Tuplas (dx, dy, valor), na mesma ordem em que as posições são somadas: linha por linha, de cima para
+              baixo, e da esquerda para a direita em cada linha.
+        """
+        if self._taps is None:
+            anchor_x, anchor_y = self._anchor
+            self._taps = [
+                (kernel_ix - anchor_x, kernel_iy - anchor_y, self._matrix[kernel_ix][kernel_iy])
+                for kernel_iy in range(self.height)
+                for kernel_ix in range(self.width)
+                if self._matrix[kernel_ix][kernel_iy] != 0
+            ]
+
+        return self._taps
+
+    def _stream(self, bands: Iterable[np.ndarray], weight: int, default: int, method: str) -> Iterator[np.ndarray]:
+        """Gerador utilizado por 'apply_rows', que mantém a janela de linhas ainda necessárias entre as faixas.
+
+        Parâmetros
+        ----------
+        bands : Iterable[np.ndarray]
+            As faixas horizontais consecutivas da matriz de dados.
+        weight : int
+            O peso pelo qual a soma ponderada é dividida.
+        default : int
+            O valor padrão para posições fora da matriz de dados.
+        method : str
+            O método pedido, já validado.
+
+        Retorna
+        -------
+        Iterator[np.ndarray]
+            As faixas horizontais consecutivas do resultado.
+        """
+        anchor_x, anchor_y = self._anchor
+        window: Optional[np.ndarray] = None
+
+        for band in bands:
+            # Envolver a faixa com o valor padrão apenas nas laterais, pois as linhas vizinhas vêm das outras faixas.
+            padding = [(0, 0), (anchor_x, self.width - 1 - anchor_x)] + [(0, 0)] * (band.ndim - 2)
+            padded = np.pad(band.astype(np.float64, copy=False), padding, mode="constant", constant_values=default)
+
+            if window is None:
+                # As linhas acima da matriz de dados têm o valor padrão.
+                method = self._select_method(method, band.shape[:2])
+                window = np.full((anchor_y,) + padded.shape[1:], default, dtype=np.float64)
+            window = np.concatenate([window, padded])
+
+            rows = window.shape[0] - self.height + 1
+            if rows > 0:
+                output = np.empty((rows, band.shape[1]) + band.shape[2:], dtype=np.float64)
+                self._convolve(method, window, output)
+                output /= weight
+                yield output
+
+                # Manter apenas as linhas que ainda serão vizinhas das próximas linhas do resultado.
+                window = window[rows:].copy()
+
+        if window is None:
+            return
+
+        # As linhas abaixo da matriz de dados têm o valor padrão.
+        bottom = np.full((self.height - 1 - anchor_y,) + window.shape[1:], default, dtype=np.float64)
+        window = np.concatenate([window, bottom])
+
+        rows = window.shape[0] - self.height + 1
+        if rows > 0:
+            output = np.empty((rows, window.shape[1] - self.width + 1) + window.shape[2:], dtype=np.float64)
+            self._convolve(method, window, output)
+            output /= weight
+            yield output
+
+    def _factorize(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Detecta se a matriz do kernel de convolução é separável e, caso seja, calcula seus fatores.
+
+        A separabilidade é verificada pelos valores singulares da matriz: ela é separável se todos os valores
+          singulares, exceto o maior, forem desprezíveis em relação a ele. Os fatores, entretanto, são extraídos
+          diretamente da linha e da coluna do elemento de maior módulo. Para matrizes de inteiros, a linha é dividida
+          pelo máximo divisor comum dos seus valores, o que mantém os dois fatores inteiros e as somas exatas, e.g.
+          [[1, 2, 1], [2, 4, 2], [1, 2, 1]] tem fatores [1, 2, 1] e [1, 2, 1].
+
+        Retorno
+        -------
+        Optional[Tuple[np.ndarray, np.ndarray]]
+            Os fatores horizontal e vertical da matriz, caso ela seja separável, ou 'None' caso contrário.
+        """
+        # Matriz no formato (altura, largura), para que o primeiro índice seja a linha.
+        matrix = np.array(self._matrix, dtype=np.float64).T
+
+        singular_values = np.linalg.svd(matrix, compute_uv=False)
+        if singular_values[0] == 0 or np.any(singular_values[1:] > SEPARABILITY_TOLERANCE * singular_values[0]):
+            return None
+
+        # Extrair os fatores a partir do elemento de maior módulo.
+        pivot_iy, pivot_ix = np.unravel_index(np.argmax(np.abs(matrix)), matrix.shape)
+        row = matrix[pivot_iy, :]
+        divisor = np.gcd.reduce(row.astype(np.int64)) if np.all(matrix == np.round(matrix)) else row[pivot_ix]
+        horizontal = row / divisor
+        vertical = matrix[:, pivot_ix] / horizontal[pivot_ix]
+
+        return horizontal, vertical
+
+    def _halo(self, region: Tuple[int, int, int, int], rows: int, columns: int
+              ) -> Tuple[Tuple[int, int], Tuple[int, int], List[Tuple[int, int]]]:
+        """Calcula a vizinhança de uma região da matriz de dados lida na aplicação do kernel, recortada para dentro da
+          matriz, e o quanto ela deve ser envolvida pelo valor padrão.
+
+        Parâmetros
+        ----------
+        region : Tuple[int, int, int, int]
+            O retângulo (x, y, largura, altura) para o qual o kernel é aplicado.
+        rows : int
+            O número de linhas da matriz de dados.
+        columns : int
+            O número de colunas da matriz de dados.
+
+        Retorno
+        -------
+        Tuple[Tuple[int, int], Tuple[int, int], List[Tuple[int, int]]]
+            Os intervalos (início, fim) de linhas e de colunas da vizinhança dentro da matriz de dados, e o número de
+              linhas e de colunas de valor padrão antes e depois da vizinhança, no formato de 'np.pad'.
+        """
+        region_x, region_y, region_width, region_height = region
+        anchor_x, anchor_y = self._anchor
+
+        top, left = region_y - anchor_y, region_x - anchor_x
+        bottom = region_y + region_height + self.height - 1 - anchor_y
+        right = region_x + region_width + self.width - 1 - anchor_x
+        padding = [(max(-top, 0), max(bottom - rows, 0)), (max(-left, 0), max(right - columns, 0))]
+
+        return (max(top, 0), min(bottom, rows)), (max(left, 0), min(right, columns)), padding
+
+    def _select_method(self, method: str, shape: Tuple[int, int]) -> str:
+        """Escolhe o método de aplicação do kernel de menor custo estimado, caso o método pedido seja "auto".
+
+        O custo de cada método é estimado em somas de fatias deslocadas por elemento da matriz de dados: o método
+          direto custa uma por posição não-nula do kernel, o separável uma por posição de cada fator, a imagem integral
+          custa 'BOX_COST', e a FFT é proporcional a log2 do tamanho da transformada, multiplicado por
+          'FFT_COST_FACTOR'.
+
+        Parâmetros
+        ----------
+        method : str
+            O método pedido, já validado, dentre os valores em 'METHODS'.
+        shape : Tuple[int, int]
+            O formato (altura, largura) da matriz de dados.
+
+        Retorno
+        -------
+        str
+            O método que será utilizado, que nunca é "auto".
+        """
+        if method != "auto":
+            return method
+
+        costs = self._costs(shape)
+
+        return min(costs, key=costs.get)
+
+    def _costs(self, shape: Tuple[int, int], integer: bool = False) -> Dict[str, float]:
+        """Estima o custo de cada método de aplicação do kernel, em somas de fatias deslocadas por elemento da matriz
+          de dados (ver '_select_method').
+
+        Parâmetros
+        ----------
+        shape : Tuple[int, int]
+            O formato (altura, largura) da matriz de dados.
+        integer : bool = False
+            Se o kernel é aplicado com aritmética inteira (ver 'apply_integer'), que não aceita a FFT, e aceita o método
+              separável apenas quando os fatores são inteiros, com o custo adicional 'INTEGER_SEPARABLE_COST'.
+
+        Retorno
+        -------
+        Dict[str, float]
+            O custo de cada método aceito pelo kernel, com o método "direct" primeiro, de forma que ele é escolhido em
+              caso de empate.
+        """
+        costs = {"direct": len(self._compile())}
+        if not integer:
+            fft_size = _fast_length(shape[0] + self.height - 1) * _fast_length(shape[1] + self.width - 1)
+            costs["fft"] = FFT_COST_FACTOR * np.log2(fft_size) * fft_size / max(shape[0] * shape[1], 1)
+        if self._factors is not None and not integer:
+            costs["separable"] = self.width + self.height
+        elif self._factors is not None and all(np.all(factor == np.round(factor)) for factor in self._factors):
+            costs["separable"] = self.width + self.height + INTEGER_SEPARABLE_COST
+        if self.uniform:
+            costs["box"] = BOX_COST
+
+        return costs
+
+    def _partition(self, method: str, padded: np.ndarray, output: np.ndarray,
+                   parts: int) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """Divide um array envolvido e o array de resultado em partes que podem ser processadas independentemente.
+
+        Nos métodos "direct" e "separable", as partes são faixas horizontais do resultado, e cada faixa do array
+          envolvido inclui as (height - 1) linhas vizinhas necessárias. Nos métodos "fft" e "box", as partes são os
+          canais, pois faixas alterariam o tamanho das transformadas ou a origem das imagens integrais e, com isso, os
+          erros de arredondamento.
+
+        Parâmetros
+        ----------
+        method : str
+            O método de aplicação do kernel, já escolhido.
+        padded : np.ndarray
+            O array envolvido pelo valor padrão.
+        output : np.ndarray
+            O array onde o resultado será escrito.
+        parts : int
+            O número máximo de partes.
+
+        Retorno
+        -------
+        List[Tuple[np.ndarray, np.ndarray]]
+            Pares de visões do array envolvido e do array de resultado, para cada parte.
+        """
+        if method == "fft" or method == "box":
+            if output.ndim == 2:
+                return [(padded, output)]
+            return [(padded[..., channel], output[..., channel]) for channel in range(output.shape[2])]
+
+        bounds = np.linspace(0, output.shape[0], min(parts, max(output.shape[0], 1)) + 1).astype(int)
+        return [
+            (padded[start:end + self.height - 1], output[start:end])
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+
+    def _convolve(self, method: str, padded: np.ndarray, output: np.ndarray) -> None:
+        """Calcula a soma ponderada de cada posição de um array já envolvido pelo valor padrão, com o método passado.
+
+        Parâmetros
+        ----------
+        method : str
+            O método de aplicação do kernel, já escolhido.
+        padded : np.ndarray
+            O array envolvido, com (height - 1) linhas e (width - 1) colunas a mais do que o resultado.
+        output : np.ndarray
+            O array onde a soma ponderada, ainda não dividida pelo peso, será escrita.
+        """
+        if method == "fft":
+            self._convolve_fft(padded, output)
+        elif method == "box":
+            self._convolve_box(padded, output)
+        elif method == "separable":
+            self._convolve_separable(padded, output)
+        else:
+            self._convolve_direct(padded, output)
+
+    def _convolve_direct(self, padded: np.ndarray, output: np.ndarray) -> None:
+        """Calcula a soma ponderada de cada posição de um array já envolvido pelo valor padrão, somando uma fatia
+          deslocada para cada posição do kernel.
+
+        Parâmetros
+        ----------
+        padded : np.ndarray
+            O array envolvido, com (height - 1) linhas e (width - 1) colunas a mais do que o resultado.
+        output : np.ndarray
+            O array onde a soma ponderada, ainda não dividida pelo peso, será escrita.
+        """
+        height, width = output.shape[:2]
+        anchor_x, anchor_y = self._anchor
+
+        # Os produtos de cada posição do kernel são calculados em um mesmo array auxiliar, para não alocar um novo array
+        #   a cada posição. A ordem das somas é a mesma do método 'apply', para que os resultados sejam idênticos.
+        product = np.empty_like(output)
+        output[...] = 0
+        for offset_x, offset_y, value in self._compile():
+            kernel_ix = offset_x + anchor_x
+            kernel_iy = offset_y + anchor_y
+            shifted = padded[kernel_iy:kernel_iy + height, kernel_ix:kernel_ix + width]
+            np.multiply(shifted, value, out=product)
+            output += product
+
+    def _convolve_box(self, padded: np.ndarray, output: np.ndarray) -> None:
+        """Calcula a soma ponderada de cada posição de um array já envolvido pelo valor padrão, para um kernel
+          uniforme, através da imagem integral do array.
+
+        Parâmetros
+        ----------
+        padded : np.ndarray
+            O array envolvido, com (height - 1) linhas e (width - 1) colunas a mais do que o resultado.
+        output : np.ndarray
+            O array onde a soma ponderada, ainda não dividida pelo peso, será escrita.
+        """
+        output[...] = IntegralImage(padded).valid_sum(self.width, self.height) * self._matrix[0][0]
+
+    def _convolve_integer(self, padded: np.ndarray, output: np.ndarray) -> None:
+        """Calcula a soma ponderada de cada posição de um array de inteiros já envolvido pelo valor padrão, somando
+          uma fatia deslocada para cada posição não-nula do kernel, com aritmética inteira no tipo do array de
+          resultado.
+
+        Parâmetros
+        ----------
+        padded : np.ndarray
+            O array envolvido, com (height - 1) linhas e (width - 1) colunas a mais do que o resultado.
+        output : np.ndarray
+            O array de inteiros onde a soma ponderada, ainda não dividida pelo peso, será escrita.
+        """
+        taps = self._compile()
+
+        # Kernels uniformes grandes são aplicados pela imagem integral, e kernels com fatores inteiros em duas passadas
+        #   unidimensionais, quando isso custa menos somas; ambos também têm somas exatas para inteiros.
+        costs = self._costs(output.shape[:2], integer=True)
+        method = min(costs, key=costs.get)
+        if method == "box":
+            self._convolve_box(padded, output)
+            return
+        if method == "separable":
+            self._convolve_integer_separable(padded, output)
+            return
+
+        height, width = output.shape[:2]
+        anchor_x, anchor_y = self._anchor
+
+        product = np.empty_like(output)
+        output[...] = 0
+        for offset_x, offset_y, value in taps:
+            kernel_ix = offset_x + anchor_x
+            kernel_iy = offset_y + anchor_y
+            shifted = padded[kernel_iy:kernel_iy + height, kernel_ix:kernel_ix + width]
+            if value == 1:
+                output += shifted
+            elif value == -1:
+                output -= shifted
+            else:
+                np.multiply(shifted, output.dtype.type(value), out=product)
+                output += product
+
+    def _convolve_integer_separable(self, padded: np.ndarray, output: np.ndarray) -> None:
+        """Calcula a soma ponderada de cada posição de um array de inteiros já envolvido pelo valor padrão, em uma
+          passada horizontal seguida de uma vertical, utilizando os fatores inteiros da matriz separável.
+
+        A passada horizontal é acumulada no menor tipo inteiro que comporta as suas somas, com ou sem sinal como o
+          array de resultado, e a vertical no tipo do array de resultado, que comporta as somas de todas as posições
+          do kernel.
+
+        Parâmetros
+        ----------
+        padded : np.ndarray
+            O array envolvido, com (height - 1) linhas e (width - 1) colunas a mais do que o resultado.
+        output : np.ndarray
+            O array de inteiros onde a soma ponderada, ainda não dividida pelo peso, será escrita.
+        """
+        horizontal_factor, vertical_factor = (factor.astype(np.int64) for factor in self._factors)
+        height, width = output.shape[:2]
+
+        # Passada horizontal, sobre todas as linhas do array envolvido, inclusive as que só servem de vizinhas.
+        limits = np.iinfo(padded.dtype)
+        bound = int(np.abs(horizontal_factor).sum()) * max(abs(int(limits.min)), abs(int(limits.max)))
+        candidates = (np.uint16, np.uint32) if np.iinfo(output.dtype).min == 0 else (np.int16, np.int32)
+        accumulator = next((dtype for dtype in candidates if bound <= np.iinfo(dtype).max), output.dtype.type)
+        horizontal = np.zeros((padded.shape[0], width) + padded.shape[2:], dtype=accumulator)
+        product = np.empty_like(horizontal)
+        for kernel_ix, value in enumerate(horizontal_factor):
+            shifted = padded[:, kernel_ix:kernel_ix + width]
+            if value == 1:
+                horizontal += shifted
+            elif value != 0:
+                np.multiply(shifted, accumulator(value), out=product)
+                horizontal += product
+
+        # Passada vertical, sobre o resultado da passada horizontal.
+        product = np.empty_like(output)
+        output[...] = 0
+        for kernel_iy, value in enumerate(vertical_factor):
+            shifted = horizontal[kernel_iy:kernel_iy + height]
+            if value == 1:
+                output += shifted
+            elif value != 0:
+                np.multiply(shifted, output.dtype.type(value), out=product)
+                output += product
+
+    def _convolve_separable(self, padded: np.ndarray, output: np.ndarray) -> None:
+        """Calcula a soma ponderada de cada posição de um array já envolvido pelo valor padrão, em uma passada
+          horizontal seguida de uma vertical, utilizando os fatores da matriz separável.
+
+        Parâmetros
+        ----------
+        padded : np.ndarray
+            O array envolvido, com (height - 1) linhas e (width - 1) colunas a mais do que o resultado.
+        output : np.ndarray
+            O array onde a soma ponderada, ainda não dividida pelo peso, será escrita.
+        """
+        horizontal_factor, vertical_factor = self._factors
+        height, width = output.shape[:2]
+
+        # Passada horizontal, sobre todas as linhas do array envolvido, inclusive as que só servem de vizinhas.
+        horizontal = np.zeros((padded.shape[0], width) + padded.shape[2:], dtype=np.float64)
+        product = np.empty_like(horizontal)
+        for kernel_ix in range(self.width):
+            np.multiply(padded[:, kernel_ix:kernel_ix + width], horizontal_factor[kernel_ix], out=product)
+            horizontal += product
+
+        # Passada vertical, sobre o resultado da passada horizontal.
+        product = product[:height]
+        output[...] = 0
+        for kernel_iy in range(self.height):
+            np.multiply(horizontal[kernel_iy:kernel_iy + height], vertical_factor[kernel_iy], out=product)
+            output += product
+
+    def _convolve_fft(self, padded: np.ndarray, output: np.ndarray) -> None:
+        """Calcula a soma ponderada de cada posição de um array já envolvido pelo valor padrão, multiplicando os
+          espectros do array e do kernel, obtidos por transformadas de Fourier reais.
+
+        A transformada tem pelo menos o tamanho do array envolvido, de forma que os efeitos da convolução circular ficam
+          restritos às linhas e colunas que são descartadas, e as posições fora da matriz de dados continuam com o valor
+          padrão, assim como nos outros métodos. Cada canal é transformado separadamente, para que o resultado não
+          dependa de como os canais são divididos entre threads.
+
+        Parâmetros
+        ----------
+        padded : np.ndarray
+            O array envolvido, com (height - 1) linhas e (width - 1) colunas a mais do que o resultado.
+        output : np.ndarray
+            O array onde a soma ponderada, ainda não dividida pelo peso, será escrita.
+        """
+        height, width = output.shape[:2]
+        size = (_fast_length(padded.shape[0]), _fast_length(padded.shape[1]))
+
+        # O kernel é invertido, pois a aplicação do kernel é uma correlação, e não uma convolução propriamente dita.
+        kernel = np.array(self._matrix, dtype=np.float64).T[::-1, ::-1]
+        kernel_spectrum = np.fft.rfft2(kernel, s=size)
+
+        for channel in range(1 if padded.ndim == 2 else padded.shape[2]):
+            padded_channel = padded if padded.ndim == 2 else padded[..., channel]
+            output_channel = output if output.ndim == 2 else output[..., channel]
+
+            result = np.fft.irfft2(np.fft.rfft2(padded_channel, s=size) * kernel_spectrum, s=size)
+            output_channel[...] = result[self.height - 1:self.height - 1 + height,
+                                         self.width - 1:self.width - 1 + width]
+
+
+# Funções Auxiliares # ----------------------------------------------------------------------------------------------- #
+def _inside(region: Tuple[int, int, int, int], width: int, height: int) -> bool:
+    """Verifica se uma região é um retângulo não-vazio dentro de uma matriz de dados.
+
+    Parâmetros
+    ----------
+    region : Tuple[int, int, int, int]
+        O retângulo (x, y, largura, altura).
+    width : int
+        A largura da matriz de dados.
+    height : int
+        A altura da matriz de dados.
+
+    Retorno
+    -------
+    bool
+        'True' caso o retângulo tenha largura e altura de pelo menos 1 e esteja inteiramente dentro da matriz.
+    """
+    region_x, region_y, region_width, region_height = region
+
+    return (region_width >= 1 and region_height >= 1 and 0 <= region_x and 0 <= region_y
+            and region_x + region_width <= width and region_y + region_height <= height)
+
+
+def _numeric(dtype: np.dtype) -> bool:
+    """Verifica se um tipo do NumPy é um tipo de números reais ou inteiros, aceito como tipo de resultado.
+
+    Parâmetros
+    ----------
+    dtype : np.dtype
+        O tipo verificado, ou qualquer valor aceito por 'np.dtype'.
+
+    Retorno
+    -------
+    bool
+        'True' caso o tipo seja de números reais ou inteiros (com ou sem sinal), e 'False' caso contrário.
+    """
+    try:
+        dtype = np.dtype(dtype)
+    except TypeError:
+        return False
+
+    return np.issubdtype(dtype, np.floating) or np.issubdtype(dtype, np.integer)
+
+
+def _scratch(shape: Tuple[int, ...]) -> np.ndarray:
+    """Retorna o array auxiliar 'np.float64' da thread atual com o formato passado, aumentando-o caso necessário.
+
+    Parâmetros
+    ----------
+    shape : Tuple[int, ...]
+        O formato do array.
+
+    Retorno
+    -------
+    np.ndarray
+        Um array contíguo com o formato passado, de conteúdo indefinido, válido até a próxima chamada na mesma thread.
+    """
+    size = int(np.prod(shape))
+    buffer = getattr(_SCRATCH, "buffer", None)
+    if buffer is None or buffer.size < size:
+        buffer = _SCRATCH.buffer = np.empty(size, dtype=np.float64)
+
+    return buffer[:size].reshape(shape)
+
+
+def _convert(values: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Converte resultados de números reais para o tipo de um array de resultado, escrevendo-os nele.
+
+    Para tipos inteiros, os valores são truncados em direção ao zero e saturados no intervalo do tipo. O array de
+      valores é modificado durante a conversão.
+
+    Parâmetros
+    ----------
+    values : np.ndarray
+        Os valores convertidos, 'np.float64'.
+    out : np.ndarray
+        O array de resultado, com o mesmo formato dos valores.
+
+    Retorno
+    -------
+    np.ndarray
+        O próprio array de resultado.
+    """
+    if np.issubdtype(out.dtype, np.integer):
+        limits = np.iinfo(out.dtype)
+        np.trunc(values, out=values)
+        np.clip(values, limits.min, limits.max, out=values)
+    np.copyto(out, values, casting="unsafe")
+
+    return out
+
+
+def _fast_length(length: int) -> int:
+    """Calcula o menor tamanho maior ou igual ao passado cujos únicos fatores primos são 2, 3 e 5, para o qual as
+      transformadas de Fourier são eficientes.
+
+    Parâmetros
+    ----------
+    length : int
+        O tamanho mínimo da transformada.
+
+    Retorno
+    -------
+    int
+        O menor tamanho eficiente maior ou igual a 'length'.
+    """
+    best = None
+
+    # Testar cada combinação de potências de 5 e 3, completada com a menor potência de 2 que atinge o tamanho pedido.
+    power_5 = 1
+    while True:
+        power_35 = power_5
+        while True:
+            candidate = power_35
+            while candidate < length:
+                candidate *= 2
+            best = candidate if best is None else min(best, candidate)
+
+            if power_35 >= length:
+                break
+            power_35 *= 3
+
+        if power_5 >= length:
+            break
+        power_5 *= 5
+
+    return best
@@ -0,0 +1,153 @@
+"""Define a classe 'IntegralImage'."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Módulos
+from typing import Optional, Tuple
+# Bibliotecas
+import numpy as np
+
+
+# Classes # ---------------------------------------------------------------------------------------------------------- #
+class IntegralImage:
+    """Representa a imagem integral (ou tabela de áreas somadas) de uma matriz de dados, que permite calcular a soma
+      de qualquer retângulo da matriz com apenas quatro acessos, independentemente do tamanho do retângulo.
+
+    A imagem integral é calculada uma única vez, e pode ser reutilizada para somas de retângulos de vários tamanhos
+      (e.g. borragens de vários raios da mesma imagem).
+
+    Atributos
+    ---------
+    _table : np.ndarray
+        A tabela de áreas somadas, com uma linha e uma coluna de zeros a mais no início, de forma que
+          _table[y, x] é a soma de todos os valores acima e à esquerda da posição (x, y), exclusive. Matrizes de
+          inteiros têm a tabela calculada com 'np.int64', e as somas são exatas; as demais utilizam 'np.float64'.
+    """
+    # Atributos # ---------------------------------------------------------------------------------------------------- #
+    __slots__ = ["_table"]
+    _table: np.ndarray
+
+    # Construtores # ------------------------------------------------------------------------------------------------- #
+    def __init__(self, array: np.ndarray) -> None:
+        """
+        Parâmetros
+        ----------
+        array : np.ndarray
+            A matriz de dados, com formato (altura, largura) ou (altura, largura, canais) [err #1].
+
+        Erros
+        -----
+        ValueError
+        [1] Se o parâmetro 'array' não tiver duas ou três dimensões.
+        """
+        if array.ndim not in (2, 3):
+            raise ValueError("[1] Parâmetro 'array' deve ter duas ou três dimensões.")
+
+        dtype = np.int64 if np.issubdtype(array.dtype, np.integer) else np.float64
+        self._table = np.zeros((array.shape[0] + 1, array.shape[1] + 1) + array.shape[2:], dtype=dtype)
+        np.cumsum(array, axis=0, dtype=dtype, out=self._table[1:, 1:])
+        np.cumsum(self._table[1:, 1:], axis=1, out=self._table[1:, 1:])
+
+    # Propriedades # ------------------------------------------------------------------------------------------------- #
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """O formato da matriz de dados a partir da qual a imagem integral foi calculada.
+
+        Retorno
+        -------
+        Tuple[int, ...]
+            O formato (altura, largura) ou (altura, largura, canais) da matriz de dados.
+        """
+        return (self._table.shape[0] - 1, self._table.shape[1] - 1) + self._table.shape[2:]
+
+    # Métodos # ------------------------------------------------------------------------------------------------------ #
+    def box_sum(self, width: int, height: int, anchor: Optional[Tuple[int, int]] = None,
+                default: float = 0) -> np.ndarray:
+        """Calcula, para cada posição da matriz de dados, a soma dos valores de um retângulo ao seu redor.
+
+        É equivalente a aplicar um kernel de convolução com todos os valores iguais a 1, do mesmo tamanho do
+          retângulo, mas com custo constante por posição, independentemente do tamanho do retângulo.
+
+        Parâmetros
+        ----------
+        width : int
+            A largura do retângulo. Deve ser pelo menos 1 [err #1].
+        height : int
+            A altura do retângulo. Deve ser pelo menos 1 [err #1].
+        anchor : Optional[Tuple[int, int]] = None
+            A posição (x, y), dentro do retângulo, que corresponde à posição para a qual a soma é calculada, assim como
+              a âncora de um kernel de convolução. Caso seja 'None', é utilizado o centro do retângulo, arredondado
+              para baixo.
+        default : float
+            O valor considerado para as posições do retângulo que estiverem fora da matriz de dados, assim como em
+              'ConvolutionKernel.apply'.
+
+        Retorno
+        -------
+        np.ndarray
+            As somas de cada posição, com o mesmo formato da matriz de dados, no tipo da tabela ('np.int64' ou
+              'np.float64').
+
+        Erros
+        -----
+        ValueError
+        [1] Caso a largura ou a altura do retângulo sejam menores que 1.
+        """
+        if width < 1 or height < 1:
+            raise ValueError("[1] O retângulo deve ter largura e altura de pelo menos 1.")
+        if anchor is None:
+            anchor = ((width - 1) // 2, (height - 1) // 2)
+
+        rows, columns = self._table.shape[0] - 1, self._table.shape[1] - 1
+
+        # Limites de cada retângulo, recortados para dentro da matriz de dados.
+        top = np.clip(np.arange(rows) - anchor[1], 0, rows)
+        bottom = np.clip(np.arange(rows) - anchor[1] + height, 0, rows)
+        left = np.clip(np.arange(columns) - anchor[0], 0, columns)
+        right = np.clip(np.arange(columns) - anchor[0] + width, 0, columns)
+
+        table = self._table
+        total = table[bottom[:, None], right[None, :]] - table[top[:, None], right[None, :]]
+        total -= table[bottom[:, None], left[None, :]]
+        total += table[top[:, None], left[None, :]]
+
+        # As posições do retângulo fora da matriz de dados contribuem com o valor padrão.
+        if default != 0:
+            inside = (bottom - top)[:, None] * (right - left)[None, :]
+            if total.ndim == 3:
+                inside = inside[:, :, None]
+            total = total + (width * height - inside) * default
+
+        return total
+
+    def valid_sum(self, width: int, height: int) -> np.ndarray:
+        """Calcula a soma dos valores de cada retângulo que cabe inteiramente dentro da matriz de dados.
+
+        Útil quando a matriz de dados já foi envolvida pelo valor padrão (e.g. em 'ConvolutionKernel.apply_array'),
+          caso em que nenhum recorte é necessário e as somas são obtidas apenas com fatias da tabela.
+
+        Parâmetros
+        ----------
+        width : int
+            A largura do retângulo. Deve estar entre 1 e a largura da matriz de dados [err #1].
+        height : int
+            A altura do retângulo. Deve estar entre 1 e a altura da matriz de dados [err #1].
+
+        Retorno
+        -------
+        np.ndarray
+            A soma de cada retângulo, indexada pela posição do seu canto superior esquerdo, com formato
+              (altura - height + 1, largura - width + 1) ou (altura - height + 1, largura - width + 1, canais).
+
+        Erros
+        -----
+        ValueError
+        [1] Caso o retângulo não caiba dentro da matriz de dados.
+        """
+        if not 1 <= width < self._table.shape[1] or not 1 <= height < self._table.shape[0]:
+            raise ValueError("[1] O retângulo deve caber dentro da matriz de dados.")
+
+        table = self._table
+        total = table[height:, width:] - table[:-height, width:]
+        total -= table[height:, :-width]
+        total += table[:-height, :-width]
+
+        return total
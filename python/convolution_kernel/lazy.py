@@ -0,0 +1,478 @@
+"""Define a classe 'LazyImage'."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Módulos
+import uuid
+from typing import Any, Callable, Iterator, Optional, Sequence, Tuple, Union
+# Bibliotecas
+import numpy as np
+from PIL import Image
+# Locais
+from .cache import ResultCache
+from .convolution_kernel import ConvolutionKernel
+from .image import edge_detection, box_blur, gaussian_blur, sharpen, embossing, _reach
+from .pipeline import Pipeline
+from .profiling import clock, record
+
+
+# Constantes # ------------------------------------------------------------------------------------------------------- #
+# As funções de filtro que podem ser registradas em uma 'LazyImage', pelo nome.
+_FUNCTIONS = {"edge_detection": edge_detection, "box_blur": box_blur, "gaussian_blur": gaussian_blur,
+              "sharpen": sharpen, "embossing": embossing}
+
+
+# Classes # ---------------------------------------------------------------------------------------------------------- #
+class LazyImage:
+    """Representa uma imagem filtrada de forma adiada: os filtros são apenas registrados, formando um grafo, e os
+      pixels são calculados por tiles, apenas quando são pedidos (ver 'crop', 'tiles' e 'thumbnail').
+
+    Cada operação registrada ('filter' ou 'apply') retorna uma nova 'LazyImage', derivada da anterior, e várias imagens
+      podem ser derivadas da mesma, e.g. para exibir versões com filtros diferentes. Para calcular um tile, apenas a
+      região correspondente da imagem anterior, expandida pelo alcance do filtro, é calculada, e assim sucessivamente
+      até a imagem original, da qual só o recorte necessário é lido. Os tiles calculados são memorizados em um cache de
+      resultados compartilhado por todo o grafo, de forma que percorrer uma imagem enorme (e.g. em um visualizador)
+      custa apenas o que é exibido, e voltar a uma região já exibida não custa nada.
+
+    Os pixels resultantes são idênticos aos da aplicação sucessiva das funções de filtro (ou do 'Pipeline') à imagem
+      inteira, incluindo o tratamento das bordas da imagem, exceto pela borragem gaussiana com desvio padrão, calculada
+      em ponto flutuante pela imagem integral de cada recorte, que pode diferir por arredondamentos de 1 nível.
+
+    Atributos
+    ---------
+    _source : Union[Image.Image, np.ndarray]
+        A imagem original do grafo.
+    _parent : Optional[LazyImage]
+        A imagem da qual esta imagem é derivada, ou 'None' caso esta seja a imagem original.
+    _operation : Optional[Callable[[np.ndarray, Tuple[slice, slice]], np.ndarray]]
+        A operação registrada, que recebe os pixels de um recorte da imagem anterior e as fatias de linhas e de colunas
+          da região calculada dentro do recorte, e retorna os pixels RGBA da região. É 'None' na imagem original.
+    _margin : int
+        O alcance da operação, i.e. o número de pixels vizinhos da imagem anterior lidos em cada direção.
+    _size : Tuple[int, int]
+        O tamanho da imagem, (largura, altura).
+    _tile_size : int
+        O lado dos tiles em que a imagem é calculada e memorizada.
+    _cache : ResultCache
+        O cache onde os tiles calculados são memorizados, compartilhado por todo o grafo.
+    _workers : int
+        O número de threads que aplicarão os kernels de convolução em paralelo.
+    _token : str
+        O identificador único da imagem, que compõe as chaves dos seus tiles no cache.
+    """
+    # Atributos # ---------------------------------------------------------------------------------------------------- #
+    __slots__ = ["_source", "_parent", "_operation", "_margin", "_size", "_tile_size", "_cache", "_workers", "_token"]
+    _source: Union[Image.Image, np.ndarray]
+    _parent: Optional["LazyImage"]
+    _operation: Optional[Callable[[np.ndarray, Tuple[slice, slice]], np.ndarray]]
+    _margin: int
+    _size: Tuple[int, int]
+    _tile_size: int
+    _cache: ResultCache
+    _workers: int
+    _token: str
+
+    # Construtores # ------------------------------------------------------------------------------------------------- #
+    def __init__(self, source: Union[Image.Image, np.ndarray, str], tile_size: int = 256,
+                 cache: Optional[ResultCache] = None, workers: int = 1) -> None:
+        """
+        Parâmetros
+        ----------
+        source : Union[Image.Image, np.ndarray, str]
+            A imagem original. Pode ser uma imagem da biblioteca PIL (ou Pillow), em formato RGB ou RGBA, um array com
+              formato (altura, largura, 3) ou (altura, largura, 4), com valores no intervalo 0 a 255 [err #1], ou o
+              caminho de um arquivo '.npy' com um array nesse formato, que é mapeado em memória (ver também
+              'open_raw'). Note que imagens PIL de formatos comprimidos são decodificadas inteiras pela biblioteca ao
+              serem acessadas pela primeira vez, enquanto arrays mapeados em memória são lidos apenas nos recortes
+              necessários.
+        tile_size : int = 256
+            O lado dos tiles em que a imagem e as imagens derivadas são calculadas e memorizadas. Deve ser pelo menos 1
+              [err #2].
+        cache : Optional[ResultCache] = None
+            O cache onde os tiles calculados são memorizados, que limita a memória ocupada por eles. Caso seja 'None',
+              é criado um cache em memória com o limite padrão. Caso o cache grave os resultados em um diretório, os
+              tiles só são reaproveitados pelo mesmo grafo, e não entre processos.
+        workers : int = 1
+            O número de threads que aplicarão os kernels de convolução em paralelo. Ver
+              'ConvolutionKernel.apply_array'.
+
+        Erros
+        -----
+        ValueError
+        [1] Caso a imagem passada esteja em um formato que não seja RGB ou RGBA.
+        [2] Caso o parâmetro 'tile_size' seja menor que 1.
+        """
+        if isinstance(source, str):
+            source = np.load(source, mmap_mode="r")
+        if isinstance(source, Image.Image):
+            if source.mode != "RGB" and source.mode != "RGBA":
+                raise ValueError("[1] O formato da imagem deve ser RGB ou RGBA.")
+            size = source.size
+        else:
+            if source.ndim != 3 or source.shape[2] not in (3, 4):
+                raise ValueError("[1] O formato da imagem deve ser RGB ou RGBA.")
+            size = (source.shape[1], source.shape[0])
+        if tile_size < 1:
+            raise ValueError("[2] Parâmetro 'tile_size' deve ser pelo menos 1.")
+
+        self._source = source
+        self._parent = None
+        self._operation = None
+        self._margin = 0
+        self._size = size
+        self._tile_size = tile_size
+        self._cache = cache if cache is not None else ResultCache()
+        self._workers = workers
+        self._token = uuid.uuid4().hex
+
+    # Propriedades # ------------------------------------------------------------------------------------------------- #
+    @property
+    def size(self) -> Tuple[int, int]:
+        """O tamanho da imagem, igual ao da imagem original.
+
+        Retorno
+        -------
+        Tuple[int, int]
+            A largura e a altura da imagem, em pixels.
+        """
+        return self._size
+
+    @property
+    def tile_size(self) -> int:
+        """O lado dos tiles em que a imagem é calculada e memorizada.
+
+        Retorno
+        -------
+        int
+            O lado dos tiles, em pixels. Os tiles da última linha e da última coluna podem ser menores.
+        """
+        return self._tile_size
+
+    @property
+    def cache(self) -> ResultCache:
+        """O cache onde os tiles calculados são memorizados, compartilhado por todo o grafo.
+
+        Retorno
+        -------
+        ResultCache
+            O cache de tiles, e.g. para consultar seus contadores de utilização.
+        """
+        return self._cache
+
+    # Métodos # ------------------------------------------------------------------------------------------------------ #
+    def filter(self, filter_name: str, **parameters: Any) -> "LazyImage":
+        """Registra a aplicação de um dos filtros do módulo 'image' a esta imagem, sem calculá-la.
+
+        Parâmetros
+        ----------
+        filter_name : str
+            O nome do filtro, que deve ser o nome de uma das funções de filtro (e.g. "sharpen") [err #1].
+        **parameters : Any
+            Os parâmetros adicionais do filtro (e.g. sigma=5 para "gaussian_blur", ou operator="sobel" para
+              "edge_detection"). Parâmetros inválidos só são detectados quando os pixels são calculados.
+
+        Retorno
+        -------
+        LazyImage
+            A imagem resultante do filtro, com a transparência conservada desta imagem.
+
+        Erros
+        -----
+        ValueError
+        [1] Caso o nome do filtro não corresponda a nenhuma função de filtro.
+        """
+        if filter_name not in _FUNCTIONS:
+            raise ValueError(f"[1] Filtro '{filter_name}' desconhecido, os filtros válidos são {tuple(_FUNCTIONS)}.")
+
+        function = _FUNCTIONS[filter_name]
+        workers = self._workers
+
+        def operation(pixels: np.ndarray, inner: Tuple[slice, slice]) -> np.ndarray:
+            rows, columns = inner
+            region = (columns.start, rows.start, columns.stop - columns.start, rows.stop - rows.start)
+
+            return np.asarray(function(Image.fromarray(pixels), workers=workers, region=region, **parameters))
+
+        return self._derive(operation, _reach(filter_name, parameters))
+
+    def apply(self, pipeline: Union[Pipeline, Sequence[Union[str, Tuple[ConvolutionKernel, float]]]]) -> "LazyImage":
+        """Registra a aplicação de um pipeline (ou de kernels de convolução avulsos) a esta imagem, sem calculá-la.
+
+        Parâmetros
+        ----------
+        pipeline : Union[Pipeline, Sequence[Union[str, Tuple[ConvolutionKernel, float]]]]
+            O pipeline aplicado, ou os seus estágios, com os quais é criado um 'Pipeline' com os parâmetros padrão
+              (e.g. [(kernel, 9)] para um kernel avulso com peso 9).
+
+        Retorno
+        -------
+        LazyImage
+            A imagem resultante do pipeline, com a transparência conservada desta imagem.
+        """
+        if not isinstance(pipeline, Pipeline):
+            pipeline = Pipeline(pipeline)
+
+        # O alcance de cada passada é o maior deslocamento entre a âncora e as bordas do seu kernel.
+        margin = sum(max(run.kernel.anchor[0], run.kernel.width - 1 - run.kernel.anchor[0],
+                         run.kernel.anchor[1], run.kernel.height - 1 - run.kernel.anchor[1])
+                     for run in pipeline._runs)
+        workers = self._workers
+
+        def operation(pixels: np.ndarray, inner: Tuple[slice, slice]) -> np.ndarray:
+            return pipeline.apply_pixels(pixels, workers=workers)[inner]
+
+        return self._derive(operation, margin)
+
+    def crop(self, box: Optional[Tuple[int, int, int, int]] = None) -> Image.Image:
+        """Calcula uma região da imagem, como 'Image.crop', utilizando os tiles já memorizados e memorizando os
+          calculados.
+
+        Parâmetros
+        ----------
+        box : Optional[Tuple[int, int, int, int]] = None
+            O retângulo (esquerda, topo, direita, base) da região, que deve estar dentro da imagem e não ser vazio
+              [err #1]. Caso seja 'None', a imagem inteira é calculada.
+
+        Retorno
+        -------
+        Image.Image
+            A região da imagem, em formato RGBA.
+
+        Erros
+        -----
+        ValueError
+        [1] Caso o retângulo não esteja dentro da imagem ou seja vazio.
+        """
+        box = self._check(box)
+
+        return Image.fromarray(_rgba(self._render(box, memoize=True)))
+
+    def tiles(self, box: Optional[Tuple[int, int, int, int]] = None) -> Iterator[Tuple[Tuple[int, int, int, int],
+                                                                                       np.ndarray]]:
+        """Calcula os tiles de uma região da imagem, um de cada vez, na ordem das linhas, memorizando-os.
+
+        Apenas um tile é calculado a cada iteração, logo a iteração pode ser interrompida (e.g. quando o visualizador
+          muda de região) sem calcular os tiles restantes.
+
+        Parâmetros
+        ----------
+        box : Optional[Tuple[int, int, int, int]] = None
+            O retângulo (esquerda, topo, direita, base) da região, que deve estar dentro da imagem e não ser vazio
+              [err #1]. Caso seja 'None', todos os tiles da imagem são calculados.
+
+        Retorno
+        -------
+        Iterator[Tuple[Tuple[int, int, int, int], np.ndarray]]
+            O retângulo (esquerda, topo, direita, base) de cada tile, recortado para a região, e os seus pixels RGBA,
+              'np.uint8' com formato (altura, largura, 4).
+
+        Erros
+        -----
+        ValueError
+        [1] Caso o retângulo não esteja dentro da imagem ou seja vazio.
+        """
+        box = self._check(box)
+        left, top, right, bottom = box
+        size = self._tile_size
+
+        for tile_top in range(top - top % size, bottom, size):
+            for tile_left in range(left - left % size, right, size):
+                tile = (max(tile_left, left), max(tile_top, top),
+                        min(tile_left + size, right), min(tile_top + size, bottom))
+                yield tile, _rgba(self._render(tile, memoize=True))
+
+    def thumbnail(self, size: Tuple[int, int], resample: Image.Resampling = Image.Resampling.BICUBIC) -> Image.Image:
+        """Calcula uma miniatura da imagem, com a proporção conservada e cabendo no tamanho passado, como
+          'Image.thumbnail'.
+
+        A imagem é calculada em faixas horizontais de tiles, e cada faixa é reduzida por um fator inteiro (ver
+          'Image.reduce') assim que é calculada, de forma que a imagem inteira nunca é mantida em memória. O resultado
+          reduzido, com pelo menos o dobro do tamanho da miniatura, é então redimensionado para o tamanho final. Note
+          que, ao contrário de 'crop', todos os pixels da imagem são calculados, e a memorização dos tiles é limitada
+          pelo cache.
+
+        Parâmetros
+        ----------
+        size : Tuple[int, int]
+            A largura e a altura máximas da miniatura, que devem ser pelo menos 1 [err #1].
+        resample : Image.Resampling = Image.Resampling.BICUBIC
+            O filtro utilizado no redimensionamento final.
+
+        Retorno
+        -------
+        Image.Image
+            A miniatura, em formato RGBA.
+
+        Erros
+        -----
+        ValueError
+        [1] Caso a largura ou a altura máximas sejam menores que 1.
+        """
+        if size[0] < 1 or size[1] < 1:
+            raise ValueError("[1] O tamanho da miniatura deve ser pelo menos 1x1.")
+
+        width, height = self._size
+        factor = max(int(max(width / size[0], height / size[1]) / 2), 1)
+        # As faixas têm um número de linhas múltiplo do fator, para que a redução de cada faixa coincida com a redução
+        #   da imagem inteira.
+        band = factor * max(self._tile_size // factor, 1)
+
+        start = clock()
+        bands = []
+        for top in range(0, height, band):
+            pixels = _rgba(self._render((0, top, width, min(top + band, height)), memoize=True))
+            bands.append(np.asarray(Image.fromarray(pixels).reduce(factor)))
+        result = Image.fromarray(np.concatenate(bands))
+        result.thumbnail(size, resample=resample)
+        record("lazy.thumbnail", start, width * height)
+
+        return result
+
+    # Métodos Auxiliares # ------------------------------------------------------------------------------------------- #
+    def _derive(self, operation: Callable[[np.ndarray, Tuple[slice, slice]], np.ndarray],
+                margin: int) -> "LazyImage":
+        """Cria uma imagem derivada desta imagem por uma operação, compartilhando o cache e os parâmetros do grafo.
+
+        Parâmetros
+        ----------
+        operation : Callable[[np.ndarray, Tuple[slice, slice]], np.ndarray]
+            A operação registrada. Ver o atributo '_operation'.
+        margin : int
+            O alcance da operação.
+
+        Retorno
+        -------
+        LazyImage
+            A imagem derivada.
+        """
+        derived = LazyImage.__new__(LazyImage)
+        derived._source = self._source
+        derived._parent = self
+        derived._operation = operation
+        derived._margin = margin
+        derived._size = self._size
+        derived._tile_size = self._tile_size
+        derived._cache = self._cache
+        derived._workers = self._workers
+        derived._token = uuid.uuid4().hex
+
+        return derived
+
+    def _check(self, box: Optional[Tuple[int, int, int, int]]) -> Tuple[int, int, int, int]:
+        """Verifica se um retângulo está dentro da imagem e não é vazio.
+
+        Parâmetros
+        ----------
+        box : Optional[Tuple[int, int, int, int]]
+            O retângulo (esquerda, topo, direita, base), ou 'None' para a imagem inteira.
+
+        Retorno
+        -------
+        Tuple[int, int, int, int]
+            O retângulo verificado.
+
+        Erros
+        -----
+        ValueError
+        [1] Caso o retângulo não esteja dentro da imagem ou seja vazio.
+        """
+        if box is None:
+            return 0, 0, self._size[0], self._size[1]
+
+        left, top, right, bottom = box
+        if not (0 <= left < right <= self._size[0] and 0 <= top < bottom <= self._size[1]):
+            raise ValueError("[1] O retângulo deve estar dentro da imagem e não ser vazio.")
+
+        return left, top, right, bottom
+
+    def _render(self, box: Tuple[int, int, int, int], memoize: bool) -> np.ndarray:
+        """Obtém os pixels de uma região da imagem, a partir dos tiles memorizados ou calculando-os.
+
+        Parâmetros
+        ----------
+        box : Tuple[int, int, int, int]
+            O retângulo (esquerda, topo, direita, base) da região, dentro da imagem.
+        memoize : bool
+            Se os tiles que ainda não foram calculados devem ser calculados inteiros e memorizados, como nas regiões
+              pedidas pelo usuário. Caso contrário, e.g. nas regiões lidas pelas imagens derivadas, os tiles
+              memorizados só são utilizados caso cubram a região inteira, e senão apenas a região é calculada, sem ser
+              memorizada, para que o custo não se espalhe pelos tiles vizinhos em cada nível do grafo.
+
+        Retorno
+        -------
+        np.ndarray
+            Os pixels da região, 'np.uint8' com formato (altura, largura, 3) ou (altura, largura, 4). São 4 layers,
+              exceto na imagem original RGB.
+        """
+        left, top, right, bottom = box
+        if self._parent is None:
+            if isinstance(self._source, Image.Image):
+                return np.asarray(self._source.crop(box))
+            return np.asarray(self._source[top:bottom, left:right]).astype(np.uint8, copy=False)
+
+        size = self._tile_size
+        pixels = np.empty((bottom - top, right - left, 4), dtype=np.uint8)
+        for tile_top in range(top - top % size, bottom, size):
+            for tile_left in range(left - left % size, right, size):
+                key = ResultCache.key("lazy", self._token, tile_left, tile_top)
+                tile = self._cache.get(key)
+                if tile is None:
+                    if not memoize:
+                        return self._compute(box)
+                    tile = self._compute((tile_left, tile_top, min(tile_left + size, self._size[0]),
+                                          min(tile_top + size, self._size[1])))
+                    self._cache.put(key, tile)
+
+                # Copiar a interseção do tile com a região.
+                rows = slice(max(tile_top, top), min(tile_top + size, bottom))
+                columns = slice(max(tile_left, left), min(tile_left + size, right))
+                pixels[rows.start - top:rows.stop - top, columns.start - left:columns.stop - left] = \
+                    tile[rows.start - tile_top:rows.stop - tile_top, columns.start - tile_left:columns.stop - tile_left]
+
+        return pixels
+
+    def _compute(self, box: Tuple[int, int, int, int]) -> np.ndarray:
+        """Calcula uma região da imagem aplicando a operação registrada ao recorte correspondente da imagem anterior.
+
+        O recorte é a região expandida pelo alcance da operação e limitada à imagem, de forma que as bordas do recorte
+          que coincidem com as bordas da imagem continuam sendo tratadas como tal (ver 'image._crop').
+
+        Parâmetros
+        ----------
+        box : Tuple[int, int, int, int]
+            O retângulo (esquerda, topo, direita, base) da região, dentro da imagem.
+
+        Retorno
+        -------
+        np.ndarray
+            Os pixels RGBA da região, 'np.uint8' com formato (altura, largura, 4).
+        """
+        start = clock()
+        left, top, right, bottom = box
+        margin = self._margin
+        outer = (max(left - margin, 0), max(top - margin, 0),
+                 min(right + margin, self._size[0]), min(bottom + margin, self._size[1]))
+        inner = (slice(top - outer[1], bottom - outer[1]), slice(left - outer[0], right - outer[0]))
+
+        pixels = self._operation(np.ascontiguousarray(self._parent._render(outer, memoize=False)), inner)
+        record("lazy.tile", start, (right - left) * (bottom - top), pixels.nbytes)
+
+        return pixels
+
+
+# Funções Auxiliares # ----------------------------------------------------------------------------------------------- #
+def _rgba(pixels: np.ndarray) -> np.ndarray:
+    """Completa os pixels de uma imagem RGB com a transparência opaca.
+
+    Parâmetros
+    ----------
+    pixels : np.ndarray
+        Os pixels, 'np.uint8' com formato (altura, largura, 3) ou (altura, largura, 4).
+
+    Retorno
+    -------
+    np.ndarray
+        Os pixels em formato RGBA, que são os próprios pixels passados caso já tenham 4 layers.
+    """
+    if pixels.shape[2] == 4:
+        return pixels
+
+    return np.concatenate([pixels, np.full(pixels.shape[:2] + (1,), 255, dtype=np.uint8)], axis=2)
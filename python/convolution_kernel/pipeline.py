@@ -0,0 +1,419 @@
+"""Define a classe 'Pipeline'."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Módulos
+from typing import List, NamedTuple, Optional, Sequence, Tuple, Union
+# Bibliotecas
+import numpy as np
+from PIL import Image
+# Locais
+from .cache import ResultCache
+from .convolution_kernel import ConvolutionKernel
+from .image import _FILTERS, _Filter, _apply_filter, _cached, _decode, _pack
+from .profiling import clock
+
+
+# Constantes # ------------------------------------------------------------------------------------------------------- #
+# Formato (altura, largura) da imagem considerado na estimativa do custo das passadas, que decide a combinação dos
+#   estágios. Afeta apenas o custo da FFT, que varia pouco com o formato da imagem.
+COST_SHAPE = (1024, 1024)
+
+
+# Classes # ---------------------------------------------------------------------------------------------------------- #
+class _Run(NamedTuple):
+    """Descreve uma passada de um 'Pipeline', resultante de um único estágio ou da combinação de estágios lineares
+      consecutivos.
+
+    Atributos
+    ---------
+    kernel : ConvolutionKernel
+        O kernel de convolução da passada, combinado a partir dos kernels dos estágios (ver
+          'ConvolutionKernel.compose').
+    weight : float
+        O peso pelo qual a soma ponderada de cada pixel é dividida, igual ao produto dos pesos dos estágios.
+    spec : Optional[_Filter]
+        O filtro do estágio, caso a passada corresponda a um único filtro deste módulo, que é então aplicado
+          exatamente como pela função do filtro, ou 'None' caso contrário.
+    parts : Tuple[_Run, ...] = ()
+        As passadas dos estágios combinados, na ordem em que são aplicados, que são aplicadas uma após a outra nas
+          bordas da imagem, ou uma tupla vazia caso a passada corresponda a um único estágio.
+    """
+    kernel: ConvolutionKernel
+    weight: float
+    spec: Optional[_Filter]
+    parts: Tuple["_Run", ...] = ()
+
+
+class Pipeline:
+    """Representa uma sequência de filtros aplicados a uma imagem, um após o outro.
+
+    Cada passada percorre a imagem uma vez. Entre as passadas, os pixels são truncados e saturados no intervalo 0 a 255,
+      como na aplicação sucessiva dos filtros, e mantidos em um único array, sem montar imagens intermediárias; a
+      imagem resultante é montada apenas ao final.
+
+    Estágios lineares consecutivos são combinados em uma única passada, com um único kernel de convolução pré-calculado
+      (ver 'ConvolutionKernel.compose'), sempre que o custo estimado do kernel combinado, com o método que será
+      utilizado para aplicá-lo (ver 'ConvolutionKernel.apply_integer' e 'ConvolutionKernel.apply_array'), é menor do
+      que a soma dos custos das passadas que ele substitui. Por padrão, apenas estágios que nunca saem do intervalo 0 a
+      255 são combinados, i.e. kernels sem valores negativos cuja soma é igual ao peso (e.g. "box_blur" e
+      "gaussian_blur"): a saturação intermediária nunca acontece neles, e o resultado difere da aplicação sucessiva
+      apenas por não truncar os valores intermediários, i.e. em até 1 nível por estágio combinado. Nas bordas da
+      imagem, onde cada estágio lê o valor padrão ao invés do resultado do estágio anterior, os estágios combinados
+      são aplicados um após o outro, com o mesmo resultado da aplicação sucessiva. Por exemplo, dois estágios
+      "gaussian_blur" formam um kernel gaussiano 5x5 separável, aplicado em duas passadas unidimensionais de 5
+      posições ao invés de duas passadas de 9 posições: medido em uma imagem 2000x2000, o pipeline combinado leva
+      0,17 s, contra 0,29 s sem a combinação.
+
+    Com 'clamp=False', estágios lineares que podem sair do intervalo (e.g. "sharpen" e kernels avulsos com valores
+      negativos) também são combinados, sem a saturação intermediária. Filtros com parametrização (e.g. "embossing")
+      e em escala de cinza ("edge_detection") nunca são combinados.
+
+    Atributos
+    ---------
+    _stages : Tuple[Union[str, Tuple[ConvolutionKernel, float]], ...]
+        Os estágios do pipeline, na ordem em que são aplicados.
+    _clamp : bool
+        Se apenas os estágios que nunca saem do intervalo 0 a 255 são combinados.
+    _runs : List[_Run]
+        As passadas resultantes da combinação dos estágios.
+    """
+    # Atributos # ---------------------------------------------------------------------------------------------------- #
+    __slots__ = ["_stages", "_clamp", "_runs"]
+    _stages: Tuple[Union[str, Tuple[ConvolutionKernel, float]], ...]
+    _clamp: bool
+    _runs: List[_Run]
+
+    # Construtores # ------------------------------------------------------------------------------------------------- #
+    def __init__(self, stages: Sequence[Union[str, Tuple[ConvolutionKernel, float]]], clamp: bool = True) -> None:
+        """
+        Parâmetros
+        ----------
+        stages : Sequence[Union[str, Tuple[ConvolutionKernel, float]]]
+            Os estágios do pipeline, na ordem em que são aplicados. Cada estágio é o nome de um dos filtros deste módulo
+              (e.g. "sharpen") [err #1], ou um par (kernel, peso) com um kernel de convolução aplicado a cada layer
+              RGB, com a soma ponderada dividida pelo peso, que não pode ser 0 [err #2].
+        clamp : bool = True
+            Se apenas os estágios que nunca saem do intervalo 0 a 255 são combinados, de forma que a saturação
+              intermediária é a mesma da aplicação sucessiva dos filtros. Caso seja 'False', os demais estágios
+              lineares também podem ser combinados, sem a saturação intermediária.
+
+        Erros
+        -----
+        ValueError
+        [1] Caso um estágio seja o nome de um filtro que não existe.
+        [2] Caso um estágio seja um kernel de convolução com peso 0.
+        """
+        runs = []
+        for stage in stages:
+            if isinstance(stage, str):
+                if stage not in _FILTERS:
+                    raise ValueError(f"[1] O filtro '{stage}' não existe.")
+                spec = _FILTERS[stage]
+                kernel = ConvolutionKernel(spec.matrix, anchor=(1, 1))
+                run = _Run(kernel, spec.weight, spec)
+            else:
+                kernel, weight = stage
+                if weight == 0:
+                    raise ValueError("[2] O peso de um kernel de convolução não pode ser 0.")
+                run = _Run(kernel, weight, None)
+
+            if runs and _linear(runs[-1]) and _linear(run) and (not clamp or _bounded(runs[-1]) and _bounded(run)):
+                previous = runs[-1]
+                combined = _Run(previous.kernel.compose(run.kernel), previous.weight * run.weight, None,
+                                (previous.parts or (previous,)) + (run.parts or (run,)))
+                if _cost(combined) < _cost(previous) + _cost(run):
+                    runs.pop()
+                    run = combined
+            runs.append(run)
+
+        self._stages = tuple(stages)
+        self._clamp = clamp
+        self._runs = runs
+
+    # Propriedades # ------------------------------------------------------------------------------------------------- #
+    @property
+    def stages(self) -> Tuple[Union[str, Tuple[ConvolutionKernel, float]], ...]:
+        """Os estágios do pipeline, na ordem em que são aplicados.
+
+        Retorno
+        -------
+        Tuple[Union[str, Tuple[ConvolutionKernel, float]], ...]
+            Os nomes dos filtros e os pares (kernel, peso) passados na criação do pipeline.
+        """
+        return self._stages
+
+    @property
+    def passes(self) -> int:
+        """O número de passadas pela imagem na aplicação do pipeline, após a combinação dos estágios.
+
+        Retorno
+        -------
+        int
+            O número de passadas, entre 0 e o número de estágios.
+        """
+        return len(self._runs)
+
+    # Operadores # --------------------------------------------------------------------------------------------------- #
+    def __call__(self, image: Image.Image, workers: int = 1, cache: Optional[ResultCache] = None) -> Image.Image:
+        """Aplica o pipeline a uma imagem.
+
+        Parâmetros
+        ----------
+        image : Image.Image
+            A imagem processada, que deve ser uma imagem da biblioteca PIL (ou Pillow) em formato RGB ou RGBA [err #1].
+        workers : int
+            O número de threads que aplicarão os kernels de convolução em paralelo. Ver
+              'ConvolutionKernel.apply_array'.
+        cache : Optional[ResultCache] = None
+            Um cache de resultados, consultado antes da aplicação do pipeline e atualizado depois dela, com chave
+              calculada a partir das passadas e dos pixels da imagem. Caso seja 'None', o pipeline é sempre aplicado.
+
+        Retorno
+        -------
+        Image.Image
+            A imagem resultante, em formato RGBA, com a transparência conservada da imagem original.
+
+        Erros
+        -----
+        ValueError
+        [1] Caso a imagem passada esteja em um formato que não seja RGB ou RGBA.
+        """
+        if image.mode != "RGB" and image.mode != "RGBA":
+            raise ValueError("[1] O formato da imagem deve ser RGB ou RGBA.")
+
+        start = clock()
+        pixels = _decode(image)
+        signature = [_signature(run) for run in self._runs]
+
+        return _cached("pipeline", start, cache, ("pipeline", signature, pixels),
+                       lambda: self.apply_pixels(pixels, workers=workers))
+
+    # Métodos # ------------------------------------------------------------------------------------------------------ #
+    def apply_pixels(self, pixels: np.ndarray, workers: int = 1, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Aplica o pipeline aos pixels de uma imagem, sem decodificá-la nem montá-la.
+
+        Todas as passadas escrevem no mesmo array de saída, do qual a passada seguinte lê os layers RGB. As bordas
+          das passadas combinadas são calculadas antes, a partir dos layers que elas sobrescrevem.
+
+        Parâmetros
+        ----------
+        pixels : np.ndarray
+            Os pixels da imagem, 'np.uint8' com formato (altura, largura, 3) ou (altura, largura, 4).
+        workers : int
+            O número de threads que aplicarão os kernels de convolução em paralelo.
+        out : Optional[np.ndarray] = None
+            O array 'np.uint8', com formato (altura, largura, 4), onde os pixels resultantes serão escritos. Pode ser o
+              próprio array 'pixels', caso ele tenha 4 layers. Caso seja 'None', um novo array é criado.
+
+        Retorno
+        -------
+        np.ndarray
+            Os pixels resultantes, em formato RGBA, com a transparência conservada dos pixels originais.
+        """
+        alpha = pixels[..., 3].copy() if pixels.shape[2] == 4 else np.full(pixels.shape[:2], 255, dtype=np.uint8)
+        if out is None:
+            out = np.empty(pixels.shape[:2] + (4,), dtype=np.uint8)
+
+        values = pixels[..., :3]
+        for run in self._runs:
+            borders = [(inner, _apply_parts(run.parts, values[outer], alpha[outer], workers))
+                       for outer, inner in _borders(run, values.shape)]
+            _pack(_apply_run(run, values, workers), alpha, out=out)
+            for (rows, columns), border in borders:
+                out[rows, columns, :3] = border[rows, columns]
+            values = out[..., :3]
+
+        if not self._runs:
+            _pack([values[..., layer] for layer in range(3)], alpha, out=out)
+
+        return out
+
+
+# Funções # ---------------------------------------------------------------------------------------------------------- #
+def _linear(run: _Run) -> bool:
+    """Verifica se uma passada é apenas a soma ponderada dos layers dividida pelo peso, sem parametrização, e pode ser
+      combinada com outras passadas lineares em um único kernel de convolução.
+
+    Parâmetros
+    ----------
+    run : _Run
+        A passada verificada.
+
+    Retorno
+    -------
+    bool
+        'True' caso a passada seja um kernel de convolução avulso, ou um filtro aplicado a cada layer RGB cuja
+          parametrização é a identidade.
+    """
+    return run.spec is None or (not run.spec.grayscale and run.spec.affine == (1, 0))
+
+
+def _bounded(run: _Run) -> bool:
+    """Verifica se uma passada linear nunca sai do intervalo 0 a 255, e pode ser combinada com outras sem mudar a
+      saturação.
+
+    Parâmetros
+    ----------
+    run : _Run
+        A passada verificada.
+
+    Retorno
+    -------
+    bool
+        'True' caso o kernel da passada tenha apenas valores não-negativos cuja soma é igual ao peso, i.e. seja uma
+          média ponderada dos pixels.
+    """
+    kernel = run.kernel
+    return (all(kernel[x, y] >= 0 for x in range(kernel.width) for y in range(kernel.height))
+            and kernel.sum == run.weight)
+
+
+def _cost(run: _Run) -> float:
+    """Estima o custo de uma passada, com o método de menor custo entre os que serão considerados na sua aplicação.
+
+    Parâmetros
+    ----------
+    run : _Run
+        A passada avaliada.
+
+    Retorno
+    -------
+    float
+        O custo estimado, em somas de fatias deslocadas por pixel (ver 'ConvolutionKernel.apply_array'), para uma
+          imagem com o formato 'COST_SHAPE'. Kernels de inteiros consideram apenas os métodos com aritmética inteira.
+    """
+    return min(run.kernel._costs(COST_SHAPE, integer=_integer(run)).values())
+
+
+def _apply_run(run: _Run, values: np.ndarray, workers: int) -> List[np.ndarray]:
+    """Aplica uma passada de um 'Pipeline' aos layers RGB de uma imagem.
+
+    Parâmetros
+    ----------
+    run : _Run
+        A passada aplicada.
+    values : np.ndarray
+        Os layers RGB, 'np.uint8' com formato (altura, largura, 3).
+    workers : int
+        O número de threads que aplicarão o kernel de convolução em paralelo.
+
+    Retorno
+    -------
+    List[np.ndarray]
+        Os valores calculados para os layers vermelho, verde e azul, prontos para '_pack'.
+    """
+    if run.spec is not None:
+        return _apply_filter(run.spec, values, workers=workers)[0]
+
+    if _integer(run):
+        # As somas ponderadas de kernels inteiros são exatas com aritmética inteira, e a divisão é truncada como em
+        #   '_pack'.
+        result = run.kernel.apply_integer(values, weight=int(run.weight), default=0, saturate=False, workers=workers)
+    else:
+        result = run.kernel.apply_array(values, weight=run.weight, default=0, workers=workers)
+
+    return [result[..., layer] for layer in range(3)]
+
+
+def _integer(run: _Run) -> bool:
+    """Verifica se uma passada pode ser aplicada com aritmética inteira.
+
+    Parâmetros
+    ----------
+    run : _Run
+        A passada verificada.
+
+    Retorno
+    -------
+    bool
+        'True' caso o peso e todos os valores do kernel da passada sejam inteiros.
+    """
+    kernel = run.kernel
+    return (float(run.weight).is_integer()
+            and all(float(kernel[x, y]).is_integer() for x in range(kernel.width) for y in range(kernel.height)))
+
+
+def _borders(run: _Run, shape: Tuple[int, ...]) -> List[Tuple[Tuple[slice, slice], Tuple[slice, slice]]]:
+    """Calcula as faixas nas bordas da imagem onde uma passada combinada difere da aplicação sucessiva dos seus
+      estágios, i.e. onde algum estágio lê o valor padrão ao invés do resultado do estágio anterior.
+
+    Cada faixa tem a largura do alcance do kernel combinado, i.e. o maior deslocamento entre a âncora e as bordas do
+      kernel, e é calculada a partir de uma faixa com o dobro da largura: os pixels lidos além dela estão sempre a
+      mais de um alcance da faixa calculada.
+
+    Parâmetros
+    ----------
+    run : _Run
+        A passada cujas bordas são calculadas.
+    shape : Tuple[int, ...]
+        O formato (altura, largura, ...) dos layers da imagem.
+
+    Retorno
+    -------
+    List[Tuple[Tuple[slice, slice], Tuple[slice, slice]]]
+        As fatias de linhas e de colunas de cada faixa lida, e as fatias da faixa calculada, válidas tanto na imagem
+          quanto na faixa lida. A lista é vazia caso a passada corresponda a um único estágio.
+    """
+    if not run.parts:
+        return []
+
+    kernel = run.kernel
+    columns = max(kernel.anchor[0], kernel.width - 1 - kernel.anchor[0])
+    rows = max(kernel.anchor[1], kernel.height - 1 - kernel.anchor[1])
+    everything = slice(None)
+    borders = []
+    if rows:
+        borders += [
+            ((slice(0, 2 * rows), everything), (slice(0, rows), everything)),
+            ((slice(max(shape[0] - 2 * rows, 0), None), everything), (slice(-rows, None), everything)),
+        ]
+    if columns:
+        borders += [
+            ((everything, slice(0, 2 * columns)), (everything, slice(0, columns))),
+            ((everything, slice(max(shape[1] - 2 * columns, 0), None)), (everything, slice(-columns, None))),
+        ]
+
+    return borders
+
+
+def _apply_parts(parts: Sequence[_Run], values: np.ndarray, alpha: np.ndarray, workers: int) -> np.ndarray:
+    """Aplica as passadas de estágios combinados uma após a outra, truncando e saturando os pixels entre elas.
+
+    Parâmetros
+    ----------
+    parts : Sequence[_Run]
+        As passadas aplicadas, na ordem de aplicação.
+    values : np.ndarray
+        Os layers RGB, 'np.uint8' com formato (altura, largura, 3).
+    alpha : np.ndarray
+        O plano de transparência, com formato (altura, largura).
+    workers : int
+        O número de threads que aplicarão os kernels de convolução em paralelo.
+
+    Retorno
+    -------
+    np.ndarray
+        Os layers RGB resultantes, 'np.uint8' com formato (altura, largura, 3).
+    """
+    for part in parts:
+        values = _pack(_apply_run(part, values, workers), alpha)[..., :3]
+
+    return values
+
+
+def _signature(run: _Run) -> Tuple[object, ...]:
+    """Descreve uma passada para o cálculo da chave de cache de um pipeline.
+
+    Parâmetros
+    ----------
+    run : _Run
+        A passada descrita.
+
+    Retorno
+    -------
+    Tuple[object, ...]
+        A âncora e a matriz do kernel, o peso, se a passada é um filtro deste módulo e as descrições das passadas
+          combinadas.
+    """
+    kernel = run.kernel
+    return (kernel.anchor, [[kernel[x, y] for y in range(kernel.height)] for x in range(kernel.width)], run.weight,
+            run.spec is not None, tuple(_signature(part) for part in run.parts))
@@ -0,0 +1,100 @@
+"""Define a medição do tempo de cada etapa da aplicação dos kernels de convolução e dos filtros."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Módulos
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, NamedTuple, Optional
+
+
+# Classes # ---------------------------------------------------------------------------------------------------------- #
+class StageRecord(NamedTuple):
+    """A medição de uma etapa da aplicação de um kernel de convolução ou de um filtro.
+
+    Atributos
+    ---------
+    stage : str
+        O nome da etapa, e.g. "decode", "kernel.fft" ou "filter.sharpen". As etapas dos filtros são "decode"
+          (leitura dos pixels da imagem), "luminance" (cálculo do brilho, para filtros em escala de cinza) ou "prepare",
+          "apply" (aplicação do kernel, que inclui as etapas "kernel.*"), "finish" (parametrização do resultado), "pack"
+          (conversão para pixels RGBA) e "encode" (montagem da imagem), além de "filter.<nome>" com o total do filtro
+          e "refilter.<nome>" com o total da atualização incremental de um resultado. As imagens adiadas ('LazyImage')
+          medem ainda "lazy.tile" (cálculo de um tile ou de uma região) e "lazy.thumbnail" (cálculo de uma miniatura).
+    seconds : float
+        A duração da etapa, em segundos.
+    pixels : int
+        O número de pixels (ou posições da matriz de dados) processados pela etapa.
+    nbytes : int
+        O número de bytes dos arrays alocados pela etapa para o seu resultado.
+    """
+    stage: str
+    seconds: float
+    pixels: int
+    nbytes: int
+
+
+# Variáveis # -------------------------------------------------------------------------------------------------------- #
+# A função que recebe as medições no contexto atual, ou 'None' caso a medição esteja desativada. É uma variável de
+#   contexto para que medições em threads ou tarefas diferentes não se misturem.
+_HOOK: ContextVar[Optional[Callable[[StageRecord], None]]] = ContextVar("convolution_kernel_profile", default=None)
+
+
+# Funções # ---------------------------------------------------------------------------------------------------------- #
+@contextmanager
+def profile(callback: Optional[Callable[[StageRecord], None]] = None) -> Iterator[List[StageRecord]]:
+    """Ativa a medição das etapas dos kernels de convolução e dos filtros aplicados dentro do bloco 'with'.
+
+    Fora de um bloco 'profile', a medição custa apenas a consulta de uma variável de contexto por etapa.
+
+    As etapas executadas em threads auxiliares (e.g. com 'workers' maior que 1) não são medidas individualmente, mas
+      fazem parte das etapas que as aguardam.
+
+    Parâmetros
+    ----------
+    callback : Optional[Callable[[StageRecord], None]] = None
+        A função chamada com a medição de cada etapa, assim que ela termina, e.g. para exportá-la para um sistema de
+          métricas. Caso seja 'None', as medições são acumuladas na lista retornada.
+
+    Retorno
+    -------
+    Iterator[List[StageRecord]]
+        A lista de medições, preenchida durante o bloco caso 'callback' seja 'None', e vazia caso contrário.
+    """
+    records: List[StageRecord] = []
+    token = _HOOK.set(callback if callback is not None else records.append)
+    try:
+        yield records
+    finally:
+        _HOOK.reset(token)
+
+
+def clock() -> float:
+    """Marca o início de uma etapa.
+
+    Retorno
+    -------
+    float
+        O instante atual, em segundos, caso a medição esteja ativa, ou 0 caso contrário. As etapas iniciadas com 0 não
+          são medidas por 'record', mesmo que um 'profile' seja ativado antes do seu fim.
+    """
+    return time.perf_counter() if _HOOK.get() is not None else 0.0
+
+
+def record(stage: str, start: float, pixels: int = 0, nbytes: int = 0) -> None:
+    """Envia a medição de uma etapa para a função do 'profile' ativo, caso exista.
+
+    Parâmetros
+    ----------
+    stage : str
+        O nome da etapa.
+    start : float
+        O instante de início da etapa, retornado por 'clock'. Caso seja 0 (a etapa começou com a medição desativada),
+          a etapa é ignorada.
+    pixels : int
+        O número de pixels processados pela etapa.
+    nbytes : int
+        O número de bytes alocados pela etapa para o seu resultado.
+    """
+    hook = _HOOK.get()
+    if hook is not None and start != 0.0:
+        hook(StageRecord(stage, time.perf_counter() - start, pixels, nbytes))
@@ -0,0 +1,504 @@
+"""Define a aplicação dos filtros a sequências de quadros, como GIFs e PNGs animados ou diretórios de quadros."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Módulos
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Iterator, List, NamedTuple, Optional, Tuple, Union
+# Bibliotecas
+import numpy as np
+from PIL import GifImagePlugin, Image, ImageSequence
+# Locais
+from .pipeline import Pipeline
+from .profiling import clock, record
+
+
+# Constantes # ------------------------------------------------------------------------------------------------------- #
+# Descartes de quadro, na convenção do formato APNG: o que é feito com a área do quadro antes do próximo ser desenhado.
+DISPOSE_NONE = 0
+DISPOSE_BACKGROUND = 1
+DISPOSE_PREVIOUS = 2
+
+# Extensões de arquivo gravadas como PNG animado, e as extensões de arquivo lidas como quadros de um diretório.
+APNG_EXTENSIONS = (".png", ".apng")
+FRAME_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".ppm", ".tif", ".tiff", ".webp")
+
+# Nível de compressão 'zlib' dos quadros do PNG animado.
+APNG_COMPRESSION = 6
+
+# Método de redução de cores dos quadros de GIFs. O método "fast octree" é cerca de 50 vezes mais rápido que o
+#   "median cut" padrão da biblioteca PIL em quadros de 320x240, com erro médio por canal de 5, ao invés de 4.
+GIF_QUANTIZE = Image.Quantize.FASTOCTREE
+
+# Valor de transparência abaixo do qual um pixel é gravado como transparente em um GIF, que só tem transparência total.
+GIF_ALPHA_THRESHOLD = 128
+
+
+# Classes # ---------------------------------------------------------------------------------------------------------- #
+class Frame(NamedTuple):
+    """Um quadro filtrado de uma sequência.
+
+    Atributos
+    ---------
+    pixels : np.ndarray
+        Os pixels do quadro, 'np.uint8' com formato (altura, largura, 4), em formato RGBA. O array é reutilizado por
+          todos os quadros da sequência, e só é válido até o próximo quadro ser pedido; deve ser copiado para ser
+          mantido.
+    duration : float
+        O tempo de exibição do quadro, em milissegundos, ou 0 caso a origem não o defina.
+    disposal : int
+        O descarte do quadro na origem, um dos valores 'DISPOSE_*'. Descartes de GIFs são convertidos para essa
+          convenção. É apenas informativo: os pixels já são o quadro completo, composto sobre os anteriores.
+    """
+    pixels: np.ndarray
+    duration: float
+    disposal: int
+
+
+class _ApngWriter:
+    """Grava um PNG animado quadro a quadro, sem manter os quadros anteriores em memória.
+
+    O número de quadros só é conhecido ao final, e é corrigido no cabeçalho da animação ao fechar o arquivo. Cada
+      linha é gravada com o filtro PNG "Up" (diferença para a linha anterior), calculado com o NumPy.
+
+    Atributos
+    ---------
+    _file : BinaryIO
+        O arquivo gravado.
+    _loop : Optional[int]
+        O número de repetições da animação (0 para infinitas), ou 'None' para exibi-la uma única vez.
+    _frames : int
+        O número de quadros gravados.
+    _sequence : int
+        O número de sequência do próximo bloco de animação.
+    _position : int
+        A posição, no arquivo, do bloco de controle da animação, corrigido ao final.
+    _scanlines : Optional[np.ndarray]
+        O array, reutilizado entre os quadros, com as linhas filtradas precedidas do tipo de filtro.
+    """
+    # Atributos # ---------------------------------------------------------------------------------------------------- #
+    __slots__ = ["_file", "_loop", "_frames", "_sequence", "_position", "_scanlines"]
+    _file: BinaryIO
+    _loop: Optional[int]
+    _frames: int
+    _sequence: int
+    _position: int
+    _scanlines: Optional[np.ndarray]
+
+    # Construtores # ------------------------------------------------------------------------------------------------- #
+    def __init__(self, path: str, loop: Optional[int]) -> None:
+        """
+        Parâmetros
+        ----------
+        path : str
+            O caminho do arquivo gravado.
+        loop : Optional[int]
+            O número de repetições da animação (0 para infinitas), ou 'None' para exibi-la uma única vez.
+        """
+        self._file = open(path, "wb")
+        self._loop = loop
+        self._frames = 0
+        self._sequence = 0
+        self._position = 0
+        self._scanlines = None
+
+    # Métodos # ------------------------------------------------------------------------------------------------------ #
+    def write(self, frame: Frame) -> None:
+        """Grava um quadro.
+
+        Parâmetros
+        ----------
+        frame : Frame
+            O quadro gravado, com o mesmo tamanho de todos os quadros da animação.
+        """
+        height, width = frame.pixels.shape[:2]
+        if self._scanlines is None:
+            self._file.write(b"\x89PNG\r\n\x1a\n")
+            self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+            self._position = self._file.tell()
+            self._chunk(b"acTL", struct.pack(">II", 0, 1 if self._loop is None else self._loop))
+            self._scanlines = np.empty((height, 1 + 4 * width), dtype=np.uint8)
+
+        # Filtro "Up" em todas as linhas: cada byte é a diferença, módulo 256, para o byte da linha anterior.
+        rows = frame.pixels.reshape(height, 4 * width)
+        self._scanlines[:, 0] = 2
+        self._scanlines[0, 1:] = rows[0]
+        np.subtract(rows[1:], rows[:-1], out=self._scanlines[1:, 1:])
+        data = zlib.compress(memoryview(self._scanlines).cast("B"), APNG_COMPRESSION)
+
+        # Os quadros são imagens completas, logo substituem a área inteira ao invés de serem combinados com ela, e a
+        #   área é restaurada para o fundo transparente depois de exibida.
+        delay = int(round(frame.duration))
+        self._chunk(b"fcTL", struct.pack(">IIIIIHHBB", self._next(), width, height, 0, 0, delay, 1000,
+                                         DISPOSE_BACKGROUND, 0))
+        if self._frames == 0:
+            self._chunk(b"IDAT", data)
+        else:
+            self._chunk(b"fdAT", struct.pack(">I", self._next()) + data)
+        self._frames += 1
+
+    def close(self) -> None:
+        """Finaliza o arquivo, corrigindo o número de quadros no cabeçalho da animação, e o fecha. Caso nenhum quadro
+          tenha sido gravado, o arquivo, que não seria um PNG válido, é removido."""
+        try:
+            if self._frames:
+                self._chunk(b"IEND", b"")
+                self._file.seek(self._position)
+                self._chunk(b"acTL", struct.pack(">II", self._frames, 1 if self._loop is None else self._loop))
+        finally:
+            self._file.close()
+            if not self._frames:
+                os.remove(self._file.name)
+
+    # Métodos Auxiliares # ------------------------------------------------------------------------------------------- #
+    def _chunk(self, kind: bytes, data: bytes) -> None:
+        """Grava um bloco PNG, com tamanho e CRC.
+
+        Parâmetros
+        ----------
+        kind : bytes
+            O tipo do bloco, com 4 letras.
+        data : bytes
+            O conteúdo do bloco.
+        """
+        self._file.write(struct.pack(">I", len(data)) + kind + data)
+        self._file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(kind))))
+
+    def _next(self) -> int:
+        """Retorna o próximo número de sequência dos blocos de animação.
+
+        Retorno
+        -------
+        int
+            O número de sequência, que começa em 0 e cresce por 1 a cada bloco "fcTL" ou "fdAT".
+        """
+        self._sequence += 1
+        return self._sequence - 1
+
+
+class _GifWriter:
+    """Grava um GIF animado quadro a quadro, sem manter os quadros anteriores em memória.
+
+    Cada quadro é reduzido para uma paleta própria de 255 cores (ver 'GIF_QUANTIZE'), gravada como paleta local, e os
+      pixels com transparência abaixo de 'GIF_ALPHA_THRESHOLD' utilizam a cor restante, transparente.
+
+    Atributos
+    ---------
+    _file : BinaryIO
+        O arquivo gravado.
+    _loop : Optional[int]
+        O número de repetições da animação (0 para infinitas), ou 'None' para exibi-la uma única vez.
+    _frames : int
+        O número de quadros gravados.
+    """
+    # Atributos # ---------------------------------------------------------------------------------------------------- #
+    __slots__ = ["_file", "_loop", "_frames"]
+    _file: BinaryIO
+    _loop: Optional[int]
+    _frames: int
+
+    # Construtores # ------------------------------------------------------------------------------------------------- #
+    def __init__(self, path: str, loop: Optional[int]) -> None:
+        """
+        Parâmetros
+        ----------
+        path : str
+            O caminho do arquivo gravado.
+        loop : Optional[int]
+            O número de repetições da animação (0 para infinitas), ou 'None' para exibi-la uma única vez.
+        """
+        self._file = open(path, "wb")
+        self._loop = loop
+        self._frames = 0
+
+    # Métodos # ------------------------------------------------------------------------------------------------------ #
+    def write(self, frame: Frame) -> None:
+        """Grava um quadro.
+
+        Parâmetros
+        ----------
+        frame : Frame
+            O quadro gravado, com o mesmo tamanho de todos os quadros da animação.
+        """
+        paletted = Image.fromarray(frame.pixels[..., :3]).quantize(colors=255, method=GIF_QUANTIZE)
+        transparent = frame.pixels[..., 3] < GIF_ALPHA_THRESHOLD
+        if transparent.any():
+            indices = np.array(paletted)
+            indices[transparent] = 255
+            palette = paletted.getpalette()
+            paletted = Image.fromarray(indices, mode="P")
+            paletted.putpalette(palette)
+
+        if self._frames == 0:
+            paletted.info["version"] = b"89a"
+            header = GifImagePlugin.getheader(paletted.copy(), info={"loop": self._loop})[0]
+            self._file.write(b"".join(header))
+
+        # Os quadros são imagens completas, já compostas sobre os anteriores, logo cada quadro é descartado para o fundo
+        #   (descarte 2 do GIF) antes do próximo. Mantê-lo faria os pixels transparentes do próximo quadro exibirem o
+        #   quadro anterior. O índice transparente é declarado em todos os quadros, pois alguns leitores (e.g. a
+        #   biblioteca PIL) restauram o fundo com o índice transparente do quadro descartado.
+        parameters = {"duration": frame.duration, "disposal": 2, "include_color_table": True, "transparency": 255}
+        # A lista retornada é um atributo de uma classe criada a cada chamada, que só é liberada pelo coletor de
+        #   ciclos; esvaziá-la libera os dados do quadro imediatamente.
+        chunks = GifImagePlugin.getdata(paletted, (0, 0), **parameters)
+        self._file.write(b"".join(chunks))
+        chunks.clear()
+        self._frames += 1
+
+    def close(self) -> None:
+        """Finaliza o arquivo e o fecha. Caso nenhum quadro tenha sido gravado, o arquivo, que não seria um GIF válido,
+          é removido."""
+        try:
+            if self._frames:
+                self._file.write(b";")
+        finally:
+            self._file.close()
+            if not self._frames:
+                os.remove(self._file.name)
+
+
+class _DirectoryWriter:
+    """Grava cada quadro como um arquivo PNG numerado em um diretório. A duração e o descarte não são gravados.
+
+    Atributos
+    ---------
+    _directory : str
+        O diretório onde os quadros são gravados.
+    _frames : int
+        O número de quadros gravados.
+    """
+    # Atributos # ---------------------------------------------------------------------------------------------------- #
+    __slots__ = ["_directory", "_frames"]
+    _directory: str
+    _frames: int
+
+    # Construtores # ------------------------------------------------------------------------------------------------- #
+    def __init__(self, directory: str) -> None:
+        """
+        Parâmetros
+        ----------
+        directory : str
+            O diretório onde os quadros são gravados, criado caso não exista.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._frames = 0
+
+    # Métodos # ------------------------------------------------------------------------------------------------------ #
+    def write(self, frame: Frame) -> None:
+        """Grava um quadro, como "frame_<número>.png".
+
+        Parâmetros
+        ----------
+        frame : Frame
+            O quadro gravado.
+        """
+        Image.fromarray(frame.pixels).save(os.path.join(self._directory, f"frame_{self._frames:06d}.png"))
+        self._frames += 1
+
+    def close(self) -> None:
+        """Não faz nada, pois cada quadro já é gravado em um arquivo completo."""
+
+
+# Funções # ---------------------------------------------------------------------------------------------------------- #
+def iter_frames(source: Union[str, Image.Image], filter_stages: Union[str, Pipeline],
+                workers: int = 1) -> Iterator[Frame]:
+    """Aplica um filtro a cada quadro de uma sequência, lendo os quadros um a um.
+
+    Enquanto um quadro é filtrado, o próximo é decodificado por uma thread auxiliar, em um segundo array de entrada.
+      Os dois arrays de entrada e o array de saída são alocados no primeiro quadro e reutilizados pelos demais, de
+      forma que a memória utilizada não depende do número de quadros.
+
+    Parâmetros
+    ----------
+    source : Union[str, Image.Image]
+        A sequência de quadros. Pode ser uma imagem da biblioteca PIL (ou Pillow) com vários quadros (e.g. um GIF ou
+          PNG animado, percorrido com 'ImageSequence'), o caminho de um arquivo com vários quadros, ou o caminho de um
+          diretório com um arquivo por quadro, percorridos em ordem alfabética. Os quadros de GIFs e PNGs animados são
+          lidos já compostos sobre os anteriores, como seriam exibidos.
+
+        Todos os quadros devem ter o mesmo tamanho [err #2].
+    filter_stages : Union[str, Pipeline]
+        O nome de um dos filtros deste módulo (e.g. "sharpen") [err #1], ou um 'Pipeline' aplicado a cada quadro.
+    workers : int
+        O número de threads que aplicarão o kernel de convolução em paralelo. Ver 'ConvolutionKernel.apply_array'.
+
+    Retorno
+    -------
+    Iterator[Frame]
+        Os quadros filtrados, em formato RGBA, com a duração e o descarte dos quadros originais. O array de pixels é
+          o mesmo para todos os quadros (ver 'Frame').
+
+    Erros
+    -----
+    ValueError
+    [1] Caso o nome do filtro não corresponda a nenhum filtro deste módulo.
+
+    [2] Caso um quadro tenha um tamanho diferente do primeiro.
+    """
+    pipeline = filter_stages if isinstance(filter_stages, Pipeline) else Pipeline([filter_stages])
+    frames = _iter_source(source)
+    buffers: List[np.ndarray] = []
+
+    def decode(index: int) -> Optional[Tuple[np.ndarray, float, int]]:
+        item = next(frames, None)
+        if item is None:
+            return None
+
+        start = clock()
+        frame, duration, disposal = item
+        pixels = np.asarray(frame if frame.mode == "RGBA" else frame.convert("RGBA"))
+        if not buffers:
+            buffers.extend(np.empty_like(pixels) for _ in range(2))
+        elif pixels.shape != buffers[0].shape:
+            raise ValueError("[2] Todos os quadros devem ter o mesmo tamanho.")
+        buffer = buffers[index % 2]
+        np.copyto(buffer, pixels)
+        record("decode", start, pixels.shape[0] * pixels.shape[1], 0)
+
+        return buffer, duration, disposal
+
+    output = None
+    try:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            pending = executor.submit(decode, 0)
+            index = 0
+            while True:
+                item = pending.result()
+                if item is None:
+                    break
+
+                # Decodificar o próximo quadro no outro array de entrada, enquanto este é filtrado.
+                index += 1
+                pending = executor.submit(decode, index)
+                pixels, duration, disposal = item
+                if output is None:
+                    output = np.empty(pixels.shape, dtype=np.uint8)
+                yield Frame(pipeline.apply_pixels(pixels, workers=workers, out=output), duration, disposal)
+    finally:
+        frames.close()
+
+
+def filter_sequence(source: Union[str, Image.Image], destination: str, filter_stages: Union[str, Pipeline],
+                    workers: int = 1, loop: Optional[int] = None) -> int:
+    """Aplica um filtro a cada quadro de uma sequência e grava o resultado, quadro a quadro.
+
+    Os quadros são lidos, filtrados e gravados um de cada vez (ver 'iter_frames'), e nenhum quadro anterior é mantido
+      em memória, nem pelo gravador, logo a memória utilizada não depende do número de quadros.
+
+    Parâmetros
+    ----------
+    source : Union[str, Image.Image]
+        A sequência de quadros. Ver 'iter_frames'.
+    destination : str
+        O destino do resultado: um arquivo '.gif', gravado como GIF animado, um arquivo '.png' ou '.apng', gravado
+          como PNG animado, ou um diretório, onde cada quadro é gravado como um arquivo PNG numerado. Os GIFs e PNGs
+          animados mantêm a duração de cada quadro, e cada quadro completo é descartado para o fundo antes do
+          próximo. Em GIFs, cada quadro é reduzido a 255 cores.
+    filter_stages : Union[str, Pipeline]
+        O nome de um dos filtros deste módulo, ou um 'Pipeline'. Ver 'iter_frames'.
+    workers : int
+        O número de threads que aplicarão o kernel de convolução em paralelo.
+    loop : Optional[int] = None
+        O número de repetições da animação gravada, 0 para infinitas. Caso seja 'None', é utilizado o número de
+          repetições da origem, caso ela o defina, e a animação é exibida uma única vez caso contrário.
+
+    Retorno
+    -------
+    int
+        O número de quadros gravados.
+
+    Erros
+    -----
+    ValueError
+    [1] Caso o nome do filtro não corresponda a nenhum filtro deste módulo. Ver 'iter_frames'.
+
+    [2] Caso um quadro tenha um tamanho diferente do primeiro. Ver 'iter_frames'.
+
+    [3] Caso a sequência não tenha nenhum quadro (e.g. um diretório sem imagens). Nenhum arquivo é gravado.
+    """
+    if loop is None:
+        loop = _source_loop(source)
+
+    extension = os.path.splitext(destination)[1].lower()
+    if extension == ".gif":
+        writer: Union[_GifWriter, _ApngWriter, _DirectoryWriter] = _GifWriter(destination, loop)
+    elif extension in APNG_EXTENSIONS:
+        writer = _ApngWriter(destination, loop)
+    else:
+        writer = _DirectoryWriter(destination)
+
+    start = clock()
+    count = 0
+    try:
+        for frame in iter_frames(source, filter_stages, workers=workers):
+            encode_start = clock()
+            writer.write(frame)
+            record("encode", encode_start, frame.pixels.shape[0] * frame.pixels.shape[1])
+            count += 1
+    finally:
+        writer.close()
+    if count == 0:
+        raise ValueError("[3] A sequência não tem nenhum quadro.")
+    record("sequence", start, count)
+
+    return count
+
+
+# Funções Auxiliares # ----------------------------------------------------------------------------------------------- #
+def _iter_source(source: Union[str, Image.Image]) -> Iterator[Tuple[Image.Image, float, int]]:
+    """Percorre os quadros de uma sequência, sem decodificar os seguintes, com a duração e o descarte de cada um.
+
+    Parâmetros
+    ----------
+    source : Union[str, Image.Image]
+        A sequência de quadros. Ver 'iter_frames'.
+
+    Retorno
+    -------
+    Iterator[Tuple[Image.Image, float, int]]
+        Tuplas (quadro, duração, descarte), com o descarte convertido para a convenção de 'DISPOSE_*'. Cada quadro só
+          é válido até o próximo ser pedido.
+    """
+    if isinstance(source, str) and os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if os.path.splitext(name)[1].lower() in FRAME_EXTENSIONS:
+                with Image.open(os.path.join(source, name)) as frame:
+                    yield frame, float(frame.info.get("duration", 0)), DISPOSE_NONE
+        return
+
+    image = Image.open(source) if isinstance(source, str) else source
+    try:
+        for frame in ImageSequence.Iterator(image):
+            if image.format == "GIF":
+                # Descartes do GIF: 0 e 1 mantêm o quadro, 2 restaura o fundo e 3 restaura o quadro anterior.
+                disposal = max(getattr(image, "disposal_method", 0) - 1, DISPOSE_NONE)
+            else:
+                disposal = int(frame.info.get("disposal", DISPOSE_NONE))
+            yield frame, float(frame.info.get("duration", 0)), disposal
+    finally:
+        if isinstance(source, str):
+            image.close()
+
+
+def _source_loop(source: Union[str, Image.Image]) -> Optional[int]:
+    """Lê o número de repetições de uma animação.
+
+    Parâmetros
+    ----------
+    source : Union[str, Image.Image]
+        A sequência de quadros. Ver 'iter_frames'.
+
+    Retorno
+    -------
+    Optional[int]
+        O número de repetições (0 para infinitas), ou 'None' caso a origem não o defina ou seja um diretório.
+    """
+    if isinstance(source, Image.Image):
+        return source.info.get("loop")
+    if os.path.isdir(source):
+        return None
+    with Image.open(source) as image:
+        return image.info.get("loop")
@@ -0,0 +1,713 @@
+"""Expõe os filtros de processamento de imagem por HTTP, com um servidor assíncrono.
+
+Uso: python -m convolution_kernel.server [--host 127.0.0.1] [--port 8080] [--workers N] [--queue 64]
+     python -m convolution_kernel.server --load 200 [--concurrency 16] [--size 256] [--filter sharpen]
+
+Cada filtro é acessado com 'POST /<filtro>', com os bytes da imagem (em qualquer formato lido pela biblioteca PIL) no
+  corpo da requisição, e retorna a imagem filtrada em PNG, ou em WebP com '?format=webp'. Os parâmetros adicionais dos
+  filtros são passados na query (e.g. 'POST /gaussian_blur?sigma=5'). 'GET /stats' retorna as estatísticas do
+  servidor em JSON, incluindo as latências p50 e p99.
+
+A segunda forma inicia o servidor no próprio processo, envia requisições concorrentes com imagens sintéticas através
+  de um cliente mínimo, e imprime as latências observadas pelo cliente e as estatísticas do servidor.
+"""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Módulos
+import argparse
+import asyncio
+import io
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+# Bibliotecas
+import numpy as np
+from PIL import Image
+# Locais
+from .convolution_kernel import ConvolutionKernel
+from .image import (_FILTERS, _finish, _pack, _prepare, box_blur, edge_detection, embossing, gaussian_blur,
+                    sharpen)
+
+
+# Constantes # ------------------------------------------------------------------------------------------------------- #
+# Funções de filtro expostas pelo servidor, e os parâmetros adicionais aceitos por cada uma, com seus tipos.
+FILTERS = {
+    "edge_detection": (edge_detection, {"operator": str}),
+    "box_blur": (box_blur, {"radius": int}),
+    "gaussian_blur": (gaussian_blur, {"sigma": float}),
+    "sharpen": (sharpen, {}),
+    "embossing": (embossing, {}),
+}
+
+# Formatos de saída aceitos no parâmetro 'format', e os tipos de conteúdo correspondentes.
+FORMATS = {"png": ("PNG", "image/png"), "webp": ("WEBP", "image/webp")}
+
+# Tamanho máximo do corpo de uma requisição, em bytes.
+MAX_BODY = 64 * 1024 * 1024
+
+# Número máximo de pixels de um grupo de imagens aplicadas juntas (ver 'FilterServer'). Medido com imagens de 64x64 a
+#   256x256: grupos de até cerca de 64 mil pixels aplicam o kernel até 2 vezes mais rápido que imagens separadas, pois
+#   o custo fixo de cada chamada domina em imagens pequenas, enquanto grupos maiores saem do cache do processador e
+#   ficam mais lentos que imagens separadas. Imagens com mais da metade desse número de pixels não são agrupadas.
+BATCH_PIXELS = 65536
+
+# Número de requisições mais recentes consideradas no cálculo das latências.
+LATENCY_WINDOW = 10000
+
+# Mensagens das respostas HTTP utilizadas pelo servidor.
+_REASONS = {
+    200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+    500: "Internal Server Error", 503: "Service Unavailable",
+}
+
+
+# Classes # ---------------------------------------------------------------------------------------------------------- #
+class FilterServer:
+    """Representa um servidor HTTP assíncrono que aplica os filtros de processamento de imagem.
+
+    O laço de eventos apenas lê e escreve as requisições. A decodificação, a aplicação dos filtros e a codificação das
+      imagens são feitas por um grupo limitado de threads, e as operações do NumPy liberam o GIL durante os cálculos.
+
+    Requisições concorrentes para o mesmo filtro, sem parâmetros adicionais, e com imagens pequenas (ver
+      'BATCH_PIXELS') do mesmo tamanho e formato são agrupadas: a primeira delas aguarda até 'batch_window' segundos
+      por outras, e o kernel de convolução é então aplicado uma única vez a todas as imagens do grupo, empilhadas (ver
+      '_apply_batch'). O resultado de cada imagem é idêntico ao da função do filtro.
+
+    Quando o número de requisições em andamento (incluindo as que ainda estão enviando a imagem) atinge 'queue', as
+      novas requisições são recusadas imediatamente com o status 503, antes de o corpo ser lido, ao invés de aumentarem
+      a fila, a memória ocupada e a latência de todas as outras.
+
+    Atributos
+    ---------
+    _executor : ThreadPoolExecutor
+        O grupo de threads que processa as imagens.
+    _queue : int
+        O número máximo de requisições em andamento.
+    _batch_window : float
+        O tempo máximo, em segundos, que a primeira requisição de um grupo aguarda por outras.
+    _max_batch : int
+        O número máximo de imagens de um grupo.
+    _batches : Dict[Tuple[Any, ...], List[Tuple[np.ndarray, asyncio.Future]]]
+        Os grupos aguardando processamento, por filtro e formato das imagens.
+    _pending : int
+        O número de requisições em andamento.
+    _receiving : int
+        O número de conexões lendo o corpo de uma requisição, que ainda não estão em andamento.
+    _latencies : Deque[float]
+        As latências, em segundos, das requisições atendidas mais recentes.
+    _counters : Dict[str, int]
+        Os contadores de requisições atendidas ("requests"), recusadas ("rejected") e com erro ("errors"), e de grupos
+          processados ("batches") e imagens processadas em grupos ("batched").
+    """
+    # Atributos # ---------------------------------------------------------------------------------------------------- #
+    __slots__ = ["_executor", "_queue", "_batch_window", "_max_batch", "_batches", "_pending", "_receiving",
+                 "_latencies", "_counters"]
+    _executor: ThreadPoolExecutor
+    _queue: int
+    _batch_window: float
+    _max_batch: int
+    _batches: Dict[Tuple[Any, ...], List[Tuple[np.ndarray, asyncio.Future]]]
+    _pending: int
+    _receiving: int
+    _latencies: Deque[float]
+    _counters: Dict[str, int]
+
+    # Construtores # ------------------------------------------------------------------------------------------------- #
+    def __init__(self, workers: Optional[int] = None, queue: int = 64, batch_window: float = 0.005,
+                 max_batch: int = 8) -> None:
+        """
+        Parâmetros
+        ----------
+        workers : Optional[int] = None
+            O número de threads que processam as imagens. Caso seja 'None', é utilizado o número de processadores.
+        queue : int
+            O número máximo de requisições em andamento, a partir do qual as novas requisições são recusadas. Deve ser
+              pelo menos 1 [err #1].
+        batch_window : float
+            O tempo máximo, em segundos, que a primeira requisição de um grupo aguarda por outras. Caso seja 0, as
+              requisições só são agrupadas com as que chegarem na mesma iteração do laço de eventos.
+        max_batch : int
+            O número máximo de imagens de um grupo. Deve ser pelo menos 1 [err #1]. Caso seja 1, as requisições não
+              são agrupadas.
+
+        Erros
+        -----
+        ValueError
+        [1] Caso 'queue' ou 'max_batch' sejam menores que 1.
+        """
+        if queue < 1 or max_batch < 1:
+            raise ValueError("[1] Parâmetros 'queue' e 'max_batch' devem ser pelo menos 1.")
+
+        self._executor = ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        self._queue = queue
+        self._batch_window = batch_window
+        self._max_batch = max_batch
+        self._batches = {}
+        self._pending = 0
+        self._receiving = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._counters = {"requests": 0, "rejected": 0, "errors": 0, "batches": 0, "batched": 0}
+
+    # Propriedades # ------------------------------------------------------------------------------------------------- #
+    @property
+    def stats(self) -> Dict[str, float]:
+        """As estatísticas do servidor desde a sua criação.
+
+        Retorno
+        -------
+        Dict[str, float]
+            Os contadores de requisições atendidas ("requests"), recusadas ("rejected") e com erro ("errors"), de
+              grupos processados ("batches") e de imagens processadas em grupos ("batched"), o número de requisições
+              em andamento ("pending"), e as latências p50 e p99 das requisições atendidas mais recentes, em
+              milissegundos ("p50_ms" e "p99_ms"), que são 0 caso nenhuma requisição tenha sido atendida.
+        """
+        stats: Dict[str, float] = dict(self._counters, pending=self._pending)
+        latencies = np.array(self._latencies) * 1000 if self._latencies else np.zeros(1)
+        stats["p50_ms"], stats["p99_ms"] = (float(value) for value in np.percentile(latencies, [50, 99]))
+
+        return stats
+
+    # Métodos # ------------------------------------------------------------------------------------------------------ #
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.AbstractServer:
+        """Começa a aceitar conexões HTTP.
+
+        Parâmetros
+        ----------
+        host : str
+            O endereço em que o servidor aceita conexões.
+        port : int
+            A porta em que o servidor aceita conexões. Caso seja 0, uma porta livre é escolhida pelo sistema, e pode
+              ser consultada em 'server.sockets[0].getsockname()'.
+
+        Retorno
+        -------
+        asyncio.AbstractServer
+            O servidor do 'asyncio', que deve ser fechado com 'close' e 'wait_closed'.
+        """
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def filter(self, filter_name: str, body: bytes, parameters: Optional[Dict[str, Any]] = None,
+                     output_format: str = "png") -> bytes:
+        """Aplica um filtro a uma imagem codificada e retorna o resultado codificado, como em uma requisição HTTP.
+
+        Parâmetros
+        ----------
+        filter_name : str
+            O nome do filtro, que deve ser uma das chaves de 'FILTERS' [err #1].
+        body : bytes
+            Os bytes da imagem, em qualquer formato lido pela biblioteca PIL [err #2].
+        parameters : Optional[Dict[str, Any]] = None
+            Os parâmetros adicionais do filtro (e.g. {"sigma": 5} para "gaussian_blur") [err #2].
+        output_format : str
+            O formato da imagem retornada, que deve ser uma das chaves de 'FORMATS' [err #2].
+
+        Retorno
+        -------
+        bytes
+            Os bytes da imagem filtrada, no formato pedido.
+
+        Erros
+        -----
+        KeyError
+        [1] Caso o filtro não exista.
+
+        ValueError
+        [2] Caso a imagem não possa ser decodificada, ou os parâmetros ou o formato sejam inválidos.
+
+        OverflowError
+        [3] Caso o número de requisições em andamento tenha atingido o limite do servidor.
+        """
+        if filter_name not in FILTERS:
+            raise KeyError(f"[1] Filtro '{filter_name}' desconhecido, os filtros válidos são {tuple(FILTERS)}.")
+        if output_format not in FORMATS:
+            raise ValueError(f"[2] Formato '{output_format}' desconhecido, os formatos válidos são {tuple(FORMATS)}.")
+        if self._pending >= self._queue:
+            self._counters["rejected"] += 1
+            raise OverflowError("[3] O limite de requisições em andamento foi atingido.")
+
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        self._pending += 1
+        try:
+            pixels = await loop.run_in_executor(self._executor, _decode_bytes, body)
+            limit = min(self._max_batch, BATCH_PIXELS // (pixels.shape[0] * pixels.shape[1]))
+            if not parameters and limit > 1:
+                output = await self._submit((filter_name, pixels.shape), pixels, limit)
+            else:
+                output = await loop.run_in_executor(self._executor, _apply_single, filter_name, pixels,
+                                                    parameters or {})
+            result = await loop.run_in_executor(self._executor, _encode, output, FORMATS[output_format][0])
+        except Exception:
+            self._counters["errors"] += 1
+            raise
+        finally:
+            self._pending -= 1
+
+        self._latencies.append(time.perf_counter() - start)
+        self._counters["requests"] += 1
+
+        return result
+
+    def close(self) -> None:
+        """Encerra o grupo de threads, após o término das imagens em processamento."""
+        self._executor.shutdown(wait=True)
+
+    # Métodos Auxiliares # ------------------------------------------------------------------------------------------- #
+    async def _submit(self, key: Tuple[Any, ...], pixels: np.ndarray, limit: int) -> np.ndarray:
+        """Adiciona uma imagem ao grupo do seu filtro e formato, criando-o caso não exista, e aguarda o resultado.
+
+        Parâmetros
+        ----------
+        key : Tuple[Any, ...]
+            O nome do filtro e o formato do array de pixels, que identificam o grupo.
+        pixels : np.ndarray
+            Os pixels da imagem.
+        limit : int
+            O número de imagens a partir do qual o grupo é enviado para processamento sem aguardar mais.
+
+        Retorno
+        -------
+        np.ndarray
+            Os pixels resultantes, em formato RGBA.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = []
+            loop.call_later(self._batch_window, self._flush, key, batch)
+        batch.append((pixels, future))
+        if len(batch) >= limit:
+            self._flush(key, batch)
+
+        return await future
+
+    def _flush(self, key: Tuple[Any, ...], batch: List[Tuple[np.ndarray, asyncio.Future]]) -> None:
+        """Envia um grupo para processamento, caso ele ainda não tenha sido enviado.
+
+        Parâmetros
+        ----------
+        key : Tuple[Any, ...]
+            A chave do grupo em '_batches'.
+        batch : List[Tuple[np.ndarray, asyncio.Future]]
+            O grupo, com os pixels de cada imagem e o 'Future' que recebe o seu resultado.
+        """
+        if self._batches.get(key) is not batch:
+            return
+        del self._batches[key]
+
+        self._counters["batches"] += 1
+        self._counters["batched"] += len(batch)
+        loop = asyncio.get_running_loop()
+        task = loop.run_in_executor(self._executor, _apply_batch, key[0], [pixels for pixels, _ in batch])
+
+        def deliver(done: asyncio.Future) -> None:
+            error = done.exception()
+            for index, (_, future) in enumerate(batch):
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(done.result()[index])
+
+        task.add_done_callback(deliver)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Lê uma requisição HTTP de uma conexão, responde e fecha a conexão.
+
+        Parâmetros
+        ----------
+        reader : asyncio.StreamReader
+            A leitura da conexão.
+        writer : asyncio.StreamWriter
+            A escrita da conexão.
+        """
+        headers = {}
+        try:
+            try:
+                method, target, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                # O tamanho do corpo deve ser um inteiro não-negativo, sem os sinais e separadores aceitos por 'int'.
+                declared = headers.get("content-length", "0")
+                if not declared.isdigit():
+                    raise ValueError(f"Content-Length inválido: '{declared}'.")
+                length = int(declared)
+            except (ValueError, UnicodeDecodeError):
+                status, content_type, payload = 400, "text/plain", b"Requisicao HTTP invalida."
+            else:
+                if length > MAX_BODY:
+                    status, content_type, payload = 413, "text/plain", b"Imagem grande demais."
+                elif method == "POST" and self._pending + self._receiving >= self._queue:
+                    # Recusar antes de ler o corpo, para que a sobrecarga não acumule as imagens em memória.
+                    self._counters["rejected"] += 1
+                    status, content_type, payload = 503, "text/plain", b"O limite de requisicoes foi atingido."
+                else:
+                    self._receiving += 1
+                    try:
+                        body = await reader.readexactly(length)
+                    finally:
+                        self._receiving -= 1
+                    status, content_type, payload = await self._route(method, target, body)
+
+            writer.write(_response(status, content_type, payload))
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, target: str, body: bytes) -> Tuple[int, str, bytes]:
+        """Atende uma requisição HTTP já lida.
+
+        Parâmetros
+        ----------
+        method : str
+            O método HTTP da requisição.
+        target : str
+            O caminho da requisição, com a query.
+        body : bytes
+            O corpo da requisição.
+
+        Retorno
+        -------
+        Tuple[int, str, bytes]
+            O status, o tipo de conteúdo e o corpo da resposta.
+        """
+        url = urlsplit(target)
+        name = url.path.strip("/")
+
+        if name == "stats":
+            if method != "GET":
+                return 405, "text/plain", b"Utilize GET."
+            return 200, "application/json", json.dumps(self.stats).encode()
+        if name not in FILTERS:
+            return 404, "text/plain", f"Filtro '{name}' desconhecido.".encode()
+        if method != "POST":
+            return 405, "text/plain", b"Utilize POST."
+
+        query = dict(parse_qsl(url.query))
+        output_format = query.pop("format", "png")
+        accepted = FILTERS[name][1]
+        try:
+            parameters = {key: accepted[key](value) for key, value in query.items()}
+            payload = await self.filter(name, body, parameters, output_format)
+        except (KeyError, ValueError) as error:
+            return 400, "text/plain", str(error).encode()
+        except OverflowError as error:
+            return 503, "text/plain", str(error).encode()
+        except Exception as error:
+            return 500, "text/plain", str(error).encode()
+
+        return 200, FORMATS[output_format][1], payload
+
+
+# Funções # ---------------------------------------------------------------------------------------------------------- #
+async def post(host: str, port: int, path: str, body: bytes) -> Tuple[int, bytes]:
+    """Envia uma requisição POST a um servidor HTTP e aguarda a resposta. É um cliente mínimo, suficiente para testar o
+      servidor localmente, sem dependências.
+
+    Parâmetros
+    ----------
+    host : str
+        O endereço do servidor.
+    port : int
+        A porta do servidor.
+    path : str
+        O caminho da requisição, com a query (e.g. "/gaussian_blur?sigma=5").
+    body : bytes
+        O corpo da requisição.
+
+    Retorno
+    -------
+    Tuple[int, bytes]
+        O status e o corpo da resposta.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n"
+                     f"Connection: close\r\n\r\n".encode("latin-1") + body)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+
+    head, _, payload = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ", 2)[1]), payload
+
+
+async def run_load(server: FilterServer, filter_name: str, count: int, concurrency: int, size: int,
+                   path: str = "") -> Dict[str, float]:
+    """Inicia o servidor em uma porta livre e envia requisições concorrentes com imagens sintéticas.
+
+    Parâmetros
+    ----------
+    server : FilterServer
+        O servidor testado.
+    filter_name : str
+        O nome do filtro pedido.
+    count : int
+        O número total de requisições.
+    concurrency : int
+        O número máximo de requisições simultâneas.
+    size : int
+        O lado das imagens quadradas enviadas.
+    path : str
+        A query adicionada ao caminho da requisição (e.g. "?sigma=5").
+
+    Retorno
+    -------
+    Dict[str, float]
+        As estatísticas do servidor (ver 'FilterServer.stats'), mais as latências p50 e p99 observadas pelo cliente
+          ("client_p50_ms" e "client_p99_ms"), o número de respostas por status ("status_<n>") e a vazão, em
+          requisições por segundo ("requests_per_second").
+    """
+    listener = await server.start("127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+
+    rng = np.random.default_rng(0)
+    buffer = io.BytesIO()
+    Image.fromarray(rng.integers(0, 256, (size, size, 3), dtype=np.uint8)).save(buffer, format="PNG")
+    body = buffer.getvalue()
+
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    limit = asyncio.Semaphore(concurrency)
+
+    async def client() -> None:
+        async with limit:
+            start = time.perf_counter()
+            status, _ = await post("127.0.0.1", port, f"/{filter_name}{path}", body)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(client() for _ in range(count)))
+    finally:
+        listener.close()
+        await listener.wait_closed()
+    elapsed = time.perf_counter() - start
+
+    results = server.stats
+    results["client_p50_ms"], results["client_p99_ms"] = (
+        float(value) for value in np.percentile(np.array(latencies) * 1000, [50, 99])
+    )
+    results.update({f"status_{status}": number for status, number in sorted(statuses.items())})
+    results["requests_per_second"] = count / elapsed
+
+    return results
+
+
+def main(arguments: Optional[List[str]] = None) -> int:
+    """Executa o servidor até ser interrompido, ou o teste de carga local, e imprime as estatísticas.
+
+    Parâmetros
+    ----------
+    arguments : Optional[List[str]] = None
+        Os argumentos de linha de comando. Caso seja 'None', são utilizados os argumentos do processo.
+
+    Retorno
+    -------
+    int
+        O código de saída do processo: 0 caso o teste de carga não tenha respostas com erro, e 1 caso contrário.
+    """
+    parser = argparse.ArgumentParser(prog="python -m convolution_kernel.server", description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço em que o servidor aceita conexões.")
+    parser.add_argument("--port", type=int, default=8080, help="Porta em que o servidor aceita conexões.")
+    parser.add_argument("--workers", type=int, help="Número de threads que processam as imagens.")
+    parser.add_argument("--queue", type=int, default=64,
+                        help="Número máximo de requisições em andamento, a partir do qual as novas são recusadas.")
+    parser.add_argument("--batch-window", type=float, default=5,
+                        help="Tempo máximo, em milissegundos, de espera por requisições do mesmo grupo.")
+    parser.add_argument("--max-batch", type=int, default=8, help="Número máximo de imagens de um grupo.")
+    parser.add_argument("--load", type=int, help="Executar um teste de carga local com este número de requisições.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requisições simultâneas do teste de carga.")
+    parser.add_argument("--size", type=int, default=256, help="Lado das imagens do teste de carga.")
+    parser.add_argument("--filter", default="sharpen", choices=sorted(FILTERS), help="Filtro do teste de carga.")
+    options = parser.parse_args(arguments)
+
+    if options.queue < 1 or options.max_batch < 1:
+        parser.error("--queue e --max-batch devem ser pelo menos 1")
+    server = FilterServer(options.workers, options.queue, options.batch_window / 1000, options.max_batch)
+
+    try:
+        if options.load is not None:
+            results = asyncio.run(run_load(server, options.filter, options.load, options.concurrency, options.size))
+            for key, value in results.items():
+                print(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}")
+            return 1 if results["errors"] else 0
+
+        async def serve() -> None:
+            listener = await server.start(options.host, options.port)
+            print(f"Servidor em http://{options.host}:{listener.sockets[0].getsockname()[1]}/", flush=True)
+            async with listener:
+                await listener.serve_forever()
+
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            print(json.dumps(server.stats))
+    finally:
+        server.close()
+
+    return 0
+
+
+# Funções Auxiliares # ----------------------------------------------------------------------------------------------- #
+def _decode_bytes(body: bytes) -> np.ndarray:
+    """Decodifica os bytes de uma imagem em um array com seus pixels RGB ou RGBA.
+
+    Parâmetros
+    ----------
+    body : bytes
+        Os bytes da imagem, em qualquer formato lido pela biblioteca PIL.
+
+    Retorno
+    -------
+    np.ndarray
+        Os pixels da imagem, 'np.uint8' com formato (altura, largura, 3) ou (altura, largura, 4).
+
+    Erros
+    -----
+    ValueError
+    [1] Caso os bytes não sejam uma imagem válida, ou a imagem exceda o limite de pixels da biblioteca PIL
+          ('Image.MAX_IMAGE_PIXELS', que protege contra imagens que ocupam muito mais memória do que seus bytes).
+
+    [2] Caso a imagem não tenha nenhum pixel.
+    """
+    try:
+        with Image.open(io.BytesIO(body)) as image:
+            image.load()
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "transparency" in image.info or "A" in image.mode else "RGB")
+            pixels = np.asarray(image)
+    except (OSError, SyntaxError, Image.DecompressionBombError) as error:
+        raise ValueError(f"[1] Imagem inválida: {error}") from error
+    if pixels.size == 0:
+        raise ValueError("[2] A imagem deve ter pelo menos um pixel.")
+
+    return pixels
+
+
+def _apply_single(filter_name: str, pixels: np.ndarray, parameters: Dict[str, Any]) -> np.ndarray:
+    """Aplica um filtro a uma única imagem, através da função do filtro.
+
+    Parâmetros
+    ----------
+    filter_name : str
+        O nome do filtro, uma das chaves de 'FILTERS'.
+    pixels : np.ndarray
+        Os pixels da imagem.
+    parameters : Dict[str, Any]
+        Os parâmetros adicionais do filtro.
+
+    Retorno
+    -------
+    np.ndarray
+        Os pixels resultantes, em formato RGBA.
+    """
+    return np.asarray(FILTERS[filter_name][0](Image.fromarray(pixels), **parameters))
+
+
+def _apply_batch(filter_name: str, batch: List[np.ndarray]) -> List[np.ndarray]:
+    """Aplica um dos filtros deste módulo a várias imagens do mesmo formato com uma única aplicação do kernel.
+
+    Os valores de cada imagem (o brilho, para filtros em escala de cinza, ou os layers RGB) são empilhados
+      verticalmente em um único array, separados por linhas com o valor padrão do kernel, de forma que nenhuma
+      vizinhança atravessa duas imagens. O resultado de cada imagem é idêntico ao obtido pela função do filtro, e o
+      custo fixo de cada chamada é pago uma única vez por grupo. Empilhar as imagens por linhas, e não como canais,
+      mantém o resultado de cada imagem contíguo em memória para a conversão final.
+
+    Parâmetros
+    ----------
+    filter_name : str
+        O nome do filtro, uma das chaves de '_FILTERS'.
+    batch : List[np.ndarray]
+        Os pixels das imagens, todos com o mesmo formato.
+
+    Retorno
+    -------
+    List[np.ndarray]
+        Os pixels resultantes de cada imagem, em formato RGBA, na mesma ordem.
+    """
+    spec = _FILTERS[filter_name]
+    kernel = ConvolutionKernel(matrix=spec.matrix, anchor=(1, 1))
+    prepared = [_prepare(spec, pixels) for pixels in batch]
+
+    # As linhas de separação são lidas tanto pela última linha de uma imagem quanto pela primeira da seguinte.
+    height = batch[0].shape[0]
+    step = height + max(kernel.anchor[1], kernel.height - 1 - kernel.anchor[1])
+    first = prepared[0][0]
+    values = np.zeros(((len(batch) - 1) * step + height,) + first.shape[1:], dtype=first.dtype)
+    for index, (image_values, _) in enumerate(prepared):
+        values[index * step:index * step + height] = image_values
+
+    if spec.grayscale:
+        sums = kernel.apply_array(values, weight=spec.weight, default=0)
+    else:
+        sums = kernel.apply_integer(values, weight=spec.weight, default=0, saturate=False)
+
+    return [
+        _pack(_finish(spec, sums[index * step:index * step + height]), alpha)
+        for index, (_, alpha) in enumerate(prepared)
+    ]
+
+
+def _encode(pixels: np.ndarray, image_format: str) -> bytes:
+    """Codifica os pixels RGBA de uma imagem em um formato de arquivo.
+
+    Parâmetros
+    ----------
+    pixels : np.ndarray
+        Os pixels da imagem, em formato RGBA.
+    image_format : str
+        O formato da biblioteca PIL (e.g. "PNG").
+
+    Retorno
+    -------
+    bytes
+        Os bytes da imagem codificada.
+    """
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format=image_format)
+
+    return buffer.getvalue()
+
+
+def _response(status: int, content_type: str, payload: bytes) -> bytes:
+    """Monta uma resposta HTTP completa.
+
+    Parâmetros
+    ----------
+    status : int
+        O status da resposta.
+    content_type : str
+        O tipo de conteúdo do corpo.
+    payload : bytes
+        O corpo da resposta.
+
+    Retorno
+    -------
+    bytes
+        Os bytes da resposta, com cabeçalhos e corpo.
+    """
+    head = f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: {content_type}\r\nContent-Length: {len(payload)}\r\n"
+    if status == 503:
+        head += "Retry-After: 1\r\n"
+
+    return (head + "Connection: close\r\n\r\n").encode("latin-1") + payload
+
+
+if __name__ == "__main__":
+    sys.exit(main())
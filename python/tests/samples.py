@@ -0,0 +1,37 @@
+"""Define os kernels de convolução e os dados aleatórios compartilhados pelos testes."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+from PIL import Image
+# Locais
+from convolution_kernel import ConvolutionKernel, box_blur, edge_detection, embossing, gaussian_blur, sharpen
+
+
+# Constantes # ------------------------------------------------------------------------------------------------------- #
+# Kernels de teste e seus pesos: um kernel com valores negativos, um separável, um uniforme e um assimétrico, com
+#   âncora fora do centro.
+KERNELS = {
+    "sharpen": (ConvolutionKernel([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], anchor=(1, 1)), 1),
+    "gaussian": (ConvolutionKernel([[1, 2, 1], [2, 4, 2], [1, 2, 1]], anchor=(1, 1)), 16),
+    "box": (ConvolutionKernel([[1] * 5] * 5, anchor=(2, 2)), 25),
+    "asymmetric": (ConvolutionKernel([[1, 0], [3, -2], [0, 1]], anchor=(0, 1)), 3),
+}
+
+# Os filtros de imagem, pelo nome.
+FILTERS = {
+    "edge_detection": edge_detection, "box_blur": box_blur, "gaussian_blur": gaussian_blur, "sharpen": sharpen,
+    "embossing": embossing
+}
+
+
+# Funções # ---------------------------------------------------------------------------------------------------------- #
+def random_array(shape, integer=False):
+    """Um array aleatório com valores no intervalo 0 a 255, reais ou inteiros."""
+    rng = np.random.default_rng(sum(shape))
+    return rng.integers(0, 256, shape) if integer else rng.random(shape) * 255
+
+
+def random_image(mode="RGBA", size=(17, 13), seed=1):
+    """Uma imagem aleatória no formato passado."""
+    rng = np.random.default_rng(seed)
+    return Image.fromarray(rng.integers(0, 256, (size[1], size[0], len(mode)), dtype=np.uint8))
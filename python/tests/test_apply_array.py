@@ -0,0 +1,31 @@
+"""Testa a aplicação vetorizada de 'ConvolutionKernel' a arrays do NumPy contra a aplicação por função de acesso."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+import pytest
+# Locais
+from samples import KERNELS, random_array
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize("name", list(KERNELS))
+def test_apply_matches_apply_array(name):
+    """'apply', com uma função de acesso, retorna os mesmos valores que 'apply_array', inclusive nas bordas."""
+    kernel, weight = KERNELS[name]
+    array = random_array((23, 31))
+
+    listed = kernel.apply(lambda coord: array[coord[1], coord[0]], limits=(31, 23), weight=weight, default=7,
+                          method="direct")
+    result = kernel.apply_array(array, weight=weight, default=7, method="direct")
+
+    assert len(listed) == 31 and len(listed[0]) == 23
+    assert np.allclose(np.array(listed).T, result, rtol=0, atol=1e-9)
+
+
+def test_default_fills_positions_outside_the_array():
+    """As posições fora do array são lidas com o valor padrão."""
+    kernel, _ = KERNELS["box"]
+
+    result = kernel.apply_array(np.zeros((1, 1)), weight=1, default=2, method="direct")
+
+    assert result.tolist() == [[48.0]]
@@ -0,0 +1,53 @@
+"""Testa a aplicação de vários kernels de convolução à mesma matriz de dados, em uma única passada."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+import pytest
+# Locais
+from convolution_kernel import ConvolutionKernel
+from samples import KERNELS, random_array
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+def test_apply_many_matches_apply_array():
+    """'apply_many' retorna, para cada kernel, o mesmo resultado de 'apply_array'."""
+    names = ["sharpen", "gaussian", "asymmetric"]
+    kernels = [KERNELS[name][0] for name in names]
+    weights = [KERNELS[name][1] for name in names]
+    array = random_array((45, 38))
+
+    results = ConvolutionKernel.apply_many(kernels, array, weights=weights, default=2)
+
+    for kernel, weight, result in zip(kernels, weights, results):
+        assert np.array_equal(result, kernel.apply_array(array, weight=weight, default=2, method="direct"))
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_apply_many_channels_region_and_workers(workers):
+    """Com canais, regiões, um peso único e várias threads, cada resultado é o de 'apply_array'."""
+    kernels = [KERNELS[name][0] for name in KERNELS]
+    array = random_array((40, 33, 3))
+    region = (3, 5, 25, 30)
+
+    results = ConvolutionKernel.apply_many(kernels, array, weights=4, workers=workers, region=region)
+
+    for kernel, result in zip(kernels, results):
+        assert np.array_equal(result, kernel.apply_array(array, weight=4, method="direct", region=region))
+
+
+def test_apply_many_rejects_invalid_parameters():
+    """Listas vazias, arrays com outro número de dimensões, pesos em outro número e regiões fora do array são
+      rejeitados."""
+    kernels = [KERNELS["sharpen"][0], KERNELS["gaussian"][0]]
+    array = random_array((8, 9))
+
+    with pytest.raises(ValueError, match=r"^\[1\]"):
+        ConvolutionKernel.apply_many([], array)
+    with pytest.raises(ValueError, match=r"^\[2\]"):
+        ConvolutionKernel.apply_many(kernels, array.ravel())
+    with pytest.raises(ValueError, match=r"^\[3\]"):
+        ConvolutionKernel.apply_many(kernels, array, weights=[1])
+    with pytest.raises(ValueError, match=r"^\[4\]"):
+        ConvolutionKernel.apply_many(kernels, array, workers=0)
+    with pytest.raises(ValueError, match=r"^\[5\]"):
+        ConvolutionKernel.apply_many(kernels, array, region=(5, 5, 5, 5))
@@ -0,0 +1,50 @@
+"""Testa o conjunto de medições de desempenho e a detecção de regressões."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Módulos
+import copy
+import json
+# Locais
+from convolution_kernel.benchmark import FILTERS, compare_results, main, run_suite
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+def test_run_suite_measures_every_case():
+    """'run_suite' mede todos os filtros em RGB e RGBA e todos os kernels, reportando cada caso ao ser medido."""
+    reported = []
+
+    results = run_suite(image_sizes=[16], kernel_sizes=[3, 5], repeat=1,
+                        progress=lambda name, result: reported.append(name))
+
+    expected = {f"filter/{name}/{mode}/16" for name in FILTERS for mode in ("RGB", "RGBA")}
+    expected |= {"kernel/3x3/16", "kernel/5x5/16"}
+    assert set(results) == expected and reported == list(results)
+    for result in results.values():
+        assert result["seconds"] > 0 and result["megapixels_per_second"] > 0 and result["peak_bytes"] >= 0
+
+
+def test_compare_results_flags_slowdown():
+    """Apenas os casos presentes nas duas execuções cujo tempo aumentou mais que o limite são regressões."""
+    baseline = run_suite(image_sizes=[16], kernel_sizes=[3], repeat=1)
+    current = copy.deepcopy(baseline)
+    current["filter/sharpen/RGBA/16"]["seconds"] *= 1.5
+    current["kernel/3x3/16"]["seconds"] *= 1.05
+    current["kernel/7x7/16"] = {"seconds": 1.0, "megapixels_per_second": 0.0, "peak_bytes": 0}
+
+    assert compare_results(baseline, baseline) == []
+    assert compare_results(baseline, current) == ["filter/sharpen/RGBA/16"]
+    assert compare_results(baseline, current, threshold=0.01) == ["filter/sharpen/RGBA/16", "kernel/3x3/16"]
+
+
+def test_main_suite_compares_with_previous_run(tmp_path):
+    """Com '--suite', os resultados são gravados em JSON, e a comparação com uma execução mais rápida falha."""
+    arguments = ["--suite", "--sizes", "16", "--kernels", "3", "--repeat", "1"]
+    assert main(arguments + ["--json", str(tmp_path / "baseline.json")]) == 0
+
+    with open(tmp_path / "baseline.json") as file:
+        baseline = json.load(file)
+    for result in baseline["results"].values():
+        result["seconds"] /= 1000
+    with open(tmp_path / "faster.json", "w") as file:
+        json.dump(baseline, file)
+
+    assert main(arguments + ["--compare", str(tmp_path / "faster.json")]) == 1
@@ -0,0 +1,62 @@
+"""Testa a aplicação de kernels uniformes pela imagem integral e a borragem "box blur" com raio."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+import pytest
+# Locais
+from convolution_kernel import ConvolutionKernel, IntegralImage, box_blur
+from samples import KERNELS, random_array, random_image
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize("shape", [(40, 37), (40, 37, 3), (3, 2)])
+def test_box_matches_direct(shape):
+    """O método "box" retorna os mesmos valores que o método "direct", e 'apply' os mesmos que 'apply_array'."""
+    kernel, weight = KERNELS["box"]
+    array = random_array(shape)
+    expected = kernel.apply_array(array, weight=weight, default=3, method="direct")
+
+    assert np.allclose(kernel.apply_array(array, weight=weight, default=3, method="box"), expected, rtol=0, atol=1e-9)
+    if len(shape) == 2:
+        listed = kernel.apply(lambda coord: array[coord[1], coord[0]], limits=shape[::-1], weight=weight, default=3,
+                              method="box")
+        assert np.allclose(np.array(listed).T, expected, rtol=0, atol=1e-9)
+
+
+def test_box_rejects_non_uniform_kernel():
+    """O método "box" não pode ser pedido para um kernel que não é uniforme."""
+    kernel, weight = KERNELS["gaussian"]
+
+    with pytest.raises(ValueError, match=r"^\[3\]"):
+        kernel.apply_array(random_array((5, 5)), weight=weight, method="box")
+
+
+@pytest.mark.parametrize("anchor", [None, (0, 0), (3, 1)])
+def test_integral_box_sum_matches_kernel(anchor):
+    """As somas da imagem integral são iguais às de um kernel de valores 1 com a mesma âncora, e exatas para
+      inteiros."""
+    array = random_array((30, 25, 3), integer=True)
+    kernel = ConvolutionKernel([[1] * 3] * 4, anchor=anchor or (1, 1))
+
+    sums = IntegralImage(array).box_sum(4, 3, anchor=anchor, default=2)
+
+    assert sums.dtype == np.int64
+    assert np.array_equal(sums, kernel.apply_array(array, default=2, method="direct"))
+
+
+@pytest.mark.parametrize("radius", [0, 1, 4, 20])
+def test_box_blur_radius_matches_uniform_kernel(radius):
+    """'box_blur' com raio é igual ao truncamento da média do quadrado de lado (2 * radius + 1), com a mesma
+      transparência, e aceita uma imagem integral já calculada."""
+    image = random_image(size=(37, 29))
+    pixels = np.asarray(image)
+    size = 2 * radius + 1
+    kernel = ConvolutionKernel([[1] * size] * size, anchor=(radius, radius))
+    expected = np.trunc(kernel.apply_array(pixels[..., :3].astype(np.float64), weight=size * size, method="direct"))
+
+    result = np.asarray(box_blur(image, radius=radius))
+    integral = box_blur(image, radius=radius, integral=IntegralImage(pixels[..., :3]))
+
+    assert np.array_equal(result[..., :3], expected)
+    assert np.array_equal(result[..., 3], pixels[..., 3])
+    assert np.array_equal(np.asarray(integral), result)
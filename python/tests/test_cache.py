@@ -0,0 +1,100 @@
+"""Testa o cache de resultados endereçado pelo conteúdo das entradas."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+import pytest
+# Locais
+from convolution_kernel import ConvolutionKernel, ResultCache, sharpen
+from samples import KERNELS, random_array, random_image
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+def test_hit_returns_equal_copy():
+    """Um acerto retorna um array igual ao armazenado, que pode ser modificado sem alterar o cache."""
+    cache = ResultCache()
+    value = random_array((6, 7))
+    stored = value.copy()
+    cache.put("key", value)
+    value[0, 0] = -1
+
+    first = cache.get("key")
+    first[1, 1] = -1
+
+    assert np.array_equal(cache.get("key"), stored)
+    assert cache.get("missing") is None
+    assert cache.stats["hits"] == 2 and cache.stats["misses"] == 1
+
+
+def test_apply_array_key_depends_on_every_parameter():
+    """'apply_array' reutiliza o resultado apenas com o mesmo kernel, peso, valor padrão, método e array."""
+    cache = ResultCache()
+    kernel, weight = KERNELS["sharpen"]
+    array = random_array((20, 15))
+    expected = kernel.apply_array(array, weight=weight, method="direct")
+
+    assert np.array_equal(kernel.apply_array(array, weight=weight, method="direct", cache=cache), expected)
+    result = kernel.apply_array(array, weight=weight, method="direct", cache=cache)
+    assert np.array_equal(result, expected) and cache.stats["hits"] == 1
+
+    variants = [
+        (ConvolutionKernel([[0, -1, 0], [-1, 6, -1], [0, -1, 0]], anchor=(1, 1)), dict(weight=weight)),
+        (kernel, dict(weight=2)),
+        (kernel, dict(weight=weight, default=1)),
+        (kernel, dict(weight=weight, method="fft")),
+    ]
+    for other, parameters in variants:
+        parameters.setdefault("method", "direct")
+        result = other.apply_array(array, cache=cache, **parameters)
+        assert np.array_equal(result, other.apply_array(array, **parameters))
+    assert np.array_equal(kernel.apply_array(array + 1, weight=weight, method="direct", cache=cache),
+                          kernel.apply_array(array + 1, weight=weight, method="direct"))
+
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 6
+
+
+def test_least_recently_used_results_are_evicted():
+    """Ao exceder o limite de bytes, os resultados menos recentemente utilizados são descartados, e resultados
+      maiores que o limite não são mantidos em memória."""
+    values = {name: np.full(100, index, dtype=np.uint8) for index, name in enumerate("abc")}
+    cache = ResultCache(budget=250)
+    cache.put("a", values["a"])
+    cache.put("b", values["b"])
+    cache.get("a")
+    cache.put("c", values["c"])
+
+    assert cache.get("b") is None
+    assert np.array_equal(cache.get("a"), values["a"]) and np.array_equal(cache.get("c"), values["c"])
+    assert cache.size == 200 and cache.stats["evictions"] == 1
+
+    cache.put("large", np.zeros(300, dtype=np.uint8))
+    assert cache.get("large") is None and cache.size == 200
+
+
+def test_directory_round_trip(tmp_path):
+    """Os resultados gravados no diretório são lidos por outro cache, inclusive os maiores que o limite de bytes."""
+    value = random_array((9, 4, 3))
+    ResultCache(budget=0, directory=str(tmp_path)).put("key", value)
+
+    cache = ResultCache(directory=str(tmp_path))
+
+    assert np.array_equal(cache.get("key"), value)
+    assert cache.stats["disk_hits"] == 1 and cache.stats["entries"] == 1
+    assert np.array_equal(cache.get("key"), value) and cache.stats["disk_hits"] == 1
+
+
+def test_filter_result_is_reused():
+    """Um filtro aplicado duas vezes à mesma imagem com um cache calcula o resultado uma única vez."""
+    cache = ResultCache()
+    image = random_image(size=(30, 20))
+
+    first = sharpen(image, cache=cache)
+    second = sharpen(image, cache=cache)
+
+    assert np.array_equal(np.asarray(first), np.asarray(second))
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 1
+
+
+def test_negative_budget_is_rejected():
+    """O limite de bytes não pode ser negativo."""
+    with pytest.raises(ValueError, match=r"^\[1\]"):
+        ResultCache(budget=-1)
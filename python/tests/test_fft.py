@@ -0,0 +1,55 @@
+"""Testa a aplicação de 'ConvolutionKernel' por FFT e a escolha automática do método de aplicação."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+import pytest
+# Locais
+from convolution_kernel import ConvolutionKernel, profile
+from samples import KERNELS, random_array
+
+
+# Funções Auxiliares # ----------------------------------------------------------------------------------------------- #
+def _chosen(kernel, array):
+    """O método escolhido automaticamente para aplicar o kernel ao array, lido das etapas medidas."""
+    with profile() as records:
+        kernel.apply_array(array)
+
+    return next(record.stage[len("kernel."):] for record in records if record.stage != "kernel.pad")
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize("name", list(KERNELS))
+@pytest.mark.parametrize("method", ["fft", "auto"])
+@pytest.mark.parametrize("shape", [(40, 37), (40, 37, 3)])
+def test_methods_match_direct(name, method, shape):
+    """Os métodos "fft" e "auto" retornam os mesmos valores que o método "direct", a menos de arredondamentos, e
+      'apply' os mesmos que 'apply_array'."""
+    kernel, weight = KERNELS[name]
+    array = random_array(shape)
+    expected = kernel.apply_array(array, weight=weight, default=3, method="direct")
+
+    assert np.allclose(kernel.apply_array(array, weight=weight, default=3, method=method), expected, rtol=0,
+                       atol=1e-6)
+    if len(shape) == 2:
+        listed = kernel.apply(lambda coord: array[coord[1], coord[0]], limits=(37, 40), weight=weight, default=3,
+                              method=method)
+        assert np.allclose(np.array(listed).T, expected, rtol=0, atol=1e-6)
+
+
+def test_large_kernel_matches_direct():
+    """Um kernel 31x31 aplicado por FFT retorna os mesmos valores que o método "direct", com o valor padrão nas
+      bordas."""
+    kernel = ConvolutionKernel(random_array((31, 31)).tolist())
+    array = random_array((60, 45))
+
+    result = kernel.apply_array(array, weight=1000, default=9, method="fft")
+
+    assert np.allclose(result, kernel.apply_array(array, weight=1000, default=9, method="direct"), rtol=0, atol=1e-6)
+
+
+def test_auto_chooses_by_cost():
+    """O método "auto" escolhe o método direto para kernels pequenos, e a FFT para kernels grandes não separáveis."""
+    array = random_array((256, 256))
+
+    assert _chosen(KERNELS["sharpen"][0], array) == "direct"
+    assert _chosen(ConvolutionKernel(random_array((31, 31)).tolist()), array) == "fft"
@@ -0,0 +1,70 @@
+"""Testa os filtros de imagem contra a implementação original, que lia e escrevia cada pixel com 'getpixel' e
+  'putpixel'."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+import pytest
+from PIL import Image
+# Locais
+from samples import FILTERS, random_image
+
+
+# Constantes # ------------------------------------------------------------------------------------------------------- #
+# As matrizes ([x][y]), os pesos e as parametrizações da implementação original de cada filtro, e se o filtro é
+#   aplicado ao brilho.
+BASELINE = {
+    "edge_detection": ([[0, -1, 0], [-1, 0, 1], [0, 1, 0]], 1, lambda value: abs(value) / 2, True),
+    "box_blur": ([[0, 1, 0], [1, 0, 1], [0, 1, 0]], 4, lambda value: value, False),
+    "gaussian_blur": ([[1, 2, 1], [2, 4, 2], [1, 2, 1]], 16, lambda value: value, False),
+    "sharpen": ([[0, -1, 0], [-1, 5, -1], [0, -1, 0]], 1, lambda value: value, False),
+    "embossing": ([[0, 1, 1], [-1, 0, 1], [-1, -1, 0]], 1, lambda value: (value + 765) / 6, False),
+}
+
+
+# Funções Auxiliares # ----------------------------------------------------------------------------------------------- #
+def _baseline(image, filter_name):
+    """Transcrição da implementação original de um filtro, pixel a pixel, com 'getpixel' e 'putpixel'."""
+    matrix, weight, finish, grayscale = BASELINE[filter_name]
+    width, height = image.size
+
+    def value(x, y, layer):
+        if not (0 <= x < width and 0 <= y < height):
+            return 0
+        pixel = image.getpixel((x, y))
+        return sum(pixel[:3]) / 3 if grayscale else pixel[layer]
+
+    result = Image.new(mode="RGBA", size=image.size)
+    for y in range(height):
+        for x in range(width):
+            layers = []
+            for layer in range(1 if grayscale else 3):
+                total = 0
+                for kernel_y in range(3):
+                    for kernel_x in range(3):
+                        total += value(x + kernel_x - 1, y + kernel_y - 1, layer) * matrix[kernel_x][kernel_y]
+                layers.append(int(finish(total / weight)))
+            if grayscale:
+                layers *= 3
+            alpha = 255 if image.mode == "RGB" else image.getpixel((x, y))[3]
+            result.putpixel((x, y), tuple(layers) + (alpha,))
+
+    return result
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize("mode", ["RGB", "RGBA"])
+@pytest.mark.parametrize("filter_name", list(FILTERS))
+def test_filters_match_baseline(mode, filter_name):
+    """Os filtros são idênticos, pixel a pixel, à implementação original."""
+    image = random_image(mode)
+
+    assert np.array_equal(np.asarray(FILTERS[filter_name](image)), np.asarray(_baseline(image, filter_name)))
+
+
+def test_filters_return_rgba_images():
+    """Os filtros retornam imagens RGBA do tamanho da original, opacas para imagens RGB."""
+    for filter_function in FILTERS.values():
+        result = filter_function(random_image("RGB"))
+
+        assert result.mode == "RGBA" and result.size == (17, 13)
+        assert (np.asarray(result)[..., 3] == 255).all()
@@ -0,0 +1,71 @@
+"""Testa a borragem gaussiana com desvio padrão contra o kernel gaussiano exato aplicado com 'ConvolutionKernel'."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+import pytest
+from PIL import Image
+# Locais
+from convolution_kernel import ConvolutionKernel, gaussian_blur
+from convolution_kernel.image import GAUSSIAN_BOX_SIGMA
+
+
+# Funções Auxiliares # ----------------------------------------------------------------------------------------------- #
+def _images():
+    """As imagens de teste: ruído, gradientes e xadrez, com formato (altura, largura, 3)."""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[:120, :150]
+    return {
+        "noise": rng.integers(0, 256, (120, 150, 3)),
+        "gradient": np.dstack([x, y, x + y]) % 256,
+        "checker": np.dstack([((x // 8 + y // 8) % 2) * 255] * 3),
+    }
+
+
+def _exact(pixels: np.ndarray, sigma: float) -> np.ndarray:
+    """Aplica o kernel gaussiano amostrado até 4 desvios padrão, normalizado, truncando e saturando o resultado."""
+    radius = int(np.ceil(4 * sigma))
+    samples = np.exp(-np.arange(-radius, radius + 1) ** 2 / (2 * sigma * sigma))
+    samples /= samples.sum()
+    kernel = ConvolutionKernel(np.outer(samples, samples).tolist(), anchor=(radius, radius))
+    values = kernel.apply_array(pixels.astype(np.float64), weight=1, default=0, method="direct")
+
+    return np.clip(np.trunc(values), 0, 255)
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize("name", ["noise", "gradient", "checker"])
+@pytest.mark.parametrize("sigma", [0.5, 1, 2, 2.9])
+def test_small_sigma_uses_exact_kernel(name, sigma):
+    """Abaixo de 'GAUSSIAN_BOX_SIGMA', o resultado difere do kernel exato apenas por arredondamentos."""
+    assert sigma < GAUSSIAN_BOX_SIGMA
+    pixels = _images()[name]
+    result = np.asarray(gaussian_blur(Image.fromarray(pixels.astype(np.uint8)), sigma=sigma))[..., :3]
+
+    assert np.abs(result - _exact(pixels, sigma)).max() <= 1
+
+
+@pytest.mark.parametrize("name", ["noise", "gradient", "checker"])
+@pytest.mark.parametrize("sigma", [GAUSSIAN_BOX_SIGMA, 4, 5.5, 8])
+def test_box_approximation_within_documented_error(name, sigma):
+    """A aproximação por borragens "box blur" difere do kernel exato em no máximo 10 níveis."""
+    pixels = _images()[name]
+    result = np.asarray(gaussian_blur(Image.fromarray(pixels.astype(np.uint8)), sigma=sigma))[..., :3]
+
+    assert np.abs(result - _exact(pixels, sigma)).max() <= 10
+
+
+def test_small_sigma_blurs():
+    """Desvios padrão menores que 1 ainda borram a imagem."""
+    pixels = _images()["checker"].astype(np.uint8)
+    result = np.asarray(gaussian_blur(Image.fromarray(pixels), sigma=0.5))[..., :3]
+
+    assert not np.array_equal(result, pixels)
+
+
+def test_small_sigma_region_matches_full_image():
+    """A região filtrada com o kernel exato é igual ao recorte da imagem filtrada inteira."""
+    image = Image.fromarray(_images()["noise"].astype(np.uint8))
+    full = np.asarray(gaussian_blur(image, sigma=1.5))
+    region = np.asarray(gaussian_blur(image, sigma=1.5, region=(20, 30, 50, 40)))
+
+    assert np.array_equal(region, full[30:70, 20:70])
@@ -0,0 +1,79 @@
+"""Testa a aplicação dos kernels de convolução com aritmética inteira."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+import pytest
+# Locais
+from convolution_kernel import ConvolutionKernel
+from samples import KERNELS, random_array
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize("name", list(KERNELS))
+@pytest.mark.parametrize("default", [0, 5])
+def test_apply_integer_matches_truncated_float(name, default):
+    """'apply_integer' é igual ao truncamento do resultado de 'apply_array', com e sem saturação."""
+    kernel, weight = KERNELS[name]
+    array = random_array((29, 34, 3), integer=True).astype(np.uint8)
+    truncated = np.trunc(kernel.apply_array(array, weight=weight, default=default, method="direct"))
+
+    raw = kernel.apply_integer(array, weight=weight, default=default, saturate=False)
+    saturated = kernel.apply_integer(array, weight=weight, default=default)
+
+    assert np.array_equal(raw, truncated)
+    assert saturated.dtype == np.uint8
+    assert np.array_equal(saturated, np.clip(truncated, 0, 255))
+
+
+@pytest.mark.parametrize("weight", [-4, 3, 7, 64])
+def test_weights_truncate_toward_zero(weight):
+    """Pesos negativos, potências de 2 e os demais pesos truncam a divisão em direção ao zero."""
+    kernel, _ = KERNELS["sharpen"]
+    array = random_array((31, 22), integer=True).astype(np.uint8)
+
+    result = kernel.apply_integer(array, weight=weight, saturate=False)
+
+    assert np.array_equal(result, np.trunc(kernel.apply_array(array, weight=weight, method="direct")))
+
+
+@pytest.mark.parametrize("name", list(KERNELS))
+def test_apply_integer_workers_are_bit_identical(name):
+    """'apply_integer' não depende do número de threads, e processa os canais juntos com o resultado de cada
+      plano."""
+    kernel, weight = KERNELS[name]
+    array = random_array((57, 43, 3), integer=True).astype(np.uint8)
+
+    single = kernel.apply_integer(array, weight=weight, workers=1)
+
+    assert np.array_equal(kernel.apply_integer(array, weight=weight, workers=3), single)
+    for channel in range(3):
+        assert np.array_equal(kernel.apply_integer(array[..., channel], weight=weight), single[..., channel])
+
+
+def test_apply_integer_rejects_real_values():
+    """Kernels com valores reais e pesos não inteiros não podem ser aplicados com aritmética inteira."""
+    array = np.zeros((4, 4), dtype=np.uint8)
+
+    with pytest.raises(ValueError, match=r"^\[2\]"):
+        KERNELS["gaussian"][0].apply_integer(array, weight=2.5)
+    with pytest.raises(ValueError, match=r"^\[3\]"):
+        ConvolutionKernel([[0.5, 0, 0], [0, 1, 0], [0, 0, 0]]).apply_integer(array)
+
+
+@pytest.mark.parametrize("matrix, weight", [
+    (np.outer([1, 4, 6, 4, 1], [1, 4, 6, 4, 1]), 256),
+    (np.outer([1, 2, 1], [-1, -2, 6, -2, -1]), 4),
+])
+@pytest.mark.parametrize("default", [0, 5])
+def test_separable_integer_kernels_match_truncated_float(matrix, weight, default):
+    """Kernels separáveis de inteiros são aplicados em duas passadas com fatores inteiros, com o mesmo resultado
+      truncado, acumulado sem sinal apenas quando nenhum valor pode ser negativo."""
+    kernel = ConvolutionKernel(matrix.tolist(), anchor=(2, 1 if matrix.shape[0] == 3 else 2))
+    array = random_array((33, 26, 3), integer=True).astype(np.uint8)
+
+    result = kernel.apply_integer(array, weight=weight, default=default, saturate=False)
+
+    assert all(np.array_equal(factor, np.round(factor)) for factor in kernel._factors)
+    assert np.array_equal(result, np.trunc(kernel.apply_array(array, weight=weight, default=default,
+                                                              method="direct")))
+    assert np.issubdtype(result.dtype, np.unsignedinteger) == bool(np.all(matrix >= 0))
@@ -0,0 +1,90 @@
+"""Testa a avaliação adiada dos filtros com 'LazyImage', por tiles memorizados, contra as funções de filtro."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+import pytest
+from PIL import Image
+# Locais
+from convolution_kernel import LazyImage, Pipeline, ResultCache, box_blur, edge_detection, embossing, sharpen
+from samples import random_image
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+def test_lazy_image_matches_chained_filters():
+    """'crop', 'tiles' e 'thumbnail' de uma 'LazyImage' correspondem aos filtros aplicados à imagem inteira."""
+    image = random_image(size=(150, 110))
+    lazy = LazyImage(image, tile_size=32).filter("box_blur", radius=2).filter("sharpen") \
+        .filter("edge_detection", operator="sobel")
+    expected = np.asarray(edge_detection(sharpen(box_blur(image, radius=2)), operator="sobel"))
+
+    assert np.array_equal(np.asarray(lazy.crop()), expected)
+    assert np.array_equal(np.asarray(lazy.crop((13, 7, 101, 90))), expected[7:90, 13:101])
+    for (left, top, right, bottom), pixels in lazy.tiles((20, 20, 120, 75)):
+        assert np.array_equal(pixels, expected[top:bottom, left:right])
+
+    reference = Image.fromarray(expected).reduce(1)
+    reference.thumbnail((40, 40), resample=Image.Resampling.BICUBIC)
+    assert np.array_equal(np.asarray(lazy.thumbnail((40, 40))), np.asarray(reference))
+
+
+def test_lazy_image_pipeline_and_array_source():
+    """Uma 'LazyImage' criada a partir de um array RGB aplica um pipeline como a sua aplicação à imagem inteira."""
+    pixels = np.asarray(random_image("RGB", size=(90, 70)))
+    pipeline = Pipeline(["gaussian_blur", "embossing"])
+    lazy = LazyImage(pixels, tile_size=25).apply(pipeline)
+    expected = np.asarray(pipeline(Image.fromarray(pixels)))
+
+    assert np.array_equal(np.asarray(lazy.crop((5, 5, 80, 60))), expected[5:60, 5:80])
+
+
+def test_lazy_image_memoizes_requested_tiles():
+    """Apenas os tiles pedidos são calculados e memorizados, e pedidos repetidos reutilizam os tiles memorizados."""
+    cache = ResultCache()
+    image = random_image(size=(128, 96))
+    lazy = LazyImage(image, tile_size=32, cache=cache).filter("sharpen")
+
+    first = np.asarray(lazy.crop((40, 40, 60, 60)))
+    computed = cache.stats["misses"]
+    second = np.asarray(lazy.crop((40, 40, 60, 60)))
+
+    assert computed == 1 and cache.stats["hits"] == 1
+    assert np.array_equal(first, second)
+    assert np.array_equal(first, np.asarray(sharpen(image))[40:60, 40:60])
+
+
+def test_lazy_image_branches_share_source():
+    """Imagens derivadas da mesma imagem, e arquivos '.npy' mapeados em memória, calculam cada filtro
+      independentemente."""
+    image = random_image("RGB", size=(70, 50))
+    base = LazyImage(np.asarray(image), tile_size=16).filter("box_blur", radius=1)
+    sharpened, embossed = base.filter("sharpen"), base.filter("embossing")
+
+    assert np.array_equal(np.asarray(sharpened.crop()), np.asarray(sharpen(box_blur(image, radius=1))))
+    assert np.array_equal(np.asarray(embossed.crop()), np.asarray(embossing(box_blur(image, radius=1))))
+
+
+def test_lazy_image_reads_npy_files(tmp_path):
+    """O caminho de um arquivo '.npy' é mapeado em memória e filtrado como a imagem correspondente."""
+    image = random_image(size=(45, 38))
+    np.save(tmp_path / "source.npy", np.asarray(image))
+
+    lazy = LazyImage(str(tmp_path / "source.npy"), tile_size=20).filter("edge_detection")
+
+    assert np.array_equal(np.asarray(lazy.crop((3, 4, 40, 30))), np.asarray(edge_detection(image))[4:30, 3:40])
+
+
+def test_lazy_image_rejects_invalid_parameters():
+    """Imagens em outros formatos, tiles vazios, filtros desconhecidos, regiões fora da imagem e miniaturas vazias são
+      rejeitados."""
+    lazy = LazyImage(random_image(size=(10, 10)))
+
+    with pytest.raises(ValueError, match=r"^\[1\]"):
+        LazyImage(Image.new("L", (10, 10)))
+    with pytest.raises(ValueError, match=r"^\[2\]"):
+        LazyImage(random_image(size=(10, 10)), tile_size=0)
+    with pytest.raises(ValueError, match=r"^\[1\]"):
+        lazy.filter("unknown")
+    with pytest.raises(ValueError, match=r"^\[1\]"):
+        lazy.crop((5, 5, 11, 8))
+    with pytest.raises(ValueError, match=r"^\[1\]"):
+        lazy.thumbnail((0, 5))
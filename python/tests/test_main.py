@@ -0,0 +1,75 @@
+"""Testa o processamento de arquivos pela linha de comando."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+from PIL import Image
+# Locais
+from convolution_kernel import sharpen
+from convolution_kernel.__main__ import _shared, iter_tasks, main
+
+
+# Funções Auxiliares # ----------------------------------------------------------------------------------------------- #
+def _write(path, seed):
+    """Grava uma imagem aleatória e retorna os seus pixels."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pixels = np.random.default_rng(seed).integers(0, 256, (12, 9, 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(path)
+    return pixels
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+def test_recursive_glob_keeps_relative_paths(tmp_path):
+    """Arquivos com o mesmo nome em subdiretórios diferentes resultam em saídas diferentes."""
+    first = _write(tmp_path / "imgs" / "a" / "x.png", 1)
+    second = _write(tmp_path / "imgs" / "b" / "x.png", 2)
+
+    assert main(["sharpen", str(tmp_path / "imgs" / "**" / "*.png"), "-o", str(tmp_path / "out"), "-j", "1"]) == 0
+
+    for name, pixels in (("a", first), ("b", second)):
+        result = np.asarray(Image.open(tmp_path / "out" / name / "x.png"))
+        assert np.array_equal(result, np.asarray(sharpen(Image.fromarray(pixels))))
+
+
+def test_output_pattern_keeps_relative_paths(tmp_path):
+    """No padrão de saída, '*' é substituído pelo caminho relativo da entrada, sem extensão."""
+    _write(tmp_path / "imgs" / "a" / "x.png", 1)
+    pattern = str(tmp_path / "out" / "*.webp")
+
+    tasks = list(iter_tasks([str(tmp_path / "imgs" / "**" / "*.png")], pattern))
+
+    assert [destination for _, destination, _ in tasks] == [str(tmp_path / "out" / "a" / "x.webp")]
+
+
+def test_colliding_outputs_are_reported(tmp_path, capsys):
+    """Entradas diferentes com a mesma saída são reportadas como erro, e apenas a primeira é gravada."""
+    _write(tmp_path / "first" / "x.png", 1)
+    _write(tmp_path / "second" / "x.png", 2)
+    patterns = [str(tmp_path / "first" / "*.png"), str(tmp_path / "second" / "*.png")]
+
+    assert main(["sharpen", *patterns, "-o", str(tmp_path / "out"), "-j", "1"]) == 1
+
+    assert "x.png" in capsys.readouterr().err
+    assert (tmp_path / "out" / "x.png").exists()
+
+
+def test_same_stem_outputs_are_reported(tmp_path, capsys):
+    """Arquivos de um mesmo diretório que diferem apenas na extensão têm a mesma saída com '*', e são reportados."""
+    _write(tmp_path / "imgs" / "a" / "x.png", 1)
+    _write(tmp_path / "imgs" / "a" / "x.bmp", 2)
+    _write(tmp_path / "imgs" / "b" / "x.png", 3)
+    arguments = [str(tmp_path / "imgs" / "*" / "x.*"), "-o", str(tmp_path / "out" / "*.png"), "-j", "1"]
+
+    assert main(["sharpen", *arguments]) == 1
+
+    assert capsys.readouterr().err.count("também é a saída") == 1
+    assert (tmp_path / "out" / "a" / "x.png").exists() and (tmp_path / "out" / "b" / "x.png").exists()
+
+
+def test_only_overlapping_patterns_are_shared():
+    """Apenas os padrões cujos caminhos relativos podem coincidir têm as suas saídas mantidas até o fim."""
+    patterns = ["first/*.png", "second/*.png", "third/*/*.png", "fourth/x.jpg", "fifth/y.png"]
+
+    assert _shared(patterns, "out") == {"first/*.png", "second/*.png", "fifth/y.png"}
+    assert _shared(patterns, "out/*.png") == {"first/*.png", "second/*.png", "fourth/x.jpg", "fifth/y.png"}
+    assert _shared(["imgs/**", "other/*.png"], "out/*.png") == {"imgs/**", "other/*.png"}
+    assert _shared(["imgs/*.png"], "out/*.png") == set()
@@ -0,0 +1,71 @@
+"""Testa a leitura e a escrita de imagens e matrizes de dados mapeadas em memória, sem cópias intermediárias."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+import pytest
+# Locais
+from convolution_kernel import open_raw, stream_filter
+from samples import FILTERS, KERNELS, random_array, random_image
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+def test_apply_mapped_matches_apply_array(tmp_path):
+    """'apply_mapped' escreve em um arquivo '.npy' o mesmo resultado de 'apply_array'."""
+    kernel, weight = KERNELS["sharpen"]
+    array = random_array((77, 52))
+    np.save(tmp_path / "source.npy", array)
+
+    result = kernel.apply_mapped(str(tmp_path / "source.npy"), str(tmp_path / "result.npy"), weight=weight,
+                                 method="direct", band_height=16, dtype=np.uint8)
+
+    expected = np.clip(np.trunc(kernel.apply_array(array, weight=weight, method="direct")), 0, 255)
+    assert np.array_equal(np.load(tmp_path / "result.npy"), expected)
+    assert np.array_equal(result, expected)
+
+
+def test_apply_mapped_writes_into_mapped_destination(tmp_path):
+    """'apply_mapped' lê arrays mapeados em memória e escreve em um arquivo sem cabeçalho criado com 'open_raw',
+      com o mesmo resultado de 'apply_array'."""
+    kernel, weight = KERNELS["gaussian"]
+    array = random_array((41, 29, 3), integer=True).astype(np.uint8)
+    np.save(tmp_path / "source.npy", array)
+    destination = open_raw(str(tmp_path / "result.raw"), (41, 29), layers=3, mode="w+")
+
+    kernel.apply_mapped(np.load(tmp_path / "source.npy", mmap_mode="r"), destination, weight=weight, band_height=7,
+                        dtype=np.uint8)
+    destination.flush()
+
+    expected = np.clip(np.trunc(kernel.apply_array(array, weight=weight)), 0, 255)
+    assert np.array_equal(open_raw(str(tmp_path / "result.raw"), (41, 29), layers=3), expected)
+    with pytest.raises(ValueError, match=r"^\[4\]"):
+        kernel.apply_mapped(array, np.empty((41, 28, 3), dtype=np.uint8), weight=weight, dtype=np.uint8)
+
+
+@pytest.mark.parametrize("filter_name", list(FILTERS))
+def test_stream_filter_reads_npy_files(filter_name, tmp_path):
+    """'stream_filter' lê arquivos '.npy' mapeados em memória, com o mesmo resultado da função de filtro."""
+    image = random_image(size=(45, 70))
+    expected = np.asarray(FILTERS[filter_name](image))
+
+    np.save(tmp_path / "source.npy", np.asarray(image))
+    result = stream_filter(str(tmp_path / "source.npy"), np.zeros((70, 45, 4), dtype=np.uint8), filter_name)
+    assert np.array_equal(result, expected)
+
+
+@pytest.mark.parametrize("planar", [False, True])
+def test_stream_filter_reads_raw_files(planar, tmp_path):
+    """Arquivos sem cabeçalho, com layers intercalados ou planares e um cabeçalho ignorado, são mapeados por
+      'open_raw' e filtrados como a imagem correspondente."""
+    image = random_image("RGB", size=(37, 26))
+    pixels = np.asarray(image)
+    stored = pixels.transpose(2, 0, 1) if planar else pixels
+    (tmp_path / "source.raw").write_bytes(b"header" + np.ascontiguousarray(stored).tobytes())
+
+    source = open_raw(str(tmp_path / "source.raw"), (26, 37), layers=3, planar=planar, offset=6)
+    result = stream_filter(source, str(tmp_path / "result.npy"), "sharpen", band_height=5)
+
+    assert np.array_equal(source, pixels)
+    assert np.array_equal(result, np.asarray(FILTERS["sharpen"](image)))
+    assert np.array_equal(np.load(tmp_path / "result.npy"), result)
+    with pytest.raises(ValueError, match=r"^\[1\]"):
+        open_raw(str(tmp_path / "source.raw"), (26, 37), layers=0)
@@ -0,0 +1,26 @@
+"""Testa a aplicação dos kernels de convolução a todos os canais de um array em uma única passada."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+import pytest
+# Locais
+from samples import KERNELS, random_array
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize("name", list(KERNELS))
+@pytest.mark.parametrize("channels", [1, 3, 4])
+def test_channels_match_separate_planes(name, channels):
+    """Cada canal do resultado é igual à aplicação do kernel ao plano correspondente, para todos os métodos."""
+    kernel, weight = KERNELS[name]
+    array = random_array((26, 35, channels))
+    methods = ["direct", "fft"] + ["separable"] * kernel.separable + ["box"] * kernel.uniform
+
+    for method in methods:
+        result = kernel.apply_array(array, weight=weight, default=4, method=method)
+        planes = [kernel.apply_array(array[..., channel], weight=weight, default=4, method=method)
+                  for channel in range(channels)]
+
+        assert result.shape == array.shape
+        assert np.allclose(result, np.dstack(planes), rtol=0, atol=1e-9), method
+
@@ -0,0 +1,77 @@
+"""Testa a escrita do resultado de 'apply_array' em um array existente ('out') e a conversão do tipo do resultado."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Módulos
+import tracemalloc
+# Bibliotecas
+import numpy as np
+import pytest
+# Locais
+from samples import KERNELS, random_array
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize("dtype", [np.uint8, np.int16, np.float32])
+def test_apply_array_out_matches_converted_result(dtype):
+    """O resultado escrito em 'out' é o resultado em 'np.float64' truncado, saturado e convertido."""
+    kernel, weight = KERNELS["sharpen"]
+    array = random_array((30, 20, 3))
+    expected = kernel.apply_array(array, weight=weight)
+    if np.issubdtype(dtype, np.integer):
+        limits = np.iinfo(dtype)
+        expected = np.clip(np.trunc(expected), limits.min, limits.max)
+
+    out = np.empty(array.shape, dtype=dtype)
+    assert kernel.apply_array(array, weight=weight, out=out) is out
+    assert np.array_equal(out, expected.astype(dtype))
+
+
+def test_apply_array_out_reuses_auxiliary_array():
+    """Chamadas repetidas com um 'out' de outro tipo não alocam um resultado em 'np.float64', e o array auxiliar
+      reutilizado não altera resultados de formatos diferentes."""
+    kernel, weight = KERNELS["sharpen"]
+    array = random_array((200, 300, 3), integer=True).astype(np.uint8)
+    out = np.empty(array.shape, dtype=np.uint8)
+    kernel.apply_array(array, weight=weight, method="direct", out=out)
+
+    tracemalloc.start()
+    try:
+        kernel.apply_array(array, weight=weight, method="direct", out=out)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    # Restam apenas o array envolvido pelo valor padrão e o produto auxiliar do método "direct", cada um com o tamanho
+    #   do resultado em 'np.float64'.
+    assert peak < 2.5 * array.size * 8
+    expected = np.clip(np.trunc(kernel.apply_array(array, weight=weight, method="direct")), 0, 255)
+    assert np.array_equal(out, expected)
+    small = kernel.apply_array(array[:10, :15], weight=weight, out=np.empty((10, 15, 3), dtype=np.int16))
+    assert np.array_equal(small, np.trunc(kernel.apply_array(array[:10, :15], weight=weight)))
+
+
+@pytest.mark.parametrize("method", ["direct", "separable", "fft"])
+def test_apply_array_dtype_matches_out(method):
+    """O parâmetro 'dtype' retorna o mesmo resultado convertido de 'out', em todos os métodos."""
+    kernel, weight = KERNELS["gaussian"]
+    array = random_array((25, 31, 3), integer=True).astype(np.uint8)
+    out = np.empty(array.shape, dtype=np.uint8)
+
+    kernel.apply_array(array, weight=weight, method=method, out=out)
+
+    assert np.array_equal(kernel.apply_array(array, weight=weight, method=method, dtype=np.uint8), out)
+
+
+def test_apply_array_out_is_validated():
+    """Arrays de resultado com outro formato, ou com um tipo diferente do pedido, e tipos não numéricos são
+      rejeitados."""
+    kernel, weight = KERNELS["sharpen"]
+    array = random_array((10, 12, 3))
+
+    with pytest.raises(ValueError, match=r"^\[7\]"):
+        kernel.apply_array(array, weight=weight, out=np.empty((10, 12), dtype=np.uint8))
+    with pytest.raises(ValueError, match=r"^\[7\]"):
+        kernel.apply_array(array, weight=weight, region=(0, 0, 5, 5), out=np.empty(array.shape, dtype=np.uint8))
+    with pytest.raises(ValueError, match=r"^\[7\]"):
+        kernel.apply_array(array, weight=weight, dtype=np.int16, out=np.empty(array.shape, dtype=np.uint8))
+    with pytest.raises(ValueError, match=r"^\[6\]"):
+        kernel.apply_array(array, weight=weight, dtype=np.bool_)
@@ -0,0 +1,99 @@
+"""Testa a aplicação de sequências de filtros com 'Pipeline', e a combinação dos seus estágios."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+import pytest
+# Locais
+from convolution_kernel import ConvolutionKernel, LazyImage, Pipeline, ResultCache
+from samples import FILTERS, random_image
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize("stages", [
+    ["gaussian_blur", "sharpen", "embossing"],
+    ["box_blur", "edge_detection"],
+    ["sharpen", "sharpen", "gaussian_blur"],
+])
+def test_pipeline_matches_chained_filters(stages):
+    """Sem estágios combinados, o pipeline é idêntico à aplicação sucessiva dos filtros."""
+    image = random_image(size=(64, 48))
+    expected = image
+    for stage in stages:
+        expected = FILTERS[stage](expected)
+    pipeline = Pipeline(stages)
+
+    assert pipeline.passes == len(stages)
+    assert np.array_equal(np.asarray(pipeline(image)), np.asarray(expected))
+
+
+@pytest.mark.parametrize("stages, passes", [
+    (["gaussian_blur", "gaussian_blur"], 1),
+    (["gaussian_blur", "gaussian_blur", "gaussian_blur"], 1),
+    (["box_blur", "box_blur"], 2),
+    (["sharpen", "sharpen"], 2),
+    (["gaussian_blur", "box_blur", "sharpen"], 3),
+])
+def test_pipeline_fuses_stages_by_cost(stages, passes):
+    """Apenas os estágios cujo kernel combinado custa menos do que as passadas que ele substitui são combinados."""
+    assert Pipeline(stages).passes == passes
+    assert Pipeline(stages, clamp=False).passes == passes
+
+
+@pytest.mark.parametrize("size", [(64, 48), (5, 9), (3, 2), (1, 1)])
+@pytest.mark.parametrize("count", [2, 3])
+def test_pipeline_fusion_is_within_truncation(size, count):
+    """Os estágios combinados diferem da aplicação sucessiva apenas pelo truncamento intermediário, e são idênticos a
+      ela nas bordas da imagem."""
+    image = random_image(size=size)
+    expected = image
+    for _ in range(count):
+        expected = FILTERS["gaussian_blur"](expected)
+    pipeline = Pipeline(["gaussian_blur"] * count)
+
+    fused = np.asarray(pipeline(image)).astype(int)
+    chained = np.asarray(expected).astype(int)
+    margin = count
+
+    assert pipeline.passes == 1
+    assert np.abs(fused - chained).max() <= count - 1
+    assert np.array_equal(fused[:margin], chained[:margin]) and np.array_equal(fused[-margin:], chained[-margin:])
+    assert np.array_equal(fused[:, :margin], chained[:, :margin])
+    assert np.array_equal(fused[:, -margin:], chained[:, -margin:])
+
+
+@pytest.mark.parametrize("matrix, anchor", [([[-1, 3, -1]], (0, 1)), ([[-1], [3], [-1]], (1, 0))])
+def test_pipeline_without_clamp_fuses_unbounded_stages(matrix, anchor):
+    """Com 'clamp=False', estágios que podem sair do intervalo 0 a 255 também são combinados, sem a saturação
+      intermediária."""
+    kernel = ConvolutionKernel(matrix, anchor=anchor)
+    image = random_image(size=(30, 20))
+    pixels = np.asarray(image)[..., :3].astype(float)
+    pipeline = Pipeline([(kernel, 1), (kernel, 1)], clamp=False)
+
+    expected = kernel.compose(kernel).apply_array(pixels, weight=1, default=0)
+    inner = (slice(2, -2), slice(None)) if kernel.height == 3 else (slice(None), slice(2, -2))
+
+    assert Pipeline([(kernel, 1), (kernel, 1)]).passes == 2
+    assert pipeline.passes == 1
+    assert np.array_equal(np.asarray(pipeline(image))[..., :3][inner], np.clip(expected, 0, 255)[inner])
+
+
+def test_pipeline_cache_returns_fused_result():
+    """O cache de um pipeline com estágios combinados retorna o resultado calculado sem o cache."""
+    image = random_image(size=(40, 30))
+    cache = ResultCache()
+    pipeline = Pipeline(["gaussian_blur", "gaussian_blur"])
+    expected = np.asarray(pipeline(image))
+
+    assert np.array_equal(np.asarray(pipeline(image, cache=cache)), expected)
+    assert np.array_equal(np.asarray(pipeline(image, cache=cache)), expected)
+    assert cache.stats["hits"] == 1
+
+
+def test_lazy_image_applies_fused_pipeline():
+    """Os tiles de uma 'LazyImage' com estágios combinados correspondem ao pipeline aplicado à imagem inteira."""
+    image = random_image(size=(90, 70))
+    pipeline = Pipeline(["gaussian_blur"] * 3)
+
+    assert np.array_equal(np.asarray(LazyImage(image, tile_size=25).apply(pipeline).crop()),
+                          np.asarray(pipeline(image)))
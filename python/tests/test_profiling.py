@@ -0,0 +1,29 @@
+"""Testa a medição das etapas dos kernels de convolução e dos filtros."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+from PIL import Image
+# Locais
+from convolution_kernel import profile, sharpen
+from convolution_kernel.profiling import clock, record
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+def test_filter_stages_are_recorded():
+    """As etapas de um filtro aplicado dentro de um 'profile' são medidas com durações válidas."""
+    with profile() as records:
+        sharpen(Image.new("RGBA", (20, 10)))
+
+    assert "filter.sharpen" in [stage_record.stage for stage_record in records]
+    assert all(0 <= stage_record.seconds < 10 for stage_record in records)
+
+
+def test_stage_started_before_profile_is_ignored():
+    """Uma etapa iniciada antes da ativação do 'profile' não é medida, ao invés de medir o tempo desde a origem do
+      relógio."""
+    start = clock()
+
+    with profile() as records:
+        record("stage", start)
+        record("measured", clock())
+
+    assert [stage_record.stage for stage_record in records] == ["measured"]
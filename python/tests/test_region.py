@@ -0,0 +1,73 @@
+"""Testa a aplicação dos kernels de convolução e dos filtros a regiões, e a atualização de resultados com
+  'refilter'."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+import pytest
+# Locais
+from convolution_kernel import refilter
+from samples import FILTERS, KERNELS, random_array, random_image
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+def test_region_matches_crop_of_full_result():
+    """A aplicação a uma região é igual ao recorte do resultado da matriz inteira."""
+    for name, (kernel, weight) in KERNELS.items():
+        array = random_array((50, 60, 3))
+        full = kernel.apply_array(array, weight=weight, method="direct")
+        region = kernel.apply_array(array, weight=weight, method="direct", region=(7, 11, 30, 20))
+
+        assert np.array_equal(region, full[11:31, 7:37]), name
+
+
+@pytest.mark.parametrize("name", list(KERNELS))
+@pytest.mark.parametrize("region", [(0, 0, 60, 50), (0, 0, 1, 1), (57, 44, 3, 6), (20, 0, 15, 50)])
+def test_integer_region_matches_crop_of_full_result(name, region):
+    """A aplicação com aritmética inteira a uma região, inclusive nas bordas, é igual ao recorte do resultado
+      inteiro."""
+    kernel, weight = KERNELS[name]
+    array = random_array((50, 60, 3), integer=True).astype(np.uint8)
+    x, y, width, height = region
+
+    full = kernel.apply_integer(array, weight=weight, default=3)
+
+    assert np.array_equal(kernel.apply_integer(array, weight=weight, default=3, region=region),
+                          full[y:y + height, x:x + width])
+
+
+@pytest.mark.parametrize("filter_name", list(FILTERS))
+def test_filter_region_matches_crop_of_filtered_image(filter_name):
+    """Os filtros aplicados a uma região retornam o recorte correspondente da imagem filtrada inteira."""
+    image = random_image(size=(41, 33))
+    expected = np.asarray(FILTERS[filter_name](image))
+
+    result = FILTERS[filter_name](image, region=(5, 0, 30, 12))
+
+    assert np.array_equal(np.asarray(result), expected[0:12, 5:35])
+
+
+def test_region_outside_array_is_rejected():
+    """Regiões que não estão dentro da matriz de dados são rejeitadas."""
+    kernel, weight = KERNELS["sharpen"]
+    array = random_array((10, 12))
+
+    for region in [(0, 0, 13, 10), (-1, 0, 5, 5), (0, 8, 5, 3)]:
+        with pytest.raises(ValueError, match=r"^\[5\]"):
+            kernel.apply_array(array, weight=weight, region=region)
+
+
+@pytest.mark.parametrize("filter_name, parameters", [
+    ("sharpen", {}), ("embossing", {}), ("edge_detection", {"operator": "sobel"}), ("box_blur", {"radius": 3}),
+    ("gaussian_blur", {"sigma": 1.5}),
+])
+def test_refilter_matches_filter(filter_name, parameters):
+    """'refilter' atualiza o resultado anterior para o mesmo resultado do filtro aplicado à imagem editada."""
+    image = random_image(size=(60, 50))
+    previous = FILTERS[filter_name](image, **parameters)
+    edited = image.copy()
+    edited.paste((255, 0, 0, 255), (10, 12, 25, 20))
+    edited.paste((0, 0, 0, 0), (40, 30, 60, 50))
+
+    result = refilter(edited, previous, [(10, 12, 15, 8), (40, 30, 20, 20)], filter_name, **parameters)
+
+    assert np.array_equal(np.asarray(result), np.asarray(FILTERS[filter_name](edited, **parameters)))
@@ -0,0 +1,43 @@
+"""Testa a detecção de kernels separáveis e a sua aplicação em duas passadas unidimensionais."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+import pytest
+# Locais
+from convolution_kernel import ConvolutionKernel
+from samples import KERNELS, random_array
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+def test_separability_is_detected():
+    """Os kernels de posto 1 são separáveis, inclusive com valores reais, e os demais não."""
+    rng = np.random.default_rng(0)
+    outer = ConvolutionKernel(np.outer(rng.random(5), rng.random(7)).tolist())
+
+    assert [name for name, (kernel, _) in KERNELS.items() if kernel.separable] == ["gaussian", "box"]
+    assert outer.separable
+    assert not ConvolutionKernel([[1, 2, 0], [3, 4, 0], [0, 0, 1]]).separable
+
+
+@pytest.mark.parametrize("name", ["gaussian", "box"])
+@pytest.mark.parametrize("shape", [(40, 37), (40, 37, 3)])
+def test_separable_matches_direct(name, shape):
+    """O método "separable" retorna os mesmos valores que o método "direct", e 'apply' os mesmos que 'apply_array'."""
+    kernel, weight = KERNELS[name]
+    array = random_array(shape)
+    expected = kernel.apply_array(array, weight=weight, default=3, method="direct")
+
+    assert np.allclose(kernel.apply_array(array, weight=weight, default=3, method="separable"), expected, rtol=0,
+                       atol=1e-9)
+    if len(shape) == 2:
+        listed = kernel.apply(lambda coord: array[coord[1], coord[0]], limits=(37, 40), weight=weight, default=3,
+                              method="separable")
+        assert np.allclose(np.array(listed).T, expected, rtol=0, atol=1e-9)
+
+
+def test_separable_rejects_non_separable_kernel():
+    """O método "separable" não pode ser pedido para um kernel que não é separável."""
+    kernel, weight = KERNELS["sharpen"]
+
+    with pytest.raises(ValueError, match=r"^\[3\]"):
+        kernel.apply_array(random_array((5, 5)), weight=weight, method="separable")
@@ -0,0 +1,66 @@
+"""Testa a aplicação dos filtros a sequências de quadros."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+import pytest
+from PIL import Image, ImageSequence, PngImagePlugin
+# Locais
+from convolution_kernel import box_blur, filter_sequence, iter_frames
+
+
+# Funções Auxiliares # ----------------------------------------------------------------------------------------------- #
+def _frames():
+    """Dois quadros RGBA: o primeiro vermelho e opaco, o segundo azul com a metade esquerda transparente."""
+    first = np.zeros((16, 20, 4), dtype=np.uint8)
+    first[...] = (255, 0, 0, 255)
+    second = np.zeros((16, 20, 4), dtype=np.uint8)
+    second[:, 10:] = (0, 0, 255, 255)
+    return [Image.fromarray(first), Image.fromarray(second)]
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+def test_frames_match_filter(tmp_path):
+    """Cada quadro filtrado é igual à função do filtro aplicada ao quadro composto."""
+    frames = _frames()
+    frames[0].save(tmp_path / "source.png", save_all=True, append_images=frames[1:], duration=50, disposal=1)
+
+    with Image.open(tmp_path / "source.png") as source:
+        expected = [np.asarray(box_blur(frame.convert("RGBA"))) for frame in ImageSequence.Iterator(source)]
+    results = [frame.pixels.copy() for frame in iter_frames(str(tmp_path / "source.png"), "box_blur")]
+
+    assert len(results) == len(expected)
+    for result, pixels in zip(results, expected):
+        assert np.array_equal(result, pixels)
+
+
+@pytest.mark.parametrize("extension", [".gif", ".png"])
+def test_transparent_pixels_do_not_show_previous_frame(tmp_path, extension):
+    """Os quadros são gravados com descarte para o fundo, e os pixels transparentes de um quadro não exibem o
+      anterior."""
+    frames = _frames()
+    frames[0].save(tmp_path / "source.png", save_all=True, append_images=frames[1:], duration=50, disposal=1)
+
+    filter_sequence(str(tmp_path / "source.png"), str(tmp_path / f"result{extension}"), "box_blur")
+
+    with Image.open(tmp_path / f"result{extension}") as result:
+        if extension == ".gif":
+            assert result.disposal_method == 2
+        else:
+            assert result.info["disposal"] == PngImagePlugin.Disposal.OP_BACKGROUND
+        result.seek(1)
+        pixels = np.asarray(result.convert("RGBA"))
+    assert (pixels[:, :8, 3] == 0).all()
+
+
+@pytest.mark.parametrize("extension", [".gif", ".apng"])
+def test_empty_sequence_is_rejected(tmp_path, extension):
+    """Uma sequência sem quadros é rejeitada, sem gravar um arquivo inválido."""
+    (tmp_path / "frames").mkdir()
+    (tmp_path / "frames" / "notes.txt").write_text("sem quadros")
+
+    with pytest.raises(ValueError, match=r"^\[3\]"):
+        filter_sequence(str(tmp_path / "frames"), str(tmp_path / f"result{extension}"), "sharpen")
+    with pytest.raises(ValueError, match=r"^\[1\]"):
+        filter_sequence(str(tmp_path / "frames"), str(tmp_path / f"result{extension}"), "unknown")
+
+    assert not (tmp_path / f"result{extension}").exists()
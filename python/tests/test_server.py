@@ -0,0 +1,93 @@
+"""Testa o servidor HTTP de filtros através de conexões reais, sem dependências externas."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Módulos
+import asyncio
+import io
+# Bibliotecas
+import numpy as np
+from PIL import Image
+# Locais
+from convolution_kernel import sharpen
+from convolution_kernel.server import FilterServer, post
+
+
+# Funções Auxiliares # ----------------------------------------------------------------------------------------------- #
+def _png(pixels: np.ndarray) -> bytes:
+    """Codifica pixels em PNG."""
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def _serve(server: FilterServer, client):
+    """Inicia o servidor em uma porta livre, executa o cliente e fecha o servidor."""
+    listener = await server.start("127.0.0.1", 0)
+    try:
+        return await client(listener.sockets[0].getsockname()[1])
+    finally:
+        listener.close()
+        await listener.wait_closed()
+        server.close()
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+def test_filter_matches_function():
+    """A imagem retornada pelo servidor é igual à da função do filtro."""
+    pixels = np.random.default_rng(0).integers(0, 256, (20, 30, 3), dtype=np.uint8)
+
+    status, payload = asyncio.run(_serve(FilterServer(workers=1), lambda port: post(
+        "127.0.0.1", port, "/sharpen", _png(pixels))))
+
+    assert status == 200
+    assert np.array_equal(np.asarray(Image.open(io.BytesIO(payload))), np.asarray(sharpen(Image.fromarray(pixels))))
+
+
+def test_overload_rejected_before_reading_body():
+    """Com a fila cheia, inclusive por conexões ainda enviando a imagem, a requisição é recusada sem ler o corpo."""
+    async def client(port):
+        # Uma conexão anuncia um corpo grande e envia apenas parte dele, ocupando a única vaga da fila.
+        _, slow = await asyncio.open_connection("127.0.0.1", port)
+        slow.write(b"POST /sharpen HTTP/1.1\r\nContent-Length: 1000000\r\n\r\n" + b"\0" * 1000)
+        await slow.drain()
+        await asyncio.sleep(0.05)
+
+        # A segunda conexão envia apenas os cabeçalhos, e deve ser respondida mesmo assim.
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"POST /sharpen HTTP/1.1\r\nContent-Length: 1000000\r\n\r\n")
+        await writer.drain()
+        status = await asyncio.wait_for(reader.readline(), timeout=2)
+        writer.close()
+        slow.close()
+        return status
+
+    server = FilterServer(workers=1, queue=1)
+    status = asyncio.run(_serve(server, client))
+
+    assert status.split()[1] == b"503"
+    assert server.stats["rejected"] == 1
+
+
+def test_invalid_and_oversized_images_are_bad_requests(monkeypatch):
+    """Bytes que não são imagens e imagens acima do limite de pixels da biblioteca PIL resultam no status 400."""
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 100)
+    large = _png(np.zeros((30, 30, 3), dtype=np.uint8))
+
+    async def client(port):
+        return [(await post("127.0.0.1", port, "/sharpen", body))[0] for body in (b"not an image", large)]
+
+    assert asyncio.run(_serve(FilterServer(workers=1), client)) == [400, 400]
+
+
+def test_invalid_content_length_is_bad_request():
+    """Tamanhos de corpo negativos ou que não são inteiros resultam no status 400, sem ler o corpo."""
+    async def client(port):
+        statuses = []
+        for declared in (b"-1", b"+5", b"1_0", b"abc"):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"POST /sharpen HTTP/1.1\r\nContent-Length: " + declared + b"\r\n\r\n")
+            await writer.drain()
+            statuses.append((await asyncio.wait_for(reader.readline(), timeout=2)).split()[1])
+            writer.close()
+        return statuses
+
+    assert asyncio.run(_serve(FilterServer(workers=1), client)) == [b"400"] * 4
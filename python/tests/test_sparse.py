@@ -0,0 +1,59 @@
+"""Testa a aplicação direta dos kernels de convolução compilados, que ignora as posições nulas e verifica os limites
+  apenas nas bordas, contra a soma de todas as posições com verificação de limites."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+import pytest
+# Locais
+from convolution_kernel import ConvolutionKernel
+from samples import KERNELS, random_array
+
+
+# Funções Auxiliares # ----------------------------------------------------------------------------------------------- #
+def _reference(kernel, array, weight, default):
+    """Soma todas as posições do kernel para cada posição do array, verificando os limites em cada uma."""
+    height, width = array.shape
+    anchor_x, anchor_y = kernel.anchor
+    result = np.empty(array.shape)
+    for y in range(height):
+        for x in range(width):
+            total = 0
+            for kernel_x in range(kernel.width):
+                for kernel_y in range(kernel.height):
+                    target_x, target_y = x + kernel_x - anchor_x, y + kernel_y - anchor_y
+                    inside = 0 <= target_x < width and 0 <= target_y < height
+                    total += (array[target_y, target_x] if inside else default) * kernel[kernel_x, kernel_y]
+            result[y, x] = total / weight
+
+    return result
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize("name", list(KERNELS))
+@pytest.mark.parametrize("shape", [(9, 12), (2, 3), (1, 1)])
+def test_direct_matches_reference(name, shape):
+    """O método direto é igual à soma de todas as posições, inclusive em arrays menores que o kernel, que não têm
+      posições internas."""
+    kernel, weight = KERNELS[name]
+    array = random_array(shape)
+    expected = _reference(kernel, array, weight, default=6)
+
+    listed = kernel.apply(lambda coord: array[coord[1], coord[0]], limits=(shape[1], shape[0]), weight=weight,
+                          default=6, method="direct")
+
+    assert np.allclose(np.array(listed).T, expected, rtol=0, atol=1e-9)
+    assert np.allclose(kernel.apply_array(array, weight=weight, default=6, method="direct"), expected, rtol=0,
+                       atol=1e-9)
+
+
+def test_modified_kernel_is_recompiled():
+    """Alterar um valor ou a âncora do kernel depois de aplicá-lo muda as posições aplicadas."""
+    kernel = ConvolutionKernel([[0, 0, 0], [0, 1, 0], [0, 0, 0]], anchor=(1, 1))
+    array = random_array((7, 8))
+    assert np.array_equal(kernel.apply_array(array, method="direct"), array)
+
+    kernel[0, 2] = 3
+    assert np.allclose(kernel.apply_array(array, method="direct"), _reference(kernel, array, 1, 0), rtol=0, atol=1e-9)
+
+    kernel.anchor = (0, 0)
+    assert np.allclose(kernel.apply_array(array, method="direct"), _reference(kernel, array, 1, 0), rtol=0, atol=1e-9)
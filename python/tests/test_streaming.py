@@ -0,0 +1,47 @@
+"""Testa a aplicação dos kernels de convolução e dos filtros em faixas horizontais."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+import pytest
+# Locais
+from convolution_kernel import stream_filter
+from samples import FILTERS, KERNELS, random_array, random_image
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize("method", ["direct", "separable"])
+def test_apply_rows_matches_apply_array(method):
+    """'apply_rows' com faixas de alturas variadas reproduz o resultado de 'apply_array' na matriz inteira."""
+    kernel, weight = KERNELS["gaussian"]
+    array = random_array((101, 33, 3))
+    bounds = [0, 1, 14, 15, 60, 101]
+
+    rows = kernel.apply_rows((array[start:end] for start, end in zip(bounds[:-1], bounds[1:])), weight=weight,
+                             method=method)
+
+    assert np.array_equal(np.concatenate(list(rows)), kernel.apply_array(array, weight=weight, method=method))
+
+
+@pytest.mark.parametrize("filter_name", list(FILTERS))
+def test_stream_filter_matches_filter(filter_name, tmp_path):
+    """'stream_filter' escreve o mesmo resultado da função de filtro em um arquivo '.npy' ou em um array, com faixas
+      de qualquer altura."""
+    image = random_image(size=(45, 70))
+    expected = np.asarray(FILTERS[filter_name](image))
+
+    assert np.array_equal(stream_filter(image, str(tmp_path / "image.npy"), filter_name, band_height=9), expected)
+    assert np.array_equal(np.load(tmp_path / "image.npy"), expected)
+
+    destination = np.zeros((70, 45, 4), dtype=np.uint8)
+    assert stream_filter(np.asarray(image), destination, filter_name, band_height=1) is destination
+    assert np.array_equal(destination, expected)
+
+
+def test_stream_filter_rejects_invalid_parameters():
+    """O destino deve ter o formato da imagem, e as faixas devem ter pelo menos uma linha."""
+    image = random_image(size=(10, 8))
+
+    with pytest.raises(ValueError, match=r"^\[2\]"):
+        stream_filter(image, np.zeros((8, 10, 3), dtype=np.uint8), "sharpen")
+    with pytest.raises(ValueError, match=r"^\[4\]"):
+        stream_filter(image, np.zeros((8, 10, 4), dtype=np.uint8), "sharpen", band_height=0)
@@ -0,0 +1,48 @@
+"""Testa a divisão da aplicação dos kernels de convolução e dos filtros entre threads."""
+# Importações # ------------------------------------------------------------------------------------------------------ #
+# Bibliotecas
+import numpy as np
+import pytest
+# Locais
+from samples import FILTERS, KERNELS, random_array, random_image
+
+
+# Testes # ----------------------------------------------------------------------------------------------------------- #
+@pytest.mark.parametrize("name", list(KERNELS))
+@pytest.mark.parametrize("shape", [(57, 43), (57, 43, 3)])
+@pytest.mark.parametrize("integer", [False, True])
+def test_workers_are_bit_identical(name, shape, integer):
+    """O resultado de cada método não depende do número de threads."""
+    kernel, weight = KERNELS[name]
+    array = random_array(shape, integer)
+    methods = ["direct", "fft", "auto"] + ["separable"] * kernel.separable + ["box"] * kernel.uniform
+
+    for method in methods:
+        single = kernel.apply_array(array, weight=weight, method=method, workers=1)
+        for workers in (2, 4):
+            assert np.array_equal(kernel.apply_array(array, weight=weight, method=method, workers=workers), single), \
+                (method, workers)
+
+
+def test_more_workers_than_rows():
+    """Com mais threads do que linhas, o resultado é o mesmo."""
+    kernel, weight = KERNELS["sharpen"]
+    array = random_array((3, 40))
+
+    assert np.array_equal(kernel.apply_array(array, weight=weight, workers=8), kernel.apply_array(array, weight=weight))
+
+
+@pytest.mark.parametrize("filter_name", list(FILTERS))
+def test_filter_workers_are_bit_identical(filter_name):
+    """Os filtros não dependem do número de threads."""
+    image = random_image(size=(83, 61))
+
+    assert np.array_equal(np.asarray(FILTERS[filter_name](image, workers=3)), np.asarray(FILTERS[filter_name](image)))
+
+
+def test_workers_must_be_positive():
+    """O número de threads deve ser pelo menos 1."""
+    kernel, _ = KERNELS["sharpen"]
+
+    with pytest.raises(ValueError, match=r"^\[4\]"):
+        kernel.apply_array(random_array((5, 5)), workers=0)